@@ -1,11 +1,67 @@
 import sys
-from PyQt5.QtWidgets import QApplication, QMainWindow, QLabel, QVBoxLayout, QWidget, QMessageBox
-from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import (
+    QApplication, QMainWindow, QLabel, QVBoxLayout, QWidget, QMessageBox, QTableWidget, QTableWidgetItem, QHeaderView
+)
+from PyQt5.QtCore import QObject, QRunnable, Qt, QThreadPool, pyqtSignal
 from PyQt5.QtGui import QFont
-from PIL import Image
-import pydicom
-import numpy as np
+import multiprocessing
 import os
+import threading
+
+from image_mode_scan import REPORT_COLUMNS, SUPPORTED_SUFFIXES, collect_files, mode_label, probe_file, run_scan
+
+# 폴더를 드롭했을 때 이 개수마다 표를 갱신
+TABLE_UPDATE_EVERY = 200
+
+
+class ModeScanSignals(QObject):
+    # 조사할 파일 수 / (경로, ModeResult) 묶음 / 끝남
+    collected = pyqtSignal(int)
+    rows = pyqtSignal(list)
+    finished = pyqtSignal()
+
+
+class ModeScanJob(QRunnable):
+    """GUI thread 를 막지 않도록 worker thread 에서 폴더를 훑고 process pool 로 조사하는 작업"""
+
+    def __init__(self, dropped_paths):
+        super().__init__()
+        self.dropped_paths = dropped_paths
+        self.signals = ModeScanSignals()
+        self._cancel_event = threading.Event()
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    def run(self):
+        try:
+            self._scan()
+        finally:
+            self.signals.finished.emit()
+
+    def _scan(self):
+        cancelled = self._cancel_event.is_set
+        file_paths = []
+        for path in self.dropped_paths:
+            if os.path.isdir(path):
+                file_paths.extend(collect_files(path, recursive=True))
+            else:
+                file_paths.append(path)
+            if cancelled():
+                return
+        self.signals.collected.emit(len(file_paths))
+        batch = []
+        # generator 를 중간에 닫으면 이미 넘긴 묶음만 마저 끝내고 pool 이 정리됨
+        for row in run_scan(file_paths, os.cpu_count() or 1):
+            if cancelled():
+                return
+            batch.append(row)
+            if len(batch) >= TABLE_UPDATE_EVERY:
+                self.signals.rows.emit(batch)
+                batch = []
+        if batch:
+            self.signals.rows.emit(batch)
+
 
 class ImageModeChecker(QMainWindow):
     def __init__(self):
@@ -19,7 +75,7 @@ class ImageModeChecker(QMainWindow):
         self.layout = QVBoxLayout(self.central_widget)
 
         # 드래그 앤 드롭 안내 레이블
-        self.instruction_label = QLabel("Drag and drop JPG, JPEG, PNG, WebP, TIF, TIFF, or DCM files here")
+        self.instruction_label = QLabel("Drag and drop JPG, JPEG, PNG, WebP, TIF, TIFF, or DCM files or folders here")
         self.instruction_label.setAlignment(Qt.AlignCenter)
         self.layout.addWidget(self.instruction_label)
 
@@ -38,15 +94,30 @@ class ImageModeChecker(QMainWindow):
         self.result_label.setFont(new_font)
         self.layout.addWidget(self.result_label)
 
+        # 폴더/여러 파일 결과 표, 머리글을 누르면 정렬
+        self.table = QTableWidget()
+        self.table.setColumnCount(len(REPORT_COLUMNS))
+        self.table.setHorizontalHeaderLabels(REPORT_COLUMNS)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.table.hide()
+        self.layout.addWidget(self.table)
+
+        # 폴더 조사는 worker thread 에서, 조사 중에는 드롭을 받지 않음
+        self.thread_pool = QThreadPool(self)
+        self.scan_job = None
+        self.modes = {}
+
         # 드래그 앤 드롭 활성화
         self.setAcceptDrops(True)
 
     def dragEnterEvent(self, event):
         # 파일 드래그 시 허용된 확장자 확인
-        if event.mimeData().hasUrls():
+        if self.scan_job is None and event.mimeData().hasUrls():
             for url in event.mimeData().urls():
                 file_path = url.toLocalFile()
-                if file_path.lower().endswith(('.jpg', '.jpeg', '.png', '.webp', '.tif', '.tiff', '.dcm')):
+                if os.path.isdir(file_path) or file_path.lower().endswith(SUPPORTED_SUFFIXES):
                     event.acceptProposedAction()
                     return
             # 지원되지 않는 파일 확장자일 경우 팝업
@@ -54,49 +125,77 @@ class ImageModeChecker(QMainWindow):
         event.ignore()
 
     def dropEvent(self, event):
-        # 드롭된 파일 처리
+        # 드롭된 파일 처리, 폴더나 여러 파일이면 표로
+        if self.scan_job is not None:
+            event.ignore()
+            return
+        dropped_paths = []
         for url in event.mimeData().urls():
             file_path = url.toLocalFile()
-            if file_path.lower().endswith(('.jpg', '.jpeg', '.png', '.webp', '.tif', '.tiff', '.dcm')):
-                # 파일명 표시
-                file_name = os.path.basename(file_path)
-                self.file_name_label.setText(f"File: {file_name}")
-                self.process_file(file_path)
-                break  # 첫 번째 유효 파일만 처리
+            if os.path.isdir(file_path) or file_path.lower().endswith(SUPPORTED_SUFFIXES):
+                dropped_paths.append(file_path)
+        if len(dropped_paths) == 1 and not os.path.isdir(dropped_paths[0]):
+            # 파일명 표시
+            file_name = os.path.basename(dropped_paths[0])
+            self.file_name_label.setText(f"File: {file_name}")
+            self.process_file(dropped_paths[0])
+        elif dropped_paths:
+            self.process_files(dropped_paths)
         event.acceptProposedAction()
 
     def process_file(self, file_path):
-        try:
-            if file_path.lower().endswith('.dcm'):
-                # DICOM 파일 처리
-                dicom = pydicom.dcmread(file_path)
-                if hasattr(dicom, 'PhotometricInterpretation'):
-                    mode = dicom.PhotometricInterpretation
-                    self.result_label.setText(mode)
-                else:
-                    self.result_label.setText("Unknown mode (DICOM)")
-            else:
-                # JPG, JPEG, PNG, WebP, TIF, TIFF 처리
-                with Image.open(file_path) as img:
-                    mode = img.mode
-                    if mode == 'RGB':
-                        self.result_label.setText("RGB")
-                    elif mode == 'RGBA':
-                        # 알파 채널 평균값 계산
-                        alpha = np.array(img.split()[-1])  # 알파 채널 추출
-                        alpha_mean = np.mean(alpha) / 255.0  # 0~255를 0~1로 정규화
-                        self.result_label.setText(f"RGBA(Alpha={alpha_mean:.1f})")
-                    elif mode == 'LA':
-                        # LA 모드 알파 채널 평균값 계산
-                        alpha = np.array(img.split()[-1])  # 알파 채널 추출
-                        alpha_mean = np.mean(alpha) / 255.0
-                        self.result_label.setText(f"LA(Alpha={alpha_mean:.1f})")
-                    else:
-                        self.result_label.setText(mode)
-        except Exception as e:
-            self.result_label.setText(f"Error: Invalid or unsupported file format ({str(e)})")
+        # DICOM 은 헤더만, 이미지는 알파 채널이 있을 때만 decode
+        self.table.hide()
+        self.result_label.setText(mode_label(probe_file(file_path)))
+
+    def process_files(self, dropped_paths):
+        # 폴더/여러 파일은 worker thread 에서 조사하고 결과는 signal 로 받아 표에 채움
+        self.file_name_label.setText("Collecting files...")
+        self.result_label.setText("Checking...")
+        self.table.setSortingEnabled(False)
+        self.table.setRowCount(0)
+        self.table.show()
+        self.modes = {}
+        self.setAcceptDrops(False)
+        self.scan_job = ModeScanJob(dropped_paths)
+        self.scan_job.signals.collected.connect(self.onFilesCollected)
+        self.scan_job.signals.rows.connect(self.onRowsScanned)
+        self.scan_job.signals.finished.connect(self.onScanFinished)
+        self.thread_pool.start(self.scan_job)
+
+    def onFilesCollected(self, count):
+        self.file_name_label.setText(f"{count} file(s)")
+
+    def onRowsScanned(self, rows):
+        start = self.table.rowCount()
+        self.table.setRowCount(start + len(rows))
+        for row, (file_path, result) in enumerate(rows, start):
+            for column, value in enumerate([file_path, *result]):
+                item = QTableWidgetItem()
+                if isinstance(value, float):
+                    value = round(value, 3)
+                if value is not None:
+                    # 숫자는 숫자로 넣어야 숫자 순서로 정렬됨
+                    item.setData(Qt.DisplayRole, value)
+                self.table.setItem(row, column, item)
+            mode = result.mode or ("unknown" if result.format else "error")
+            self.modes[mode] = self.modes.get(mode, 0) + 1
+
+    def onScanFinished(self):
+        self.scan_job = None
+        self.table.setSortingEnabled(True)
+        self.result_label.setText(", ".join(f"{mode} {count}" for mode, count in sorted(self.modes.items())))
+        self.setAcceptDrops(True)
+
+    def closeEvent(self, event):
+        # 창을 닫으면 조사를 멈추고 worker 가 끝날 때까지 기다림
+        if self.scan_job is not None:
+            self.scan_job.cancel()
+        self.thread_pool.waitForDone()
+        super().closeEvent(event)
 
 if __name__ == '__main__':
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
     window = ImageModeChecker()
     window.show()
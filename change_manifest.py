@@ -0,0 +1,205 @@
+"""tag 수정을 실제로 저장하기 전에 바뀔 내용을 미리 기록하는 변경 목록(manifest)
+
+    before = snapshot(dataset)
+    ... dataset 수정 ...
+    changes = diff_snapshots(before, snapshot(dataset))
+    with ManifestWriter("changes.tsv", resume=True) as manifest:
+        if path not in manifest.done:
+            manifest.write(path, changes)
+
+manifest 는 한 줄에 한 변경 (file, tag, keyword, old, new, note) 인 TSV.
+바뀌는 것이 없는 파일은 tag 가 빈 줄 하나, 읽기/수정 오류는 note 에 남김.
+파일 하나의 줄은 한 번에 쓰고 flush 하므로, 중간에 끊기면 마지막 파일만 지우고 이어서 쓸 수 있음
+"""
+import os
+
+from pydicom.dataelem import RawDataElement, convert_raw_data_element
+from pydicom.sequence import Sequence
+
+from dicom_header import PIXEL_DATA_TAG, dataset_charsets
+
+MANIFEST_COLUMNS = ["file", "tag", "keyword", "old", "new", "note"]
+# 없던 tag 를 추가하거나 있던 tag 를 지울 때 old/new 에 쓰는 값
+ABSENT = "<absent>"
+NO_CHANGE_NOTE = "no change"
+_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+_UNESCAPES = {"\\": "\\", "t": "\t", "n": "\n", "r": "\r"}
+
+
+def _escape(text):
+    return str(text).translate(_ESCAPES)
+
+
+def _unescape(text):
+    if "\\" not in text:
+        return text
+    chars = []
+    it = iter(text)
+    for char in it:
+        if char == "\\":
+            char = next(it, "\\")
+            chars.append(_UNESCAPES.get(char, "\\" + char))
+        else:
+            chars.append(char)
+    return "".join(chars)
+
+
+def _value_text(element):
+    value = element.value
+    if isinstance(value, (bytes, bytearray)):
+        return value.hex()
+    return str(value)
+
+
+def _expand(path, element, charsets):
+    """element 하나를 {경로: (keyword, 값 문자열)} 로, sequence 는 item 안까지 펼침"""
+    if isinstance(element, RawDataElement):
+        element = convert_raw_data_element(element, encoding=list(charsets))
+    if element.tag == PIXEL_DATA_TAG:
+        # 헤더만 읽은 dataset 이면 여기까지 오지 않음, 있어도 길이만 기록
+        return {path: (element.keyword, f"<{element.length} bytes>")}
+    if element.VR == "SQ" and isinstance(element.value, Sequence):
+        values = {path: (element.keyword, f"<{len(element.value)} item(s)>")}
+        for index, item in enumerate(element.value):
+            item_charsets = dataset_charsets(item, charsets)
+            for tag in sorted(item.keys()):
+                values.update(_expand(f"{path}[{index}].{tag}", item.get_item(tag), item_charsets))
+        return values
+    return {path: (element.keyword, _value_text(element))}
+
+
+def snapshot(dataset):
+    """수정 전후를 비교하기 위한 dataset 상태, diff_snapshots 에 넘김
+
+    아직 변환되지 않은 element 는 RawDataElement 를 그대로 들고 있다가 바뀐 것만 문자열로 변환
+    (수정하면 dataset 안의 element 가 새 객체로 바뀌므로 같은 객체면 바뀌지 않은 것)
+    """
+    charsets = dataset_charsets(dataset)
+    entries = {}
+    for tag in sorted(dataset.keys()):
+        element = dataset.get_item(tag)
+        if isinstance(element, RawDataElement):
+            entries[tag] = element
+        else:
+            entries[tag] = _expand(str(tag), element, charsets)
+    return charsets, entries
+
+
+def diff_snapshots(before, after):
+    """바뀐 element 의 (tag 경로, keyword, old, new) 목록, tag 순서"""
+    before_charsets, before_entries = before
+    after_charsets, after_entries = after
+    changes = []
+    for tag in sorted(before_entries.keys() | after_entries.keys()):
+        old = before_entries.get(tag)
+        new = after_entries.get(tag)
+        if old is new:
+            continue
+        old_values = {} if old is None else old if isinstance(old, dict) else _expand(str(tag), old, before_charsets)
+        new_values = {} if new is None else new if isinstance(new, dict) else _expand(str(tag), new, after_charsets)
+        for path, (keyword, old_text) in old_values.items():
+            new_text = new_values.get(path, (keyword, ABSENT))[1]
+            if new_text != old_text:
+                changes.append((path, keyword, old_text, new_text))
+        changes.extend(
+            (path, keyword, ABSENT, new_text)
+            for path, (keyword, new_text) in new_values.items()
+            if path not in old_values
+        )
+    return changes
+
+
+def iter_manifest(manifest_path):
+    """manifest 의 각 줄을 column 이름 dict 로, 끝이 잘린 줄은 건너뜀"""
+    with open(manifest_path, encoding="utf-8", newline="\n") as fp:
+        header = fp.readline().rstrip("\n").split("\t")
+        if header != MANIFEST_COLUMNS:
+            raise ValueError(f"{manifest_path} is not a change manifest")
+        for line in fp:
+            if not line.endswith("\n"):
+                break
+            fields = line[:-1].split("\t")
+            if len(fields) != len(MANIFEST_COLUMNS):
+                continue
+            yield dict(zip(MANIFEST_COLUMNS, map(_unescape, fields)))
+
+
+def _recover(manifest_path):
+    """이어 쓰기 전에 끊긴 마지막 파일의 줄을 잘라내고, 끝까지 기록된 파일 집합을 돌려줌
+
+    header 가 없거나 형식이 다르면 None (새로 써야 함)
+    """
+    with open(manifest_path, "rb") as fp:
+        data = fp.read()
+    header = ("\t".join(MANIFEST_COLUMNS) + "\n").encode("utf-8")
+    if not data.startswith(header):
+        return None
+
+    # 줄마다 (시작 위치, file) 를 모으고 마지막 파일의 첫 줄부터 잘라냄
+    # (마지막 파일은 줄이 다 쓰였는지 알 수 없으므로 다시 처리)
+    done = set()
+    last_file = None
+    last_start = len(header)
+    position = len(header)
+    while True:
+        end = data.find(b"\n", position)
+        if end < 0:
+            break
+        name = _unescape(data[position:end].split(b"\t", 1)[0].decode("utf-8", "replace"))
+        if name != last_file:
+            if last_file is not None:
+                done.add(last_file)
+            last_file = name
+            last_start = position
+        position = end + 1
+    with open(manifest_path, "r+b") as fp:
+        fp.truncate(last_start)
+    return done
+
+
+class ManifestWriter:
+    """파일 단위로 변경 목록을 덧붙여 쓰는 writer
+
+    resume=True 이고 manifest 가 있으면 끝까지 기록된 파일을 done 에 넣고 이어서 씀
+    """
+
+    def __init__(self, manifest_path, resume=False):
+        self.path = manifest_path
+        self.done = set()
+        done = _recover(manifest_path) if resume and os.path.exists(manifest_path) else None
+        if done is None:
+            os.makedirs(os.path.dirname(os.path.abspath(manifest_path)), exist_ok=True)
+            self.fp = open(manifest_path, "w", encoding="utf-8", newline="\n")
+            self.fp.write("\t".join(MANIFEST_COLUMNS) + "\n")
+            self.fp.flush()
+        else:
+            self.done = done
+            self.fp = open(manifest_path, "a", encoding="utf-8", newline="\n")
+        self.changed_files = 0
+        self.changes = 0
+
+    def write(self, path, changes, errors=()):
+        """한 파일의 변경 목록과 오류를 한 번에 씀"""
+        file_field = _escape(path)
+        lines = [
+            "\t".join([file_field, _escape(tag), _escape(keyword), _escape(old), _escape(new), ""])
+            for tag, keyword, old, new in changes
+        ]
+        lines.extend("\t".join([file_field, "", "", "", "", _escape(error)]) for error in errors)
+        if not lines:
+            lines.append("\t".join([file_field, "", "", "", "", NO_CHANGE_NOTE]))
+        self.fp.write("\n".join(lines) + "\n")
+        self.fp.flush()
+        self.done.add(path)
+        if changes:
+            self.changed_files += 1
+            self.changes += len(changes)
+
+    def close(self):
+        self.fp.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,224 @@
+"""dcmeditor 의 tag 수정을 여러 process 로 나눠 돌리는 batch 엔진
+
+Tk 없이 동작하도록 분리해 둠 (process pool 의 worker 가 이 module 만 import)
+"""
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from pydicom.tag import Tag
+
+from change_manifest import diff_snapshots, snapshot
+from dicom_header import content_digest, read_for_edit, save_header
+from edit_journal import journal_entry
+from tag_path import compile_path
+
+PATIENT_NAME_TAG = Tag(0x0010, 0x0010)
+# worker 에 한 번에 넘기는 파일 수, worker 당 동시에 처리 중인 묶음 수
+FILES_PER_TASK = 32
+TASKS_PER_WORKER = 4
+
+
+def apply_tag_values(dicom, tag_values, patient_name_charsets=None):
+    """(tag 경로, vr, value) 목록을 dataset 에 적용하고 (오류 메시지 목록, 바꿀 곳이 없던 경로 목록) 을 돌려줌
+
+    tag 경로는 tag_path 문법 ("(0010,0010)", "ReferencedSeriesSequence[*].SeriesInstanceUID",
+    "(1001,\"VUNO\",08)" 등), vr 이 "Same" 이면 있는 element 만 바꾸고 없으면 오류
+    patient_name_charsets 를 주면 Patient's Name 을 바꿀 때 Specific Character Set 도 같이 지정
+    sequence 안 경로인데 그 sequence/item 이 없는 파일은 오류가 아니라 건너뛴 것으로 따로 돌려줌
+    """
+    errors = []
+    unmatched = []
+    for path_text, vr, new_value in tag_values:
+        path = compile_path(path_text)
+        if path.tag == PATIENT_NAME_TAG and patient_name_charsets:
+            dicom.SpecificCharacterSet = list(patient_name_charsets)
+        try:
+            if vr == "Same":
+                changed = path.set(dicom, new_value, create=False)
+            else:
+                changed = path.set(dicom, new_value, vr)
+            if not changed:
+                unmatched.append(path.text)
+        except Exception as e:
+            errors.append(f"Error modifying {path.text}: {e}")
+    return errors, unmatched
+
+
+def edit_file(dicom_path, output_folder, tag_values, patient_name_charsets=None):
+    # 한 파일 헤더 읽기 -> 수정 -> 저장, (오류 메시지 목록, journal 에 남길 JournalEntry, 바꿀 곳이 없던 경로) 를 돌려줌
+    # Pixel Data 는 메모리에 올리지 않고 저장할 때 원본 파일에서 그대로 복사
+    # 오류가 있었던 파일은 JournalEntry 가 None 이라 다음에 다시 처리됨
+    filename = os.path.basename(dicom_path)
+    try:
+        dicom, pixel_ref = read_for_edit(dicom_path)
+        input_digest = content_digest(dicom_path, pixel_ref)
+    except Exception as e:
+        return [f"Error reading DICOM file {filename}: {e}"], None, []
+
+    errors, unmatched = apply_tag_values(dicom, tag_values, patient_name_charsets)
+    output_path = os.path.join(output_folder, filename)
+    try:
+        output_ref = save_header(dicom, pixel_ref, output_path)
+        entry = None if errors else journal_entry(dicom_path, output_path, input_digest, output_ref)
+    except Exception as e:
+        errors.append(f"Error saving {filename}: {e}")
+        entry = None
+    return errors, entry, unmatched
+
+
+def edit_files(paths, output_folder, tag_values, patient_name_charsets=None):
+    return [
+        (path, edit_file(path, output_folder, tag_values, patient_name_charsets))
+        for path in paths
+    ]
+
+
+def preview_file(dicom_path, tag_values, patient_name_charsets=None):
+    """저장하지 않고 헤더만 읽어서 (변경 목록, 오류 메시지 목록, 바꿀 곳이 없던 경로) 를 돌려줌"""
+    try:
+        dicom, _ = read_for_edit(dicom_path)
+    except Exception as e:
+        return [], [f"Error reading DICOM file {os.path.basename(dicom_path)}: {e}"], []
+    before = snapshot(dicom)
+    errors, unmatched = apply_tag_values(dicom, tag_values, patient_name_charsets)
+    return diff_snapshots(before, snapshot(dicom)), errors, unmatched
+
+
+def preview_files(paths, tag_values, patient_name_charsets=None):
+    return [(path, preview_file(path, tag_values, patient_name_charsets)) for path in paths]
+
+
+class BatchEditRunner:
+    """파일 목록을 process pool 로 수정, Tk 의 after 에서 pump() 를 주기적으로 불러 진행
+
+    pump 는 끝난 묶음만 거둬들이고 다음 묶음을 넣기 때문에 main thread 를 오래 막지 않음
+    manifest(change_manifest.ManifestWriter) 를 주면 저장하지 않고 바뀔 내용만 기록 (dry run),
+    manifest 에 이미 있는 파일은 건너뜀
+    journal(edit_journal.EditJournal) 을 주면 저장이 끝난 파일을 기록하고, 이미 끝난 파일은 건너뜀
+    """
+
+    def __init__(
+        self, files, output_folder, tag_values, patient_name_charsets=None, workers=None,
+        manifest=None, journal=None,
+    ):
+        self.manifest = manifest
+        self.journal = journal
+        self.files = list(files)
+        self.skipped = len(self.files)
+        if manifest is not None:
+            self.files = [path for path in self.files if path not in manifest.done]
+        elif journal is not None:
+            self.files = [path for path in self.files if not journal.is_done(path)]
+        self.skipped -= len(self.files)
+        self.total = len(self.files)
+        self.output_folder = output_folder
+        self.tag_values = list(tag_values)
+        self.patient_name_charsets = patient_name_charsets
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.done = 0
+        self.failed_files = 0
+        self.errors = []  # (path, 오류 메시지)
+        self.unmatched = {}  # 경로 -> sequence/item 이 없어 건너뛴 파일 수
+        self.cancelled = False
+        self.next_index = 0
+        self.pending = deque()
+        self.executor = ProcessPoolExecutor(max_workers=self.workers)
+
+    @property
+    def running(self):
+        return self.executor is not None
+
+    def pump(self):
+        # 끝난 묶음 결과를 모으고 빈 자리만큼 새 묶음 submit, 아직 진행 중이면 True
+        if self.executor is None:
+            return False
+        while self.pending and self.pending[0][0].done():
+            future, batch = self.pending.popleft()
+            try:
+                results = future.result()
+            except Exception as e:  # worker process 가 죽은 경우 등
+                self.errors.extend((path, f"Error processing file: {e}") for path in batch)
+                self.failed_files += len(batch)
+                self.done += len(batch)
+                continue
+            for path, result in results:
+                self.done += 1
+                if self.manifest is not None:
+                    changes, errors, unmatched = result
+                    self.manifest.write(path, changes, errors)
+                else:
+                    errors, entry, unmatched = result
+                    if entry is not None and self.journal is not None:
+                        self.journal.record(path, entry)
+                for path_text in unmatched:
+                    self.unmatched[path_text] = self.unmatched.get(path_text, 0) + 1
+                if errors:
+                    self.failed_files += 1
+                    self.errors.extend((path, error) for error in errors)
+
+        while (
+            not self.cancelled
+            and self.next_index < self.total
+            and len(self.pending) < self.workers * TASKS_PER_WORKER
+        ):
+            batch = self.files[self.next_index:self.next_index + FILES_PER_TASK]
+            self.next_index += len(batch)
+            if self.manifest is not None:
+                future = self.executor.submit(preview_files, batch, self.tag_values, self.patient_name_charsets)
+            else:
+                future = self.executor.submit(
+                    edit_files, batch, self.output_folder, self.tag_values, self.patient_name_charsets
+                )
+            self.pending.append((future, batch))
+
+        if not self.pending:
+            self.executor.shutdown(wait=False)
+            self.executor = None
+            self.close()
+            return False
+        return True
+
+    def close(self):
+        # manifest/journal 을 닫음, 창을 닫을 때도 불러서 기록한 만큼은 남김
+        if self.manifest is not None:
+            self.manifest.close()
+        if self.journal is not None:
+            self.journal.close()
+
+    def cancel(self):
+        # 아직 시작 안 한 묶음은 버리고, 이미 돌고 있는 묶음은 끝날 때까지 기다림
+        self.cancelled = True
+        for future, _ in self.pending:
+            future.cancel()
+        self.pending = deque(item for item in self.pending if not item[0].cancelled())
+
+    def report(self, limit=20):
+        """한 번에 보여줄 결과 요약, 오류는 앞의 limit 개만"""
+        status = "Cancelled" if self.cancelled else "Operation Complete!"
+        lines = [f"{status} {self.done}/{self.total} file(s) processed."]
+        if self.skipped:
+            source = "manifest" if self.manifest is not None else "journal"
+            lines.append(f"{self.skipped} file(s) already in the {source} were skipped.")
+        if self.manifest is not None:
+            lines.append(
+                f"Dry run: {self.manifest.changes} change(s) in {self.manifest.changed_files} file(s) "
+                f"written to {self.manifest.path}, no files were saved."
+            )
+        for path_text, count in self.unmatched.items():
+            lines.append(f"{path_text}: no matching sequence item in {count} file(s), left unchanged.")
+        if self.errors:
+            lines.append(f"{len(self.errors)} error(s) in {self.failed_files} file(s):")
+            lines.extend(
+                f"{os.path.basename(path)}: {error}"
+                for path, error in self.errors[:limit]
+            )
+            if len(self.errors) > limit:
+                lines.append(f"... and {len(self.errors) - limit} more")
+        return "\n".join(lines)
+
+    def write_error_log(self, log_path):
+        # 오류 전체 목록은 파일로 남김
+        with open(log_path, "w", encoding="utf-8") as fp:
+            for path, error in self.errors:
+                fp.write(f"{path}\t{error}\n")
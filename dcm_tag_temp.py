@@ -1,12 +1,14 @@
 import os
-import pydicom
+
+from dicom_header import read_for_edit, save_header
 
 def modify_dicom_tags_in_folder(folder_path):
     for filename in os.listdir(folder_path):
         if filename.lower().endswith(".dcm"):
             filepath = os.path.join(folder_path, filename)
             try:
-                ds = pydicom.dcmread(filepath)
+                # Pixel Data 는 읽지 않고 헤더만 수정
+                ds, pixel_ref = read_for_edit(filepath)
 
                 # 1. 파일명(확장자 제외)을 Patient ID에 삽입
                 patient_id = os.path.splitext(filename)[0]
@@ -22,8 +24,8 @@ def modify_dicom_tags_in_folder(folder_path):
                 # 4. Patient's Age
                 ds.PatientAge = '059Y'
 
-                # 덮어쓰기 저장
-                ds.save_as(filepath)
+                # 덮어쓰기 저장 (Pixel Data 는 원본 byte 그대로 복사)
+                save_header(ds, pixel_ref, filepath)
                 print(f"✅ 수정 완료: {filename}")
 
             except Exception as e:
@@ -0,0 +1,173 @@
+"""공개 데이터셋용 비식별화: 개인정보 tag 삭제/비우기, 날짜 이동, UID 재발급, private tag 삭제
+
+    deidentifier = Deidentifier("secret-namespace", UidRemapper("secret-namespace"), date_shift=(-365, -1))
+    pseudonym = deidentifier.apply(dataset, patient_key=dataset.PatientID)
+
+같은 환자(patient_key)는 어느 파일, 어느 process 에서든 같은 가명과 같은 날짜 이동 일수를 받고,
+UID 는 원래 UID 로 remap 하므로 Study/Series/참조 UID 의 관계가 그대로 유지됨.
+namespace 가 가명/날짜/UID 를 정하는 비밀값이므로 공개하지 말 것 (알면 원래 ID 를 대입해서 맞춰볼 수 있음).
+dataset 은 한 번만 훑고, 날짜/UID 는 아직 변환되지 않은 raw 값에서 바로 바꿈
+"""
+import hashlib
+import re
+from datetime import datetime, timedelta
+
+from pydicom.datadict import dictionary_VR
+from pydicom.dataelem import DataElement, RawDataElement
+from pydicom.multival import MultiValue
+
+from tag_path import compile_path
+
+# PS3.15 Annex E Basic Profile 중 이 데이터셋들에 나오는 항목 (필요하면 레시피에서 바꿈)
+DEFAULT_REMOVE = [
+    "OtherPatientIDs", "OtherPatientIDsSequence", "OtherPatientNames", "PatientBirthName",
+    "PatientMotherBirthName", "PatientAddress", "PatientTelephoneNumbers", "MilitaryRank",
+    "BranchOfService", "MedicalRecordLocator", "EthnicGroup", "Occupation", "AdditionalPatientHistory",
+    "PatientComments", "PatientBirthTime", "InstitutionAddress", "InstitutionalDepartmentName",
+    "ReferringPhysicianAddress", "ReferringPhysicianTelephoneNumbers", "PhysiciansOfRecord",
+    "PerformingPhysicianName", "NameOfPhysiciansReadingStudy", "OperatorsName", "RequestingPhysician",
+    "StationName", "DeviceSerialNumber", "RequestAttributesSequence", "ImageComments",
+]
+# Type 2 라 빈 값으로 남겨야 하는 항목
+DEFAULT_EMPTY = [
+    "AccessionNumber", "ReferringPhysicianName", "StudyID", "InstitutionName",
+]
+# 이 접두어로 시작하는 UID 는 DICOM 표준 UID (SOP Class, Transfer Syntax 등) 라 바꾸지 않음
+STANDARD_UID_PREFIX = "1.2.840.10008."
+DATE_VRS = ("DA", "DT")
+DATE_PATTERN = re.compile(r"(?<!\d)(\d{8})")
+DEIDENTIFICATION_METHOD = "Basic profile, dates shifted per patient, UIDs remapped"
+
+
+def _digest(namespace, key):
+    return hashlib.blake2b(f"{namespace}\0{key}".encode("utf-8"), digest_size=16).digest()
+
+
+def pseudonym(namespace, key, length=16):
+    """namespace 와 key 로 정해지는 가명 (대문자 hex)"""
+    return _digest(namespace, key).hex().upper()[:length]
+
+
+def date_offset(namespace, key, low, high):
+    """[low, high] 범위에서 key 마다 항상 같은 날짜 이동 일수"""
+    if low > high:
+        low, high = high, low
+    return low + int.from_bytes(_digest(namespace, "date:" + str(key))[:8], "little") % (high - low + 1)
+
+
+def _element_VR(tag, element):
+    VR = element.VR
+    if VR is None:  # Implicit VR 로 읽은 raw element
+        try:
+            VR = dictionary_VR(tag)
+        except KeyError:
+            return None
+    return VR
+
+
+def _text(element):
+    # raw 면 byte 를 그대로 ASCII 로, 변환된 element 면 값을 '\' 로 이어서
+    if isinstance(element, RawDataElement):
+        if element.value is None:
+            return ""
+        return element.value.decode("ascii", "replace").rstrip("\0 ")
+    value = element.value
+    if value is None:
+        return ""
+    if isinstance(value, (MultiValue, list)):
+        return "\\".join(str(item) for item in value)
+    return str(value)
+
+
+def _set_text(dataset, tag, VR, text):
+    dataset[tag] = DataElement(tag, VR, text.split("\\") if "\\" in text else text)
+
+
+def shift_date_text(text, days):
+    """문자열 안의 YYYYMMDD 를 모두 days 만큼 이동, 날짜가 아니면 그대로"""
+    def shift(match):
+        try:
+            date = datetime.strptime(match.group(1), "%Y%m%d")
+            return (date + timedelta(days=days)).strftime("%Y%m%d")
+        except (ValueError, OverflowError):
+            return match.group(1)
+    return DATE_PATTERN.sub(shift, text)
+
+
+class Deidentifier:
+    """비식별화 설정 하나, 설정은 process 마다 한 번 만들고 파일마다 apply"""
+
+    def __init__(
+        self, namespace, remapper, remove=None, empty=None, date_shift=None,
+        remap_uids=True, remove_private=True, keep_private_creators=(),
+    ):
+        self.namespace = namespace
+        self.remapper = remapper
+        self.remove = [compile_path(path) for path in (DEFAULT_REMOVE if remove is None else remove)]
+        self.empty = [compile_path(path) for path in (DEFAULT_EMPTY if empty is None else empty)]
+        self.date_shift = tuple(date_shift) if date_shift else None
+        self.remap_uids = remap_uids
+        self.remove_private = remove_private
+        self.keep_private_creators = {str(creator).strip() for creator in keep_private_creators}
+
+    def pseudonym(self, patient_key):
+        return pseudonym(self.namespace, patient_key)
+
+    def apply(self, dataset, patient_key):
+        """dataset 을 비식별화하고 이 환자의 가명을 돌려줌, PatientID/PatientName 은 호출하는 쪽에서 지정"""
+        patient_key = str(patient_key)
+        for path in self.remove:
+            path.delete(dataset)
+        for path in self.empty:
+            for parent, tag in path.targets(dataset):
+                if tag in parent:
+                    parent[tag].value = ""
+
+        days = date_offset(self.namespace, patient_key, *self.date_shift) if self.date_shift else 0
+        self._walk(dataset, days)
+
+        file_meta = getattr(dataset, "file_meta", None)
+        if self.remap_uids and file_meta is not None and "SOPInstanceUID" in dataset:
+            file_meta.MediaStorageSOPInstanceUID = dataset.SOPInstanceUID
+        dataset.PatientIdentityRemoved = "YES"
+        dataset.DeidentificationMethod = DEIDENTIFICATION_METHOD
+        return self.pseudonym(patient_key)
+
+    def _private_kept(self, dataset, tag):
+        if not self.keep_private_creators:
+            return False
+        if tag.is_private_creator:
+            creator_tag = tag
+        else:
+            creator_tag = (tag.group << 16) | (tag.element >> 8)
+        if creator_tag not in dataset or creator_tag == tag.group << 16:
+            return False
+        return _text(dataset.get_item(creator_tag)) in self.keep_private_creators
+
+    def _walk(self, dataset, days):
+        # sequence item 안까지 한 번에: private 삭제, 날짜 이동, UID remap
+        for tag in list(dataset.keys()):
+            if tag.is_private and self.remove_private and not self._private_kept(dataset, tag):
+                del dataset[tag]
+                continue
+            element = dataset.get_item(tag)
+            VR = _element_VR(tag, element)
+            if VR == "SQ":
+                for item in dataset[tag].value or ():
+                    self._walk(item, days)
+            elif VR in DATE_VRS and days:
+                text = _text(element)
+                shifted = shift_date_text(text, days)
+                if shifted != text:
+                    _set_text(dataset, tag, VR, shifted)
+            elif VR == "UI" and self.remap_uids:
+                text = _text(element)
+                if not text:
+                    continue
+                uids = [
+                    uid if uid.startswith(STANDARD_UID_PREFIX) else self.remapper.uid(uid, "uid")
+                    for uid in text.split("\\")
+                ]
+                remapped = "\\".join(uids)
+                if remapped != text:
+                    _set_text(dataset, tag, VR, remapped)
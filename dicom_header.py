@@ -0,0 +1,941 @@
+import base64
+import copy
+import hashlib
+import io
+import json
+import os
+import stat
+import struct
+import tempfile
+from collections import OrderedDict, namedtuple
+from functools import lru_cache
+
+import pydicom
+from pydicom.charset import TEXT_VR_DELIMS, convert_encodings, decode_bytes, default_encoding
+from pydicom.datadict import dictionary_description, dictionary_VR
+from pydicom.dataelem import DataElement, RawDataElement, convert_raw_data_element
+from pydicom.filebase import DicomBytesIO
+from pydicom.filereader import read_dataset
+from pydicom.filewriter import write_data_element, write_dataset
+from pydicom.multival import MultiValue
+from pydicom.valuerep import PersonName
+from pydicom.tag import Tag, tag_in_exception
+from pydicom.uid import DeflatedExplicitVRLittleEndian
+
+PIXEL_DATA_TAG = Tag(0x7FE0, 0x0010)
+# Float/Double Float Pixel Data 도 Pixel Data 와 같은 위치에 옴
+PIXEL_DATA_TAGS = (Tag(0x7FE0, 0x0008), Tag(0x7FE0, 0x0009), PIXEL_DATA_TAG)
+SEQUENCE_DELIMITER = (0xFFFE, 0xE0DD)
+UNDEFINED_LENGTH = 0xFFFFFFFF
+# Explicit VR 에서 길이 필드가 4바이트(+2 reserved)인 VR
+EXTRA_LENGTH_VRS = {"OB", "OD", "OF", "OL", "OV", "OW", "SQ", "SV", "UC", "UN", "UR", "UT", "UV"}
+PIXEL_DATA_DISPLAY = "Encoded graphical image data"
+# 복사/내보내기에서 Pixel Data 를 hex/base64 로 쓸 때 최대 byte 수와 한 번에 읽는 크기(3의 배수)
+PIXEL_DUMP_LIMIT = 64 * 1024
+PIXEL_DUMP_CHUNK = 48 * 1024
+PIXEL_EXPORT_MODES = ("Summary", "Hex", "Base64")
+# 헤더만 수정해서 저장할 때 Pixel Data 를 복사하는 buffer 크기 (zero-copy 가 안 되는 경우)
+COPY_BUFFER_SIZE = 8 * 1024 * 1024
+EXPORT_HEADERS = ["Group", "Element", "Description", "VR", "Size", "Value"]
+
+# Specific Character Set 의 영향을 받는 VR, 나머지 VR 은 ASCII 라 pydicom 변환을 그대로 씀
+CHARSET_VRS = {"SH", "LO", "UC", "PN", "ST", "LT", "UT"}
+# ISO 2022 escape 상태가 처음 charset 으로 돌아가는 구분 문자 (PS3.5 6.1.2.5.3)
+CHARSET_DELIMITERS = {
+    "SH": TEXT_VR_DELIMS | {0x5C},
+    "LO": TEXT_VR_DELIMS | {0x5C},
+    "UC": TEXT_VR_DELIMS | {0x5C},
+    "PN": TEXT_VR_DELIMS | {0x5C, 0x3D, 0x5E},
+    "ST": TEXT_VR_DELIMS,
+    "LT": TEXT_VR_DELIMS,
+    "UT": TEXT_VR_DELIMS,
+}
+DEFAULT_CHARSETS = ("ISO_IR 6",)
+# (charset, raw bytes) 별 디코딩 결과 캐시 크기
+DECODE_CACHE_SIZE = 16384
+
+# 탭 구분용 비트, All 탭은 모든 행을 보여줌
+CATEGORY_PATIENT = 1
+CATEGORY_STUDY_SERIES = 2
+CATEGORY_IMAGE = 4
+
+# 태그 목록 한 행, build_tag_index 에서 한 번만 만들어 모든 탭이 같이 씀
+TagRow = namedtuple("TagRow", ["tag", "VR", "name", "size", "value", "categories"])
+# 한 파일을 읽은 결과, memory 는 HeaderCache 에서 쓰는 대략적인 메모리 크기(byte)
+LoadedHeader = namedtuple("LoadedHeader", ["path", "dataset", "pixel_ref", "rows", "memory"])
+# 헤더 byte 수 대비 pydicom Dataset + TagRow 가 차지하는 메모리 배수 (대략)
+HEADER_MEMORY_FACTOR = 8
+# 헤더 비교 결과 한 행, examples 는 (값 미리보기, 파일 경로) 몇 개만 보관
+DiffRow = namedtuple("DiffRow", ["tag", "VR", "name", "status", "present", "distinct", "examples"])
+DIFF_PREVIEW_LENGTH = 120
+
+
+class PixelDataRef:
+    """헤더만 읽었을 때 Pixel Data 위치(offset/length)만 기억해두는 참조"""
+
+    def __init__(self, path, tag, VR, tell, value_offset, length, undefined_length):
+        self.path = path
+        self.tag = tag
+        self.VR = VR
+        self.tell = tell  # element 시작 위치 (tag 부터)
+        self.value_offset = value_offset  # 값 시작 위치
+        self.length = length  # 값 길이 (undefined length 인 경우 delimiter 제외)
+        self.undefined_length = undefined_length
+
+    @property
+    def is_implicit_VR(self):
+        # Implicit VR 이면 element header 가 8byte, Explicit VR 의 OB/OW 등은 12byte
+        return self.value_offset - self.tell == 8
+
+    @property
+    def end(self):
+        # element 가 끝나는 위치, undefined length 면 sequence delimiter(8바이트) 포함
+        return self.value_offset + self.length + (8 if self.undefined_length else 0)
+
+    def read(self):
+        # 실제 값이 필요할 때만 파일에서 읽음
+        with open(self.path, "rb") as fp:
+            fp.seek(self.value_offset)
+            return fp.read(self.length)
+
+    def iter_chunks(self, chunk_size=PIXEL_DUMP_CHUNK, limit=None):
+        # 전체를 메모리에 올리지 않고 chunk_size 씩 읽음, limit 이 있으면 거기까지만
+        remaining = self.length if limit is None else min(self.length, limit)
+        with open(self.path, "rb") as fp:
+            fp.seek(self.value_offset)
+            while remaining > 0:
+                chunk = fp.read(min(chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+    def summary(self):
+        text = f"{self.VR}, {self.length} bytes at offset {self.value_offset}"
+        if self.undefined_length:
+            text += ", encapsulated"
+        return text
+
+    def __repr__(self):
+        return (
+            f"PixelDataRef({self.tag}, {self.VR}, offset={self.value_offset}, "
+            f"length={self.length})"
+        )
+
+
+def dataset_encoding(dataset):
+    # (is_implicit_VR, is_little_endian), pydicom 3 은 original_encoding 사용
+    encoding = getattr(dataset, "original_encoding", None)
+    if encoding and encoding[0] is not None:
+        return encoding
+    return dataset.is_implicit_VR, dataset.is_little_endian
+
+
+def _read_pixel_element(fp, path, dataset):
+    tell = fp.tell()
+    _, is_little_endian = dataset_encoding(dataset)
+    endian = "<" if is_little_endian else ">"
+
+    header = fp.read(8)
+    if len(header) < 8:
+        return None  # Pixel Data 가 없는 파일 (SR, GSPS 등)
+    group, element = struct.unpack(endian + "HH", header[:4])
+    tag = Tag(group, element)
+    if tag not in PIXEL_DATA_TAGS:
+        return None
+
+    # 전송구문과 실제 인코딩이 다른 파일이 있어 VR 자리가 대문자 2개인지로 판단
+    is_implicit_VR = not (header[4:6].isalpha() and header[4:6].isupper())
+    if is_implicit_VR:
+        if tag == PIXEL_DATA_TAG:
+            VR = "OW" if dataset.get("BitsAllocated", 8) > 8 else "OB"
+        else:
+            VR = "OF" if tag == Tag(0x7FE0, 0x0008) else "OD"
+        (length,) = struct.unpack(endian + "L", header[4:])
+    else:
+        VR = header[4:6].decode("ascii", "replace")
+        if VR in EXTRA_LENGTH_VRS:
+            (length,) = struct.unpack(endian + "L", fp.read(4))
+        else:
+            (length,) = struct.unpack(endian + "H", header[6:])
+    value_offset = fp.tell()
+
+    undefined_length = length == UNDEFINED_LENGTH
+    if undefined_length:
+        # Encapsulated 는 item header 만 따라가며 sequence delimiter 위치를 찾음
+        while True:
+            item = fp.read(8)
+            if len(item) < 8:
+                break
+            item_group, item_element, item_length = struct.unpack(endian + "HHL", item)
+            if (item_group, item_element) == SEQUENCE_DELIMITER:
+                fp.seek(-8, os.SEEK_CUR)
+                break
+            fp.seek(item_length, os.SEEK_CUR)
+        length = fp.tell() - value_offset
+
+    return PixelDataRef(path, tag, VR, tell, value_offset, length, undefined_length)
+
+
+def read_header(filepath):
+    """Pixel Data 직전까지만 읽고 (dataset, PixelDataRef or None) 반환"""
+    with open(filepath, "rb") as fp:
+        dataset = pydicom.dcmread(fp, force=True, stop_before_pixels=True)
+        # Deflate 전송구문은 pydicom 이 나머지를 통째로 읽어 fp 가 EOF 에 있으므로 None 이 됨
+        pixel_ref = _read_pixel_element(fp, filepath, dataset)
+        if pixel_ref is not None:
+            # Pixel Data 뒤에 오는 element (Trailing Padding, Digital Signature 등)도 읽어둠
+            fp.seek(pixel_ref.end)
+            is_implicit_VR, is_little_endian = dataset_encoding(dataset)
+            trailing = read_dataset(fp, is_implicit_VR, is_little_endian)
+            for tag in trailing.keys():
+                dataset[tag] = trailing[tag]
+    return dataset, pixel_ref
+
+
+def _original_element(element):
+    # 읽은 직후의 element: raw 는 객체 그대로, sequence 는 item 별로 다시 기록,
+    # 읽을 때 이미 변환된 element (Specific Character Set 등) 는 값을 복사해 둠
+    if isinstance(element, RawDataElement):
+        return element
+    if element.VR != "SQ":
+        return copy.deepcopy(element)
+    if element.value is not None:
+        items = [
+            (item, {tag: _original_element(item.get_item(tag, keep_deferred=True)) for tag in item.keys()})
+            for item in element.value
+        ]
+        return element, items
+    return None
+
+
+def _element_unchanged(dataset, tag, original, charsets):
+    """읽은 뒤로 값이 바뀌지 않았으면 True
+
+    값을 읽기만 해도 raw 가 DataElement 로 바뀌므로, 바뀐 것은 원본 raw 를 다시 변환해서 값/VR 을 비교
+    """
+    element = dataset.get_item(tag, keep_deferred=True)
+    if original is None:
+        return False
+    if isinstance(original, RawDataElement):
+        if element is original:
+            return True
+        if isinstance(element, RawDataElement):
+            return False
+        try:
+            before = convert_raw_data_element(original, encoding=list(charsets), ds=dataset)
+            return element.VR == before.VR and element.value == before.value
+        except Exception:
+            return False
+    if isinstance(original, DataElement):
+        return element.VR == original.VR and element.value == original.value
+    sequence_element, items = original
+    if element is not sequence_element or len(element.value) != len(items):
+        return False
+    for item, (original_item, item_originals) in zip(element.value, items):
+        if item is not original_item or item.keys() != item_originals.keys():
+            return False
+        item_charsets = dataset_charsets(item, charsets)
+        for item_tag, item_original in item_originals.items():
+            if not _element_unchanged(item, item_tag, item_original, item_charsets):
+                return False
+    return True
+
+
+class EditSource:
+    """read_for_edit 로 읽은 원본 파일에서 top-level element 별 byte 범위와 읽은 직후의 element
+
+    save_header 가 바뀌지 않은 element 를 다시 인코딩하지 않고 원본 byte 를 그대로 복사할 때 씀
+    """
+
+    def __init__(self, path, dataset, header_end):
+        self.path = path
+        self.encoding = dataset_encoding(dataset)
+        self.charsets = dataset_charsets(dataset)
+        self.character_set = dataset.original_character_set
+        self.header_end = header_end  # 원본에서 Pixel Data 시작 (없으면 파일 끝)
+        self.originals = {}
+        self.value_tells = []
+        # 읽은 순서(= 파일 순서) 그대로, 순서가 틀린 파일은 locate 에서 걸러짐
+        for tag in dataset.keys():
+            if tag >= PIXEL_DATA_TAGS[0]:
+                break  # Pixel Data 와 그 뒤는 save_header 가 따로 씀
+            element = dataset.get_item(tag, keep_deferred=True)
+            tell = element.value_tell if isinstance(element, RawDataElement) else element.file_tell
+            if tell is None:
+                break
+            self.value_tells.append((tag, tell))
+            self.originals[tag] = _original_element(element)
+
+    def locate(self, data):
+        """원본 헤더 byte 에서 element 별 (start, end) 를 찾음, 맞지 않는 것이 있으면 None
+
+        element header 길이는 VR 이 아니라 파일의 byte 로 판단 (UN 으로 쓰인 element 는 pydicom 이
+        사전 VR 로 바꿔서 읽음). 전송구문과 달리 중간부터 Implicit VR 로 쓰인 파일 등은 None
+        """
+        is_implicit_VR, is_little_endian = self.encoding
+        endian = "<" if is_little_endian else ">"
+        header_lengths = (8,) if is_implicit_VR else (12, 8)
+        starts = []
+        previous = 0
+        for tag, tell in self.value_tells:
+            tag_bytes = struct.pack(endian + "HH", tag.group, tag.element)
+            for header_length in header_lengths:
+                start = tell - header_length
+                if start < previous or data[start:start + 4] != tag_bytes:
+                    continue
+                VR = data[start + 4:start + 6]
+                is_explicit = VR.isalpha() and VR.isupper()
+                if is_implicit_VR or (is_explicit and (header_length == 12) == (VR.decode() in EXTRA_LENGTH_VRS)):
+                    break
+            else:
+                return None
+            starts.append((tag, start))
+            previous = tell
+        if not starts or self.header_end > len(data):
+            return None
+        ends = [start for _, start in starts[1:]] + [self.header_end]
+        return {tag: (start, end) for (tag, start), end in zip(starts, ends)}
+
+    def usable(self, dataset):
+        # 인코딩이나 charset 이 바뀌면 모든 element 를 다시 인코딩해야 함
+        return (
+            bool(self.value_tells)
+            and dataset_encoding(dataset) == self.encoding
+            and _write_encoding(dataset) == self.encoding
+            and dataset._character_set == self.character_set
+            and dataset_charsets(dataset) == self.charsets
+        )
+
+
+def read_for_edit(filepath):
+    """헤더 수정용으로 읽기, 수정 후 save_header 로 저장
+
+    Deflate 전송구문은 Pixel Data 위치를 알 수 없어 전체를 읽고 pixel_ref 는 None.
+    바뀌지 않은 element 를 원본 byte 그대로 저장할 수 있도록 EditSource 를 dataset 에 붙여둠
+    """
+    dataset, pixel_ref = read_header(filepath)
+    transfer_syntax = getattr(getattr(dataset, "file_meta", None), "TransferSyntaxUID", None)
+    if pixel_ref is None and transfer_syntax == DeflatedExplicitVRLittleEndian:
+        return pydicom.dcmread(filepath, force=True), None
+    header_end = pixel_ref.tell if pixel_ref is not None else os.path.getsize(filepath)
+    dataset._edit_source = EditSource(filepath, dataset, header_end)
+    return dataset, pixel_ref
+
+
+def _write_encoding(dataset):
+    # save_as 가 헤더를 쓸 때 쓰는 (is_implicit_VR, is_little_endian), 전송구문 우선
+    transfer_syntax = getattr(getattr(dataset, "file_meta", None), "TransferSyntaxUID", None)
+    if transfer_syntax is not None and transfer_syntax.is_transfer_syntax:
+        return transfer_syntax.is_implicit_VR, transfer_syntax.is_little_endian
+    return dataset_encoding(dataset)
+
+
+def _copy_file_range(src, dst, offset, count):
+    """src 의 offset 부터 count byte 를 dst 현재 위치에 복사
+
+    Linux 는 copy_file_range/sendfile 로 kernel 안에서 바로 복사하고, 안 되면 큰 buffer 로 복사
+    """
+    src_fd, dst_fd = src.fileno(), dst.fileno()
+    for name in ("copy_file_range", "sendfile"):
+        copy = getattr(os, name, None)
+        if copy is None:
+            continue
+        try:
+            while count > 0:
+                if name == "copy_file_range":
+                    copied = copy(src_fd, dst_fd, count, offset)
+                else:
+                    copied = copy(dst_fd, src_fd, offset, count)
+                if copied == 0:
+                    break
+                offset += copied
+                count -= copied
+            if count == 0:
+                return
+        except OSError:
+            pass  # 다른 filesystem, 지원하지 않는 커널 등 -> 다음 방법으로 남은 부분 복사
+
+    src.seek(offset)
+    buffer = bytearray(min(count, COPY_BUFFER_SIZE))
+    view = memoryview(buffer)
+    while count > 0:
+        read = src.readinto(view[:min(count, len(buffer))])
+        if not read:
+            raise EOFError(f"Unexpected end of file while copying {src.name}")
+        dst.write(view[:read])
+        count -= read
+
+
+def _read_source_spans(dataset):
+    # 원본 byte 를 복사할 수 있으면 (원본 헤더 byte, element 별 범위), 아니면 (None, None)
+    source = getattr(dataset, "_edit_source", None)
+    if source is None or not source.usable(dataset):
+        return None, None
+    with open(source.path, "rb") as fp:
+        data = fp.read(source.header_end)
+    spans = source.locate(data)
+    return (data, spans) if spans is not None else (None, None)
+
+
+def _encode_header(dataset, stop_tag=None):
+    """preamble, File Meta 와 stop_tag 앞까지의 element 를 인코딩한 byte
+
+    read_for_edit 로 읽은 dataset 이면 바뀌지 않은 element 는 다시 인코딩하지 않고
+    원본 byte 를 그대로 복사하고 (이어진 element 는 한 번에), 바뀌거나 추가된 element 만 인코딩
+    """
+    data, spans = _read_source_spans(dataset)
+    if data is None:
+        header = dataset if stop_tag is None else dataset[:stop_tag]
+    else:
+        header = dataset[:Tag(0)]  # preamble/File Meta 만 save_as 로 씀
+    if header is not dataset:
+        header.preamble = getattr(dataset, "preamble", None)
+        if hasattr(dataset, "file_meta"):
+            header.file_meta = dataset.file_meta
+    buffer = io.BytesIO()
+    header.save_as(buffer)
+    if data is None:
+        return buffer.getbuffer()
+
+    source = dataset._edit_source
+    fp = DicomBytesIO()
+    fp.is_implicit_VR, fp.is_little_endian = source.encoding
+    fp.write(buffer.getvalue())
+    encodings = dataset.get("SpecificCharacterSet", default_encoding)
+    transfer_syntax = dataset.file_meta.get("TransferSyntaxUID") if hasattr(dataset, "file_meta") else None
+    if (stop_tag is None or PIXEL_DATA_TAG < stop_tag) and PIXEL_DATA_TAG in dataset and (
+        transfer_syntax is not None and transfer_syntax.is_transfer_syntax and not transfer_syntax.is_private
+    ):
+        # save_as 와 같이 압축 전송구문이면 encapsulated (undefined length) 로 씀
+        dataset[PIXEL_DATA_TAG].is_undefined_length = transfer_syntax.is_compressed
+    tags = [tag for tag in sorted(dataset.keys()) if stop_tag is None or tag < stop_tag]
+    unchanged = {
+        tag for tag in tags
+        if tag in spans and _element_unchanged(dataset, tag, source.originals[tag], source.charsets)
+    }
+    # Group Length 는 그 group 이 통째로 그대로일 때만 원본을 남기고, 아니면 save_as 처럼 쓰지 않음
+    changed_groups = {tag.group for tag in tags if tag not in unchanged}
+    changed_groups.update(tag.group for tag in spans if tag not in dataset)
+    copy_start = copy_end = None
+    for tag in tags:
+        if tag.element == 0 and tag.group > 6 and (tag not in unchanged or tag.group in changed_groups):
+            continue
+        if tag in unchanged:
+            start, end = spans[tag]
+            if start != copy_end:
+                if copy_end is not None:
+                    fp.write(data[copy_start:copy_end])
+                copy_start = start
+            copy_end = end
+            continue
+        if copy_end is not None:
+            fp.write(data[copy_start:copy_end])
+            copy_start = copy_end = None
+        with tag_in_exception(tag):
+            write_data_element(fp, dataset.get_item(tag), encodings)
+    if copy_end is not None:
+        fp.write(data[copy_start:copy_end])
+    return fp.getvalue()
+
+
+def _encode_trailing(dataset, pixel_tag):
+    # Pixel Data 뒤에 오는 element (Trailing Padding 등)
+    trailing = dataset[pixel_tag + 1:]
+    if not len(trailing):
+        return b""
+    fp = DicomBytesIO()
+    fp.is_implicit_VR, fp.is_little_endian = _write_encoding(dataset)
+    write_dataset(fp, trailing)
+    return fp.getvalue()
+
+
+def _new_file_mode():
+    # open() 으로 새 파일을 만들 때의 권한 (0o666 에서 umask 를 뺀 값)
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+def _replace_file(output_path, write):
+    """write(dst) 로 임시 파일에 쓰고 fsync 한 뒤 output_path 와 교체, write 의 반환값을 돌려줌
+
+    중간에 죽어도 output_path 는 쓰기 전 또는 쓴 뒤의 파일 중 하나로 남음
+    """
+    output_dir = os.path.dirname(os.path.abspath(output_path))
+    fd, temp_path = tempfile.mkstemp(dir=output_dir, suffix=".tmp")
+    try:
+        # mkstemp 는 0600 으로 만드므로 기존 파일의 권한, 새 파일이면 umask 기본값으로 맞춤
+        try:
+            mode = stat.S_IMODE(os.stat(output_path).st_mode)
+        except FileNotFoundError:
+            mode = _new_file_mode()
+        os.chmod(temp_path, mode)
+        with os.fdopen(fd, "wb", buffering=0) as dst:
+            result = write(dst)
+            os.fsync(dst.fileno())
+        os.replace(temp_path, output_path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+    return result
+
+
+def save_header(dataset, pixel_ref, output_path):
+    """수정한 헤더만 다시 인코딩하고 Pixel Data 는 원본 파일에서 byte 그대로 복사해 저장
+
+    read_for_edit 로 읽었으면 헤더 안에서도 바뀐 element 만 인코딩하고 나머지는 원본 byte 를 복사함.
+    임시 파일에 쓰고 교체하므로 output_path 가 원본 파일이어도 됨.
+    저장한 파일의 PixelDataRef 를 돌려줌 (전체를 다시 쓴 경우 None)
+    """
+    if pixel_ref is not None and (
+        pixel_ref.is_implicit_VR != _write_encoding(dataset)[0]
+        or dataset_encoding(dataset) != _write_encoding(dataset)
+    ):
+        # 전송구문과 실제 인코딩이 다른 파일은 Pixel Data 도 읽어서 전체를 다시 씀
+        dataset[pixel_ref.tag] = DataElement(
+            pixel_ref.tag, pixel_ref.VR, pixel_ref.read(),
+            is_undefined_length=pixel_ref.undefined_length,
+        )
+        pixel_ref = None
+
+    def write(dst):
+        if pixel_ref is None:
+            dst.write(_encode_header(dataset))
+            return None
+        # Pixel Data 앞 / 뒤(Trailing Padding 등)를 나눠서 헤더 쪽만 인코딩
+        header = _encode_header(dataset, pixel_ref.tag)
+        dst.write(header)
+        tell = len(header)
+        with open(pixel_ref.path, "rb") as src:
+            _copy_file_range(src, dst, pixel_ref.tell, pixel_ref.end - pixel_ref.tell)
+        dst.write(_encode_trailing(dataset, pixel_ref.tag))
+        return PixelDataRef(
+            output_path, pixel_ref.tag, pixel_ref.VR, tell,
+            tell + pixel_ref.value_offset - pixel_ref.tell,
+            pixel_ref.length, pixel_ref.undefined_length,
+        )
+
+    return _replace_file(output_path, write)
+
+
+def _element_header(tag, VR, length, encoding):
+    # element 의 tag/VR/길이 부분, Pixel Data 처럼 값을 따로 쓸 때 (VR 은 OB/OW 등 4byte 길이 VR)
+    is_implicit_VR, is_little_endian = encoding
+    endian = "<" if is_little_endian else ">"
+    if is_implicit_VR:
+        return struct.pack(endian + "HHL", tag.group, tag.element, length)
+    return struct.pack(endian + "HH2sHL", tag.group, tag.element, VR.encode("ascii"), 0, length)
+
+
+def save_pixel_frames(dataset, frames, length, output_path, VR="OW", encapsulated=False):
+    """헤더를 쓰고 Pixel Data 는 frames 에서 frame 을 하나씩 받는 대로 바로 써서 저장
+
+    frames 는 frame 의 byte (bytes, numpy 배열 등 buffer, 파일의 byte order) 를 차례로 돌려주는
+    iterable 이고 모두 합쳐 length byte. Pixel Data 전체를 메모리에 만들지 않음.
+    encapsulated 면 frame 하나를 압축된 fragment 하나로 쓰고 (빈 Basic Offset Table, undefined length)
+    length 는 쓰지 않음. 전송구문은 dataset.file_meta 에 맞춰 두어야 함.
+    dataset 에는 Pixel Data 가 없어야 함 (read_for_edit 결과). 저장한 파일의 PixelDataRef 를 돌려줌
+    """
+    if any(tag in dataset for tag in PIXEL_DATA_TAGS):
+        raise ValueError("dataset already has Pixel Data")
+    encoding = _write_encoding(dataset)
+    endian = "<" if encoding[1] else ">"
+    if encapsulated:
+        padded_length = UNDEFINED_LENGTH
+    else:
+        padded_length = length + length % 2
+
+    def write(dst):
+        header = _encode_header(dataset, PIXEL_DATA_TAG)
+        element = _element_header(PIXEL_DATA_TAG, VR, padded_length, encoding)
+        dst.write(header)
+        dst.write(element)
+        written = 0
+        if encapsulated:
+            dst.write(struct.pack(endian + "HHL", 0xFFFE, 0xE000, 0))  # 빈 Basic Offset Table
+            written += 8
+        for frame in frames:
+            frame = memoryview(frame).cast("B")
+            odd = frame.nbytes % 2
+            if encapsulated:
+                dst.write(struct.pack(endian + "HHL", 0xFFFE, 0xE000, frame.nbytes + odd))
+                written += 8
+            dst.write(frame)
+            written += frame.nbytes
+            if encapsulated and odd:
+                dst.write(b"\0")
+                written += 1
+        if encapsulated:
+            dst.write(struct.pack(endian + "HHL", *SEQUENCE_DELIMITER, 0))
+        else:
+            if written != length:
+                raise ValueError(f"Pixel Data length mismatch: expected {length} bytes, got {written}")
+            if padded_length != length:
+                dst.write(b"\0")
+                written += 1
+        dst.write(_encode_trailing(dataset, PIXEL_DATA_TAG))
+        tell = len(header)
+        return PixelDataRef(output_path, PIXEL_DATA_TAG, VR, tell, tell + len(element), written, encapsulated)
+
+    return _replace_file(output_path, write)
+
+
+def content_digest(path, pixel_ref=None):
+    """파일 내용의 blake2b, pixel_ref 를 주면 Pixel Data 값은 읽지 않고 길이만 반영
+
+    save_header 는 Pixel Data 를 byte 그대로 복사하므로 헤더가 같은지 보는 데는 이걸로 충분함
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as fp:
+        if pixel_ref is not None:
+            digest.update(fp.read(pixel_ref.value_offset))
+            digest.update(struct.pack("<Q", pixel_ref.length))
+            fp.seek(pixel_ref.value_offset + pixel_ref.length)
+        for chunk in iter(lambda: fp.read(COPY_BUFFER_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def tag_categories(element):
+    # Patient / Study/Series / Image 탭에 들어갈지 비트로 표시
+    categories = 0
+    name = element.name
+    if element.tag.group == 0x0010:
+        categories |= CATEGORY_PATIENT
+    if "Study" in name or "Series" in name:
+        categories |= CATEGORY_STUDY_SERIES
+    if (
+        element.tag.group == 0x0028
+        or "Pixel" in name
+        or "Bit" in name
+        or "Image" in name
+        or "Window" in name
+    ):
+        categories |= CATEGORY_IMAGE
+    return categories
+
+
+def _tag_row(element, categories):
+    # 값은 문자열로 바꾸지 않고 그대로 들고 있다가 화면에 보일 때 value_text 로 만듦
+    size = len(element.value) if element.VR == "SQ" else None
+    return TagRow(element.tag, element.VR, element.name, size, element.value, categories)
+
+
+# 디코딩한 text element, _tag_row/tag_categories 에서 DataElement 대신 씀
+_TextElement = namedtuple("_TextElement", ["tag", "VR", "name", "value"])
+
+
+def dataset_charsets(dataset, parent=DEFAULT_CHARSETS):
+    # Sequence item 에 Specific Character Set 이 없으면 상위 dataset 것을 그대로 씀
+    if "SpecificCharacterSet" not in dataset:
+        return parent
+    charsets = dataset.SpecificCharacterSet
+    if isinstance(charsets, str):
+        charsets = [charsets]
+    return tuple(charsets or ()) or parent
+
+
+@lru_cache(maxsize=None)
+def _python_encodings(charsets):
+    return convert_encodings(list(charsets))
+
+
+@lru_cache(maxsize=DECODE_CACHE_SIZE)
+def decode_text(raw, charsets, VR):
+    """raw bytes 를 charset 조합(ISO 2022 escape 포함)으로 디코딩, 같은 값은 한 번만 디코딩
+
+    ST/LT/UT 는 문자열, 나머지는 '\\' 로 나눈 값 tuple 을 돌려줌
+    """
+    text = decode_bytes(raw, _python_encodings(charsets), CHARSET_DELIMITERS[VR])
+    if VR in ("ST", "LT", "UT"):
+        return text.rstrip("\0 ")
+    if VR == "PN":
+        # 뒤쪽 빈 component 의 '=' 는 pydicom 처럼 떼어냄
+        return tuple(value.rstrip("=") for value in text.rstrip("\0 ").split("\\"))
+    return tuple(value.rstrip("\0 ") for value in text.split("\\"))
+
+
+def _decoded_element(dataset, tag, charsets):
+    # 아직 변환 안 된 표준 text element 만 직접 디코딩, 그 외(private 포함)는 None
+    raw = dataset.get_item(tag)
+    if not isinstance(raw, RawDataElement) or not raw.value or tag.is_private:
+        return None
+    VR = raw.VR
+    if VR is None:  # Implicit VR 파일은 사전에서 VR 을 찾음
+        try:
+            VR = dictionary_VR(tag)
+        except KeyError:
+            return None
+    if VR not in CHARSET_VRS:
+        return None
+    value = decode_text(raw.value, charsets, VR)
+    if not isinstance(value, str):
+        value_type = PersonName if VR == "PN" else str
+        value = value_type(value[0]) if len(value) == 1 else MultiValue(value_type, value)
+    return _TextElement(tag, VR, dictionary_description(tag), value)
+
+
+def iter_elements(dataset, charsets=None):
+    """dataset.iterall() 과 같은 순서로 element 를 돌려줌
+
+    text VR 은 pydicom 변환 대신 decode_text 로 디코딩 (Sequence item 의 charset 도 따름)
+    """
+    charsets = dataset_charsets(dataset, charsets or DEFAULT_CHARSETS)
+    for tag in sorted(dataset.keys()):
+        element = _decoded_element(dataset, tag, charsets)
+        if element is not None:
+            yield element
+            continue
+        element = dataset[tag]
+        yield element
+        if element.VR == "SQ":
+            for item in element.value:
+                yield from iter_elements(item, charsets)
+
+
+def value_text(tag_row):
+    # Sequence 는 하위 item 전체를 문자열로 만들면 너무 커서 item 개수만 표시
+    if tag_row.VR == "SQ":
+        return f"Sequence of {len(tag_row.value)} item(s)"
+    return str(tag_row.value)
+
+
+def value_size(tag_row, text=None):
+    # Size 는 표시 문자열 길이, Pixel Data/Sequence 는 미리 정해둔 값 사용
+    if tag_row.size is not None:
+        return tag_row.size
+    if not tag_row.value:
+        return 0
+    return len(value_text(tag_row) if text is None else text)
+
+
+class LoadCancelled(Exception):
+    """다른 파일을 열거나 취소 버튼을 눌러 읽기를 중단했을 때"""
+
+
+def build_tag_index(dataset, pixel_ref=None, cancelled=None):
+    """dataset 을 한 번만 훑어서 (group, element) 순으로 정렬된 TagRow 목록 생성
+
+    cancelled 는 인자 없는 함수로, True 를 돌려주면 LoadCancelled 로 중단
+    """
+    rows = []
+
+    # Meta 정보 tag 는 All 탭에만 나오도록 categories 0
+    if hasattr(dataset, "file_meta"):
+        for element in dataset.file_meta:
+            rows.append(_tag_row(element, 0))
+
+    seen_tags = set()  # Sequence 안쪽에 같은 tag 가 있으면 처음 것만 사용
+    for count, element in enumerate(iter_elements(dataset)):  # 모든 태그 포함 (Standard + Private)
+        if cancelled is not None and count % 1000 == 0 and cancelled():
+            raise LoadCancelled()
+        if element.tag in seen_tags:
+            continue
+        seen_tags.add(element.tag)
+        rows.append(_tag_row(element, tag_categories(element)))
+
+    if pixel_ref is not None and pixel_ref.tag not in seen_tags:
+        # Pixel Data 는 값을 읽지 않고 위치 정보로만 한 행 생성
+        name = dictionary_description(pixel_ref.tag)
+        rows.append(
+            TagRow(pixel_ref.tag, pixel_ref.VR, name, pixel_ref.length,
+                   PIXEL_DATA_DISPLAY, CATEGORY_IMAGE)
+        )
+
+    rows.sort(key=lambda row: row.tag)
+    return rows
+
+
+def header_memory_size(path, pixel_ref, rows):
+    # Pixel Data 앞까지의 byte 수로 메모리 사용량을 어림잡음
+    header_bytes = pixel_ref.tell if pixel_ref is not None else os.path.getsize(path)
+    return header_bytes * HEADER_MEMORY_FACTOR + len(rows) * 200
+
+
+class HeaderCache:
+    """읽어둔 LoadedHeader 를 메모리 한도 안에서 최근 사용 순으로 들고 있는 LRU cache"""
+
+    def __init__(self, max_bytes=512 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._items = OrderedDict()
+
+    def __contains__(self, path):
+        return path in self._items
+
+    def __len__(self):
+        return len(self._items)
+
+    def get(self, path):
+        loaded = self._items.get(path)
+        if loaded is not None:
+            self._items.move_to_end(path)
+        return loaded
+
+    def put(self, loaded):
+        old = self._items.pop(loaded.path, None)
+        if old is not None:
+            self.total_bytes -= old.memory
+        self._items[loaded.path] = loaded
+        self.total_bytes += loaded.memory
+        # 한도를 넘으면 오래 안 본 것부터 버림, 방금 넣은 것은 남김
+        while self.total_bytes > self.max_bytes and len(self._items) > 1:
+            _, evicted = self._items.popitem(last=False)
+            self.total_bytes -= evicted.memory
+
+    def clear(self):
+        self._items.clear()
+        self.total_bytes = 0
+
+
+def header_fingerprint(path):
+    """비교용 헤더 요약: (path, {tag: (값 hash 8byte, VR, Description, 값 미리보기)})
+
+    process pool 에서 돌리므로 Dataset 대신 작은 dict 만 돌려줌, 못 읽으면 (path, None)
+    """
+    try:
+        dataset, pixel_ref = read_header(path)
+        rows = build_tag_index(dataset, pixel_ref)
+    except Exception:
+        return path, None
+    fingerprint = {}
+    for row in rows:
+        if pixel_ref is not None and row.tag == pixel_ref.tag:
+            text = f"{row.size} bytes"  # Pixel Data 는 읽지 않고 길이로만 비교
+        elif row.VR == "SQ":
+            text = str(row.value)  # 하위 item 까지 모두 비교
+        else:
+            text = value_text(row)
+        digest = hashlib.blake2b(text.encode("utf-8", "replace"), digest_size=8).digest()
+        fingerprint[int(row.tag)] = (digest, str(row.VR), row.name, text[:DIFF_PREVIEW_LENGTH])
+    return path, fingerprint
+
+
+class _DiffEntry:
+    def __init__(self, VR, name):
+        self.VR = VR
+        self.name = name
+        self.present = 0
+        self.digests = set()
+        self.examples = []
+
+
+class HeaderDiff:
+    """여러 파일의 header_fingerprint 를 모아 tag 별로 값이 같은지/다른지 집계
+
+    파일별 Dataset 은 들고 있지 않고 tag 별 서로 다른 hash 와 예시 몇 개만 남김
+    """
+
+    MAX_EXAMPLES = 3
+
+    def __init__(self):
+        self.file_count = 0
+        self.failed = []
+        self._entries = {}
+
+    def add(self, path, fingerprint):
+        if fingerprint is None:
+            self.failed.append(path)
+            return
+        self.file_count += 1
+        for tag, (digest, VR, name, preview) in fingerprint.items():
+            entry = self._entries.get(tag)
+            if entry is None:
+                entry = self._entries[tag] = _DiffEntry(VR, name)
+            entry.present += 1
+            if digest not in entry.digests:
+                entry.digests.add(digest)
+                if len(entry.examples) < self.MAX_EXAMPLES:
+                    entry.examples.append((preview, path))
+
+    def rows(self):
+        rows = []
+        for tag in sorted(self._entries):
+            entry = self._entries[tag]
+            if len(entry.digests) > 1:
+                status = "Differ"
+            elif entry.present < self.file_count:
+                status = "Missing"
+            else:
+                status = "Match"
+            rows.append(
+                DiffRow(Tag(tag), entry.VR, entry.name, status, entry.present,
+                        len(entry.digests), entry.examples)
+            )
+        return rows
+
+
+def iter_pixel_text(pixel_ref, mode="Summary", limit=PIXEL_DUMP_LIMIT):
+    """Pixel Data 를 요약 또는 hex/base64 문자열 조각으로 순서대로 돌려줌 (limit byte 까지만)"""
+    if mode == "Summary":
+        yield pixel_ref.summary()
+        return
+    for chunk in pixel_ref.iter_chunks(PIXEL_DUMP_CHUNK, limit):
+        if mode == "Hex":
+            yield chunk.hex()
+        else:
+            yield base64.b64encode(chunk).decode("ascii")
+    if pixel_ref.length > limit:
+        yield f" ... (first {limit} of {pixel_ref.length} bytes)"
+
+
+def _tsv_field(text):
+    # 한 행이 한 줄이 되도록 tab/줄바꿈은 escape
+    return text.replace("\\", "\\\\").replace("\t", "\\t").replace("\r", "\\r").replace("\n", "\\n")
+
+
+def _row_fields(tag_row):
+    return [
+        f"{tag_row.tag.group:04X}",
+        f"{tag_row.tag.element:04X}",
+        tag_row.name,
+        str(tag_row.VR),
+        str(value_size(tag_row)),
+    ]
+
+
+def write_tag_rows(fp, tag_rows, fmt="tsv", pixel_ref=None, pixel_mode="Summary",
+                   columns=None, header=True):
+    """TagRow 들을 한 행씩 fp 에 씀, Pixel Data 값은 조각으로 나눠 씀
+
+    fmt 은 "tsv" 또는 "json", columns 는 쓸 열 번호 목록 (기본은 6열 모두)
+    """
+    columns = list(range(len(EXPORT_HEADERS))) if columns is None else columns
+    value_column = len(EXPORT_HEADERS) - 1
+    if fmt == "json":
+        fp.write("[")
+    elif header:
+        fp.write("\t".join(EXPORT_HEADERS[column] for column in columns) + "\n")
+
+    for count, tag_row in enumerate(tag_rows):
+        fields = _row_fields(tag_row)
+        is_pixel = pixel_ref is not None and tag_row.tag == pixel_ref.tag
+        if not is_pixel:
+            fields.append(value_text(tag_row))
+        if fmt == "json":
+            fp.write(",\n" if count else "\n")
+            items = [
+                f"{json.dumps(EXPORT_HEADERS[column])}: {json.dumps(fields[column], ensure_ascii=False)}"
+                for column in columns
+                if column != value_column or not is_pixel
+            ]
+            fp.write("{" + ", ".join(items))
+            if is_pixel and value_column in columns:
+                fp.write(f"{', ' if items else ''}{json.dumps(EXPORT_HEADERS[value_column])}: \"")
+                for text in iter_pixel_text(pixel_ref, pixel_mode):
+                    fp.write(json.dumps(text)[1:-1])
+                fp.write('"')
+            fp.write("}")
+        else:
+            texts = [_tsv_field(fields[column]) for column in columns if column != value_column or not is_pixel]
+            fp.write("\t".join(texts))
+            if is_pixel and value_column in columns:
+                if texts:
+                    fp.write("\t")
+                for text in iter_pixel_text(pixel_ref, pixel_mode):
+                    fp.write(text)
+            fp.write("\n")
+
+    if fmt == "json":
+        fp.write("\n]\n")
@@ -0,0 +1,217 @@
+"""화면 없이 폴더 전체의 DICOM 헤더를 CSV/Parquet 로 덤프
+
+    python dicom_tag_dump.py D:\\pacs -o tags.csv
+    python dicom_tag_dump.py D:\\pacs E:\\archive -o tags.parquet --workers 16
+
+한 element 당 한 행 (file, tag, VR, length, value), 파일을 읽는 대로 바로 씀
+"""
+import argparse
+import csv
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from pydicom.misc import is_dicom
+
+from dicom_header import build_tag_index, read_header, value_size, value_text
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet 출력은 pyarrow 가 있을 때만
+    pa = None
+    pq = None
+
+DUMP_COLUMNS = ["file", "tag", "VR", "length", "value"]
+# process 하나에 한 번에 넘기는 파일 수, 동시에 처리 중인 묶음 수(worker 당)
+FILES_PER_TASK = 64
+TASKS_PER_WORKER = 4
+PROGRESS_INTERVAL = 10.0  # 초
+# 값 대신 byte 수만 기록하는 VR
+BINARY_VRS = {"OB", "OD", "OF", "OL", "OV", "OW", "UN"}
+
+
+def iter_dicom_paths(roots):
+    # 폴더는 하위 폴더까지 모두, 파일은 그대로
+    for root in roots:
+        if os.path.isfile(root):
+            yield root
+            continue
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames.sort()
+            for filename in sorted(filenames):
+                yield os.path.join(dirpath, filename)
+
+
+def is_binary_VR(VR):
+    # "OB or OW" 처럼 사전 VR 이 여러 개인 경우도 모두 binary 면 True
+    return set(str(VR).split(" or ")) <= BINARY_VRS
+
+
+def _batches(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def dump_file(path):
+    """한 파일의 (tag, VR, length, value) 목록, DICOM 이 아니면 None, 못 읽으면 오류 문자열"""
+    try:
+        if not is_dicom(path):
+            return None
+        dataset, pixel_ref = read_header(path)
+        rows = []
+        for tag_row in build_tag_index(dataset, pixel_ref):
+            if pixel_ref is not None and tag_row.tag == pixel_ref.tag:
+                value = pixel_ref.summary()  # Pixel Data 는 읽지 않고 위치만 기록
+                size = value_size(tag_row)
+            elif is_binary_VR(tag_row.VR):
+                # Waveform Data 등 binary 값은 크기만 (str(bytes) 는 수백 KB 가 됨)
+                size = len(tag_row.value or b"")
+                value = f"<{size} bytes>"
+            else:
+                value = value_text(tag_row)
+                size = value_size(tag_row, value)
+            rows.append((str(tag_row.tag), str(tag_row.VR), size, value))
+        return rows
+    except Exception as e:
+        return str(e) or e.__class__.__name__
+
+
+def dump_files(paths):
+    # process pool 에 파일 하나씩 넘기면 주고받는 비용이 커서 묶음 단위로 처리
+    return [(path, dump_file(path)) for path in paths]
+
+
+def iter_dumps(paths, workers):
+    """(path, dump_file 결과) 를 파일 순서대로 돌려줌
+
+    한꺼번에 submit 하지 않고 처리 중인 묶음 수를 제한해서 파일 수가 많아도 메모리가 일정
+    """
+    batches = _batches(paths, FILES_PER_TASK)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for batch in batches:
+            pending.append(executor.submit(dump_files, batch))
+            if len(pending) >= workers * TASKS_PER_WORKER:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+class CsvDumpWriter:
+    def __init__(self, output):
+        if output == "-":
+            self.fp = sys.stdout
+        else:
+            self.fp = open(output, "w", encoding="utf-8-sig", newline="")
+        self.writer = csv.writer(self.fp)
+        self.writer.writerow(DUMP_COLUMNS)
+
+    def write(self, path, rows):
+        self.writer.writerows((path,) + row for row in rows)
+
+    def close(self):
+        if self.fp is not sys.stdout:
+            self.fp.close()
+
+
+class ParquetDumpWriter:
+    # 파일 몇 개 분량씩 모아서 row group 으로 씀
+    ROWS_PER_GROUP = 200000
+
+    def __init__(self, output):
+        self.schema = pa.schema([
+            ("file", pa.string()),
+            ("tag", pa.string()),
+            ("VR", pa.string()),
+            ("length", pa.int64()),
+            ("value", pa.string()),
+        ])
+        self.writer = pq.ParquetWriter(output, self.schema)
+        self.columns = [[] for _ in DUMP_COLUMNS]
+
+    def write(self, path, rows):
+        files, tags, VRs, lengths, values = self.columns
+        for tag, VR, length, value in rows:
+            files.append(path)
+            tags.append(tag)
+            VRs.append(VR)
+            lengths.append(length)
+            values.append(value)
+        if len(files) >= self.ROWS_PER_GROUP:
+            self.flush()
+
+    def flush(self):
+        if self.columns[0]:
+            self.writer.write_table(pa.Table.from_arrays(self.columns, schema=self.schema))
+            self.columns = [[] for _ in DUMP_COLUMNS]
+
+    def close(self):
+        self.flush()
+        self.writer.close()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Dump DICOM headers of whole folders to CSV or Parquet without the GUI."
+    )
+    parser.add_argument("paths", nargs="+", help="DICOM files or folders (searched recursively)")
+    parser.add_argument("-o", "--output", required=True, help="output file (.csv, .parquet, or - for stdout)")
+    parser.add_argument("--format", choices=["csv", "parquet"], help="output format (default: from extension)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="number of worker processes")
+    args = parser.parse_args(argv)
+
+    if args.format is None:
+        args.format = "parquet" if args.output.lower().endswith(".parquet") else "csv"
+    if args.format == "parquet":
+        if pa is None:
+            parser.error("Parquet output needs pyarrow (pip install pyarrow)")
+        if args.output == "-":
+            parser.error("Parquet output cannot be written to stdout")
+    args.workers = max(1, args.workers)
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    writer = ParquetDumpWriter(args.output) if args.format == "parquet" else CsvDumpWriter(args.output)
+
+    dumped = skipped = failed = 0
+    started = last_report = time.monotonic()
+    try:
+        for path, rows in iter_dumps(iter_dicom_paths(args.paths), args.workers):
+            if rows is None:
+                skipped += 1
+            elif isinstance(rows, str):
+                failed += 1
+                print(f"Error reading {path}: {rows}", file=sys.stderr)
+            else:
+                dumped += 1
+                writer.write(path, rows)
+
+            now = time.monotonic()
+            if now - last_report >= PROGRESS_INTERVAL:
+                last_report = now
+                print(f"{dumped} dumped, {skipped} skipped, {failed} failed ({now - started:.0f}s)", file=sys.stderr)
+    except KeyboardInterrupt:
+        print("Interrupted, closing output.", file=sys.stderr)
+    finally:
+        writer.close()
+
+    print(f"Done: {dumped} dumped, {skipped} not DICOM, {failed} failed "
+          f"in {time.monotonic() - started:.1f}s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -1,11 +1,13 @@
-<<<<<<< HEAD
 import os
-import pandas as pd
-import pydicom
-from pydicom.uid import generate_uid
 import re
 from datetime import datetime
 
+from change_manifest import ManifestWriter, diff_snapshots, snapshot
+from dicom_header import content_digest, read_for_edit, save_header
+from edit_journal import EditJournal, journal_entry
+from metadata_join import MetadataIndex
+from uid_remap import UidRemapper
+
 # 환자 이름 정리 함수
 def sanitize_patient_name(name):
     name = str(name)
@@ -21,123 +23,40 @@ REFERENCE_DATE = datetime(2020, 9, 24)
 dicom_folder = 'D:\\fundus\\kaggle\\OcularDiseaseRecognition\\ODIR-5K\\ODIR-5K\\Training Images\\dcm'
 csv_path = 'D:\\fundus\\kaggle\\OcularDiseaseRecognition\\ODIR-5K\\ODIR-5K\\metadata.csv'
 
-# CSV 읽기
-df = pd.read_csv(csv_path)
-file_dict = {row['filename']: row for _, row in df.iterrows()}
-study_uid_map = {}
+# 경로를 넣으면 저장하지 않고 바뀔 내용만 기록 (dry run), 같은 파일로 다시 돌리면 끊긴 곳부터 이어서
+DRY_RUN_MANIFEST = None
+# 저장이 끝난 파일 기록, 중간에 멈췄다 다시 돌리면 끝난 파일은 건너뜀
+JOURNAL_PATH = os.path.join(dicom_folder, 'tag_edit_journal.jsonl')
+# Study UID 를 만들 때 섞는 값, 다시 돌려도 같은 환자는 같은 UID 가 나오도록 고정
+UID_NAMESPACE = 'ODIR-5K'
+# 경로를 넣으면 만든 UID 를 SQLite 에 기록 (원래 key 와 새 UID 대응표)
+UID_STORE = None
+uid_remapper = UidRemapper(UID_NAMESPACE, store_path=UID_STORE)
+
+# CSV 읽기, 폴더의 .dcm 파일과 filename 열로 한 번에 맞춤
+metadata = MetadataIndex.from_csv(csv_path, 'filename')
+joined = metadata.join_directory(dicom_folder, suffixes=('.dcm',))
 series_number_tracker = {}
 
-# DICOM 처리
-for fname in os.listdir(dicom_folder):
-    if not fname.endswith('.dcm'):
-        continue
-
-    filepath = os.path.join(dicom_folder, fname)
-    ds = pydicom.dcmread(filepath)
-
-    if fname not in file_dict:
-        print(f"CSV에 {fname} 정보 없음. 건너뜀.")
-        continue
-
-    row = file_dict[fname]
-
-    # 1. Patient Age
-    ds.PatientAge = str(row['Patient Age']).zfill(3) + 'Y'
-
-    # 2. Patient Sex
-    ds.PatientSex = row['Patient Sex']
-
-    # 3. Patient Name
-    raw_name = row['Diagnostic Keywords']
-    ds.PatientName = sanitize_patient_name(raw_name)
-
-    # 4. Patient ID
-    ds.PatientID = os.path.splitext(fname)[0]
-
-    # 5. Laterality & Series Description
-    if '_left' in fname:
-        ds.Laterality = 'L'
-        ds.SeriesDescription = 'Color/L'
-    elif '_right' in fname:
-        ds.Laterality = 'R'
-        ds.SeriesDescription = 'Color/R'
-
-    # 6. Study Instance UID
-    prefix = fname.replace('_left.dcm', '').replace('_right.dcm', '').replace('.dcm', '')
-    if prefix not in study_uid_map:
-        study_uid_map[prefix] = generate_uid()
-    study_uid = study_uid_map[prefix]
-    ds.StudyInstanceUID = study_uid
-
-    # ✅ (0008,0060) Modality = "SC"
-    ds.Modality = "SC"
-
-    # ✅ (0010,0030) Patient's Birth Date 계산
-    try:
-        age = int(row['Patient Age'])
-        birth_year = REFERENCE_DATE.year - age
-        birth_date = datetime(birth_year, REFERENCE_DATE.month, REFERENCE_DATE.day)
-        ds.PatientBirthDate = birth_date.strftime('%Y%m%d')
-    except:
-        print(f"{fname}: 생년 계산 오류 - Patient Age 값 확인 필요")
-
-    # ✅ (0020,0011) Series Number: 왼쪽 1, 오른쪽 2 번갈아
-    if study_uid not in series_number_tracker:
-        series_number_tracker[study_uid] = {'left': 0, 'right': 0}
-    if '_left' in fname:
-        series_number_tracker[study_uid]['left'] += 1
-        ds.SeriesNumber = 1
-    elif '_right' in fname:
-        series_number_tracker[study_uid]['right'] += 1
-        ds.SeriesNumber = 2
-
-    # 저장
-    ds.save_as(filepath)
-    print(f"{fname} 처리 완료.")
-
-print("✅ 모든 DICOM 파일 처리 완료.")
-=======
-import os
-import pandas as pd
-import pydicom
-from pydicom.uid import generate_uid
-import re
-from datetime import datetime
-
-# 환자 이름 정리 함수
-def sanitize_patient_name(name):
-    name = str(name)
-    name = name.replace('，', ',')
-    name = re.sub(r'[^\w\s,.-]', '-', name)
-    name = name.strip()
-    return name[:64]
-
-# 기준일 설정
-REFERENCE_DATE = datetime(2020, 9, 24)
-
-# 경로 설정
-dicom_folder = 'D:\\fundus\\kaggle\\OcularDiseaseRecognition\\ODIR-5K\\ODIR-5K\\Training Images\\dcm'
-csv_path = 'D:\\fundus\\kaggle\\OcularDiseaseRecognition\\ODIR-5K\\ODIR-5K\\metadata.csv'
+for filepath in joined.unmatched_files:
+    print(f"CSV에 {os.path.basename(filepath)} 정보 없음. 건너뜀.")
 
-# CSV 읽기
-df = pd.read_csv(csv_path)
-file_dict = {row['filename']: row for _, row in df.iterrows()}
-study_uid_map = {}
-series_number_tracker = {}
+manifest = ManifestWriter(DRY_RUN_MANIFEST, resume=True) if DRY_RUN_MANIFEST else None
+journal = EditJournal(JOURNAL_PATH) if manifest is None else None
 
 # DICOM 처리
-for fname in os.listdir(dicom_folder):
-    if not fname.endswith('.dcm'):
-        continue
-
-    filepath = os.path.join(dicom_folder, fname)
-    ds = pydicom.dcmread(filepath)
+for filepath, row in joined.matched:
+    fname = os.path.basename(filepath)
 
-    if fname not in file_dict:
-        print(f"CSV에 {fname} 정보 없음. 건너뜀.")
+    if manifest is not None and filepath in manifest.done:
+        continue
+    if journal is not None and journal.is_done(filepath):
         continue
 
-    row = file_dict[fname]
+    # Pixel Data 는 읽지 않고 헤더만 수정
+    ds, pixel_ref = read_for_edit(filepath)
+    input_digest = content_digest(filepath, pixel_ref) if journal is not None else None
+    before = snapshot(ds) if manifest is not None else None
 
     # 1. Patient Age
     ds.PatientAge = str(row['Patient Age']).zfill(3) + 'Y'
@@ -160,11 +79,9 @@ for fname in os.listdir(dicom_folder):
         ds.Laterality = 'R'
         ds.SeriesDescription = 'Color/R'
 
-    # 6. Study Instance UID
+    # 6. Study Instance UID (왼쪽/오른쪽 눈이 같은 UID, 이어서 돌려도 같은 UID)
     prefix = fname.replace('_left.dcm', '').replace('_right.dcm', '').replace('.dcm', '')
-    if prefix not in study_uid_map:
-        study_uid_map[prefix] = generate_uid()
-    study_uid = study_uid_map[prefix]
+    study_uid = uid_remapper.uid(prefix, 'StudyInstanceUID')
     ds.StudyInstanceUID = study_uid
 
     # ✅ (0008,0060) Modality = "SC"
@@ -189,9 +106,18 @@ for fname in os.listdir(dicom_folder):
         series_number_tracker[study_uid]['right'] += 1
         ds.SeriesNumber = 2
 
-    # 저장
-    ds.save_as(filepath)
+    # 저장 (헤더만 다시 쓰고 Pixel Data 는 원본 byte 그대로 복사)
+    if manifest is not None:
+        manifest.write(filepath, diff_snapshots(before, snapshot(ds)))
+        continue
+    output_ref = save_header(ds, pixel_ref, filepath)
+    journal.record(filepath, journal_entry(filepath, filepath, input_digest, output_ref))
     print(f"{fname} 처리 완료.")
 
+uid_remapper.close()
+if journal is not None:
+    journal.close()
+if manifest is not None:
+    manifest.close()
+    print(f"Dry run: {manifest.changes}개 변경 ({manifest.changed_files}개 파일) -> {DRY_RUN_MANIFEST}")
 print("✅ 모든 DICOM 파일 처리 완료.")
->>>>>>> 0eb1d258402411ad34ee3ac09ddb137e034d4ea3
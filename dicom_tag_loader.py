@@ -1,4 +1,11 @@
+import io
+import multiprocessing
+import os
 import sys
+import threading
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 import pydicom
 from PyQt5.QtWidgets import (
     QApplication,
@@ -8,28 +15,436 @@ from PyQt5.QtWidgets import (
     QPushButton,
     QFileDialog,
     QTabWidget,
-    QTableWidget,
-    QTableWidgetItem,
+    QTableView,
     QHeaderView,
     QLabel,
     QMessageBox,
     QLineEdit,
     QSizePolicy,
     QSpacerItem,
+    QProgressBar,
+    QListWidget,
+    QListWidgetItem,
+    QSplitter,
+    QCheckBox,
+    QComboBox,
+)
+from PyQt5.QtCore import (
+    Qt,
+    QAbstractTableModel,
+    QModelIndex,
+    QObject,
+    QRegExp,
+    QRunnable,
+    QSortFilterProxyModel,
+    QThreadPool,
+    QTimer,
+    pyqtSignal,
 )
-from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QIntValidator
 from PyQt5.QtGui import QColor
 from PyQt5.QtGui import QIcon  # QIcon 임포트
-import numpy as np
 from pydicom.misc import is_dicom  # DICOM 파일 확인 함수
+from dicom_header import (
+    CATEGORY_IMAGE,
+    CATEGORY_PATIENT,
+    CATEGORY_STUDY_SERIES,
+    PIXEL_DATA_TAG,
+    PIXEL_DUMP_LIMIT,
+    PIXEL_EXPORT_MODES,
+    HeaderCache,
+    HeaderDiff,
+    LoadCancelled,
+    LoadedHeader,
+    build_tag_index,
+    header_fingerprint,
+    header_memory_size,
+    iter_pixel_text,
+    read_header,
+    value_size,
+    value_text,
+    write_tag_rows,
+)
+
+
+class DicomTagTableModel(QAbstractTableModel):
+    """build_tag_index 로 만든 TagRow 목록을 모든 탭이 같이 보는 모델"""
+
+    HEADERS = ["Group", "Element", "Description", "VR", "Size", "Value"]
+    # 화면에 보이는 행의 값 문자열만 만들어서 잠깐 들고 있음 (몇 화면 분량)
+    TEXT_CACHE_SIZE = 2048
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.rows = []
+        self._text_cache = OrderedDict()
+
+    def setRows(self, rows):
+        self.beginResetModel()
+        self.rows = rows
+        self._text_cache.clear()
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def valueText(self, row):
+        text = self._text_cache.get(row)
+        if text is None:
+            text = value_text(self.rows[row])
+            self._text_cache[row] = text
+            if len(self._text_cache) > self.TEXT_CACHE_SIZE:
+                self._text_cache.popitem(last=False)
+        else:
+            self._text_cache.move_to_end(row)
+        return text
+
+    def displayText(self, row, column):
+        tag_row = self.rows[row]
+        if column == 0:
+            return f"{tag_row.tag.group:04X}"
+        if column == 1:
+            return f"{tag_row.tag.element:04X}"
+        if column == 2:
+            return tag_row.name
+        if column == 3:
+            return str(tag_row.VR)
+        if column == 4:
+            return str(value_size(tag_row, self.valueText(row)))
+        return self.valueText(row)
+
+    def data(self, index, role=Qt.DisplayRole):
+        # view 가 그리는 행만 요청하므로 문자열도 그때그때 만듦
+        if not index.isValid():
+            return None
+        if role == Qt.DisplayRole:
+            return self.displayText(index.row(), index.column())
+        return None
+
+
+class TagSearchIndex:
+    """Group/Element hex 접두어와 소문자 Description 으로 행 번호를 찾는 검색 인덱스"""
+
+    def __init__(self, rows):
+        # 행은 tag 순으로 정렬되어 있어서 hex 접두어 하나가 곧 연속된 tag 구간이 됨
+        self.tags = [int(row.tag) for row in rows]
+        self.descriptions = [row.name.lower() for row in rows]
+        self._last_filters = None
+        self._last_result = None
+
+    @staticmethod
+    def _prefix_range(prefix):
+        # "00" -> 0x0000~0x00FF 처럼 4자리 hex 접두어가 덮는 범위
+        if not prefix:
+            return 0, 0xFFFF
+        return int(prefix.ljust(4, "0"), 16), int(prefix.ljust(4, "F"), 16)
+
+    def search(self, group_id, element_id, description):
+        """검색어에 맞는 행 번호 목록, 검색어가 없으면 None"""
+        group_id = group_id.upper()
+        element_id = element_id.upper()
+        if not (group_id or element_id or description):
+            self._last_filters = self._last_result = None
+            return None
+        try:
+            group_lo, group_hi = self._prefix_range(group_id)
+            element_lo, element_hi = self._prefix_range(element_id)
+        except ValueError:
+            return []
+
+        last = self._last_filters
+        if (
+            last is not None
+            and group_id.startswith(last[0])
+            and element_id.startswith(last[1])
+            and last[2] in description
+        ):
+            # 이전 검색어에 글자를 더 친 경우 이전 결과 안에서만 좁힘
+            candidates = self._last_result
+        else:
+            candidates = range(
+                bisect_left(self.tags, group_lo << 16),
+                bisect_right(self.tags, (group_hi << 16) | 0xFFFF),
+            )
+
+        tags = self.tags
+        descriptions = self.descriptions
+        result = [
+            row
+            for row in candidates
+            if group_lo <= tags[row] >> 16 <= group_hi
+            and element_lo <= tags[row] & 0xFFFF <= element_hi
+            and description in descriptions[row]
+        ]
+        self._last_filters = (group_id, element_id, description)
+        self._last_result = result
+        return result
+
+
+class TagCategoryProxyModel(QSortFilterProxyModel):
+    """탭 구분(category)과 검색 결과(allowed_rows)로 행을 걸러내는 proxy"""
+
+    def __init__(self, category=None, parent=None):
+        super().__init__(parent)
+        self.category = category  # None 이면 All 탭
+        self.allowed_rows = None  # 검색 결과 행 표시용 bytearray, None 이면 모두 허용
+        self.dirty = False  # 다른 탭을 보고 있을 때 바뀐 검색어는 탭을 열 때 적용
+
+    def setAllowedRows(self, allowed_rows, apply_now=True):
+        self.allowed_rows = allowed_rows
+        if apply_now:
+            self.dirty = False
+            self.invalidateFilter()
+        else:
+            self.dirty = True
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        if self.allowed_rows is not None and not self.allowed_rows[source_row]:
+            return False
+        if self.category is not None:
+            return bool(self.sourceModel().rows[source_row].categories & self.category)
+        return True
+
+
+class HeaderLoadSignals(QObject):
+    # (generation, 파일 경로, LoadedHeader) / (generation, 파일 경로, 오류 메시지)
+    finished = pyqtSignal(int, str, object)
+    failed = pyqtSignal(int, str, str)
+
+
+class HeaderLoadJob(QRunnable):
+    """GUI thread 를 막지 않도록 worker thread 에서 헤더를 읽고 tag 목록까지 만드는 작업"""
+
+    def __init__(self, filepath, generation):
+        super().__init__()
+        self.filepath = filepath
+        self.generation = generation
+        self.signals = HeaderLoadSignals()
+        self._cancel_event = threading.Event()
+        self.done = False
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    def run(self):
+        try:
+            self._load()
+        finally:
+            self.done = True
+
+    def _load(self):
+        cancelled = self._cancel_event.is_set
+        try:
+            # 확장자와 상관없이 파일이 DICOM인지 확인
+            if not is_dicom(self.filepath):
+                self.signals.failed.emit(
+                    self.generation, self.filepath, "The selected file is not a valid DICOM file."
+                )
+                return
+            # DICOM file 읽기, force=True안하니까 계속 0002와 같은 meta data는 안불러옴
+            # Pixel Data 직전까지만 읽고 Pixel Data는 위치(offset/length)만 기억해 둠
+            dicom_data, pixel_ref = read_header(self.filepath)
+            if cancelled():
+                return
+            # Patient's Name 등 문자열 tag 는 Specific Character Set(ISO 2022 포함)대로 여기서 디코딩
+            rows = build_tag_index(dicom_data, pixel_ref, cancelled)
+        except LoadCancelled:
+            return
+        except Exception as e:
+            self.signals.failed.emit(self.generation, self.filepath, f"Error reading DICOM file: {e}")
+            return
+        if not cancelled():
+            memory = header_memory_size(self.filepath, pixel_ref, rows)
+            loaded = LoadedHeader(self.filepath, dicom_data, pixel_ref, rows, memory)
+            self.signals.finished.emit(self.generation, self.filepath, loaded)
+
+
+class HeaderDiffModel(QAbstractTableModel):
+    """HeaderDiff.rows() 결과를 보여주는 모델, 상태별로 배경색 표시"""
+
+    HEADERS = ["Group", "Element", "Description", "VR", "Status", "Files", "Distinct", "Values"]
+    STATUS_COLORS = {"Differ": QColor("#f2c4c5"), "Missing": QColor("#f2e6a8")}
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.rows = []
+        self.file_count = 0
+
+    def setDiff(self, diff):
+        self.beginResetModel()
+        self.rows = diff.rows()
+        self.file_count = diff.file_count
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        diff_row = self.rows[index.row()]
+        column = index.column()
+        if role == Qt.DisplayRole:
+            if column == 0:
+                return f"{diff_row.tag.group:04X}"
+            if column == 1:
+                return f"{diff_row.tag.element:04X}"
+            if column == 2:
+                return diff_row.name
+            if column == 3:
+                return str(diff_row.VR)
+            if column == 4:
+                return diff_row.status
+            if column == 5:
+                return f"{diff_row.present}/{self.file_count}"
+            if column == 6:
+                return str(diff_row.distinct)
+            return " | ".join(preview for preview, _ in diff_row.examples)
+        if role == Qt.ToolTipRole and column == 7:
+            # 어느 파일의 값인지는 툴팁으로 보여줌
+            return "\n".join(f"{os.path.basename(path)}: {preview}" for preview, path in diff_row.examples)
+        if role == Qt.BackgroundRole:
+            return self.STATUS_COLORS.get(diff_row.status)
+        return None
+
+
+class HeaderDiffSignals(QObject):
+    progress = pyqtSignal(int, int)  # (읽은 파일 수, 전체 파일 수)
+    finished = pyqtSignal(object)  # HeaderDiff
+
+
+class HeaderDiffJob(QRunnable):
+    """여러 파일의 header_fingerprint 를 process pool 로 만들고 HeaderDiff 에 모으는 작업"""
+
+    def __init__(self, filepaths):
+        super().__init__()
+        self.filepaths = filepaths
+        self.signals = HeaderDiffSignals()
+        self._cancel_event = threading.Event()
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    def run(self):
+        diff = HeaderDiff()
+        total = len(self.filepaths)
+        chunksize = max(1, min(64, total // ((os.cpu_count() or 1) * 4)))
+        with ProcessPoolExecutor() as executor:
+            results = executor.map(header_fingerprint, self.filepaths, chunksize=chunksize)
+            for count, (path, fingerprint) in enumerate(results, start=1):
+                if self._cancel_event.is_set():
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    return
+                diff.add(path, fingerprint)
+                if count % 20 == 0 or count == total:
+                    self.signals.progress.emit(count, total)
+        self.signals.finished.emit(diff)
+
+
+class HeaderDiffView(QWidget):
+    """여러 DICOM 파일의 헤더를 tag 별로 비교해서 같은 값/다른 값/없는 tag 를 보여주는 창"""
+
+    def __init__(self, filepaths):
+        super().__init__()
+        self.setWindowTitle(f"DICOM Header Compare ({len(filepaths)} files)")
+        self.setGeometry(140, 140, 1100, 700)
+        layout = QVBoxLayout()
+
+        top_layout = QHBoxLayout()
+        self.summary = QLabel(f"Reading {len(filepaths)} files...")
+        top_layout.addWidget(self.summary, 1)
+        self.progress = QProgressBar()
+        self.progress.setRange(0, len(filepaths))
+        self.progress.setFixedWidth(200)
+        top_layout.addWidget(self.progress)
+        self.diff_only = QCheckBox("Differences only")
+        self.diff_only.toggled.connect(self.applyStatusFilter)
+        top_layout.addWidget(self.diff_only)
+        layout.addLayout(top_layout)
+
+        self.model = HeaderDiffModel(self)
+        self.proxy = QSortFilterProxyModel(self)
+        self.proxy.setSourceModel(self.model)
+        self.proxy.setFilterKeyColumn(4)  # Status
+        self.table = QTableView()
+        self.table.setModel(self.proxy)
+        self.table.setSortingEnabled(True)
+        self.table.sortByColumn(0, Qt.AscendingOrder)
+        self.table.verticalHeader().setVisible(False)
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.table.verticalHeader().setDefaultSectionSize(22)
+        self.table.setWordWrap(False)
+        self.table.setColumnWidth(0, 55)  # Group
+        self.table.setColumnWidth(1, 55)  # Element
+        self.table.setColumnWidth(2, 230)  # Description
+        self.table.setColumnWidth(3, 30)  # VR
+        self.table.setColumnWidth(4, 60)  # Status
+        self.table.setColumnWidth(5, 70)  # Files
+        self.table.setColumnWidth(6, 55)  # Distinct
+        self.table.horizontalHeader().setStretchLastSection(True)
+        layout.addWidget(self.table)
+        self.setLayout(layout)
+
+        self.thread_pool = QThreadPool(self)
+        self.job = HeaderDiffJob(filepaths)
+        self.job.signals.progress.connect(self.onProgress)
+        self.job.signals.finished.connect(self.onFinished)
+        self.thread_pool.start(self.job)
+
+    def onProgress(self, count, total):
+        self.progress.setValue(count)
+        self.summary.setText(f"Reading {count}/{total} files...")
+
+    def onFinished(self, diff):
+        self.model.setDiff(diff)
+        self.progress.hide()
+        differ = sum(1 for row in self.model.rows if row.status != "Match")
+        text = f"{diff.file_count} files, {len(self.model.rows)} tags, {differ} not matching"
+        if diff.failed:
+            text += f", {len(diff.failed)} unreadable"
+        self.summary.setText(text)
+
+    def applyStatusFilter(self, checked):
+        self.proxy.setFilterRegExp(QRegExp("Differ|Missing") if checked else QRegExp())
+
+    def closeEvent(self, event):
+        self.job.cancel()
+        super().closeEvent(event)
 
 
 class DicomTagLoader(QWidget):
     def __init__(self):
         super().__init__()
+        # 파일 읽기용 thread pool, 취소된 읽기가 끝나기 전에도 새 파일을 바로 읽도록 2개 이상
+        self.thread_pool = QThreadPool(self)
+        self.thread_pool.setMaxThreadCount(4)
+        self.load_job = None
+        self.running_jobs = []
+        self.load_generation = 0  # 마지막으로 요청한 읽기 번호, 이전 번호 결과는 버림
+        # 폴더/여러 파일 drop 시 미리 읽기용 thread pool, 화면에 띄울 파일 읽기와 따로 돌림
+        self.prefetch_pool = QThreadPool(self)
+        self.prefetch_pool.setMaxThreadCount(max(2, (os.cpu_count() or 2) - 1))
+        self.prefetch_jobs = []
+        # 읽어둔 헤더 cache, 같은 파일을 다시 열면 디스크를 읽지 않음
+        self.header_cache = HeaderCache()
         self.initUI()
-        self.pixel_data_value = None  # Store the actual Pixel Data value here
+        self.pixel_data_value = None  # Pixel Data 위치 참조 (PixelDataRef), 값은 복사할 때만 읽음
         self.current_filters = {
             "group": "",
             "element": "",
@@ -54,7 +469,19 @@ class DicomTagLoader(QWidget):
 
         # File path 뿌려주는 라벨
         self.file_path = QLabel("File path will appear here")
-        h_layout.addWidget(self.file_path)
+        h_layout.addWidget(self.file_path, 1)
+
+        # 파일 읽는 중 표시 (진행률을 알 수 없어 busy 표시) 및 취소 버튼
+        self.load_progress = QProgressBar()
+        self.load_progress.setRange(0, 0)
+        self.load_progress.setFixedWidth(120)
+        self.load_progress.hide()
+        self.cancel_button = QPushButton("Cancel", self)
+        self.cancel_button.setFixedWidth(60)
+        self.cancel_button.clicked.connect(self.cancelLoad)
+        self.cancel_button.hide()
+        h_layout.addWidget(self.load_progress)
+        h_layout.addWidget(self.cancel_button)
         layout.addLayout(h_layout)
 
         # 검색 및 버튼 Layout 설정
@@ -98,6 +525,21 @@ class DicomTagLoader(QWidget):
         self.copy_value_button = QPushButton("Value Copy", self)
         self.copy_value_button.setFixedWidth(95)
 
+        # Pixel Data 를 복사/내보낼 때 형식 (요약, hex, base64)
+        self.pixel_mode_combo = QComboBox(self)
+        self.pixel_mode_combo.addItems(PIXEL_EXPORT_MODES)
+        self.pixel_mode_combo.setToolTip(
+            f"Pixel Data copy/export format (hex/base64 up to {PIXEL_DUMP_LIMIT // 1024} KB)"
+        )
+        self.export_button = QPushButton("Export", self)
+        self.export_button.setFixedWidth(65)
+        self.export_button.clicked.connect(self.exportTable)
+
+        # 여러 파일 헤더 비교 버튼
+        self.compare_button = QPushButton("Compare", self)
+        self.compare_button.setFixedWidth(75)
+        self.compare_button.clicked.connect(self.compareFiles)
+
         self.copy_all_button.clicked.connect(self.copyAll)
         self.copy_value_button.clicked.connect(
             lambda: self.copyValue(self.tabs.currentWidget())
@@ -105,13 +547,26 @@ class DicomTagLoader(QWidget):
 
         # 우측 영역에 버튼 추가
         function_layout.addStretch()  # 오른쪽에 버튼과 여유 두기
+        function_layout.addWidget(self.compare_button)
+        function_layout.addWidget(self.pixel_mode_combo)
         function_layout.addWidget(self.copy_all_button)
         function_layout.addWidget(self.copy_value_button)
+        function_layout.addWidget(self.export_button)
         layout.addLayout(function_layout)
 
+        # 여러 파일을 drop 했을 때 파일 목록을 보여주는 사이드바
+        self.file_list = QListWidget()
+        self.file_list.currentItemChanged.connect(self.onFileSelected)
+        self.file_list.hide()
+
         # Tabs for DICOM tags
         self.tabs = QTabWidget()
-        layout.addWidget(self.tabs)
+        splitter = QSplitter(Qt.Horizontal)
+        splitter.addWidget(self.file_list)
+        splitter.addWidget(self.tabs)
+        splitter.setStretchFactor(1, 1)
+        splitter.setSizes([200, 760])
+        layout.addWidget(splitter)
         self.setLayout(layout)
 
         # 최초 실행 시 탭 모두 비워두기, 처음에는 파일을 로드해야만 탭이 나왔음
@@ -119,16 +574,24 @@ class DicomTagLoader(QWidget):
         self.initEmptyTabs()
 
         # 검색 입력 필드 이벤트 연결 (모든 탭에 동일한 검색어를 적용)
-        self.group_input.textChanged.connect(self.filterTable)
-        self.element_input.textChanged.connect(self.filterTable)
-        self.description_input.textChanged.connect(self.filterTable)
+        # 타이핑 중에는 매번 거르지 않고 입력이 멈추면 한 번만 거름
+        self.filter_timer = QTimer(self)
+        self.filter_timer.setSingleShot(True)
+        self.filter_timer.setInterval(150)
+        self.filter_timer.timeout.connect(self.filterTable)
+        self.group_input.textChanged.connect(self.filter_timer.start)
+        self.element_input.textChanged.connect(self.filter_timer.start)
+        self.description_input.textChanged.connect(self.filter_timer.start)
+        self.tabs.currentChanged.connect(self.applyPendingFilter)
 
     def initEmptyTabs(self):
-        # 처음엔 더미 데이터 채워서 나오게 해서 비워두게 함
-        self.addTab(None, "All")
-        self.addTab(None, "Patient")
-        self.addTab(None, "Study/Series")
-        self.addTab(None, "Image")
+        # 처음엔 빈 모델로 탭만 만들어 두고, 파일을 읽으면 모델 내용만 바꿈
+        self.tag_model = DicomTagTableModel(self)
+        self.search_index = TagSearchIndex([])
+        self.addTab("All", None)
+        self.addTab("Patient", CATEGORY_PATIENT)
+        self.addTab("Study/Series", CATEGORY_STUDY_SERIES)
+        self.addTab("Image", CATEGORY_IMAGE)
 
     def openFile(self, filepath=None):
         # File Open 창
@@ -140,135 +603,114 @@ class DicomTagLoader(QWidget):
         if filepath:
             # 불러오면 file path 갱신
             self.file_path.setText(filepath)
-            try:
-                # 확장자와 상관없이 파일이 DICOM인지 확인
-                if not is_dicom(filepath):
-                    QMessageBox.critical(
-                        self, "Error", "The selected file is not a valid DICOM file."
-                    )
-                    return
-                # DICOM file 읽기, force=True안하니까 계속 0002와 같은 meta data는 안불러옴
-                dicom_data = pydicom.dcmread(filepath, force=True)
-                # Dicom file 다른 거 다시 읽어오면 보고 있던 tag 정보는 클리어
-                self.tabs.clear()
-
-                # Specific Character Set 설정
-                specific_charset = dicom_data.get("SpecificCharacterSet", "ISO_IR 100")
-
-                # 리스트인 경우 첫 번째 값만 사용
-                if isinstance(specific_charset, list):
-                    specific_charset = (
-                        specific_charset[0] if specific_charset else "ISO_IR 100"
-                    )
-
-                # 앞에 '\'가 있으면 제거
-                if isinstance(specific_charset, str):
-                    specific_charset = specific_charset.lstrip("\\")
-
-                # 특정 패턴이 포함된 경우 인코딩 매핑
-                if "149" in specific_charset:  # ISO_IR 149, ISO 2022 IR 149 등 포함
-                    specific_charset = "euc_kr"
-                elif "100" in specific_charset:  # ISO_IR 100
-                    specific_charset = "latin1"
-                elif "192" in specific_charset or "UTF-8" in specific_charset:
-                    specific_charset = "utf-8"
-                else:
-                    specific_charset = "iso8859"
-
-                # Patient's Name 디코딩 시도
-                try:
-                    raw_name = dicom_data[0x00100010].value
-                    if isinstance(raw_name, bytes):  # 바이트 데이터일 경우만 디코딩
-                        patient_name = raw_name.decode(specific_charset)
-                    else:
-                        patient_name = raw_name
-                    dicom_data.PatientName = patient_name
-                except (UnicodeDecodeError, AttributeError):
-                    print(
-                        f"Warning: Failed to decode Patient's Name with encoding {specific_charset}"
-                    )
-                    dicom_data.PatientName = "Unknown"
-
-                # Pixel Data value 리셋
-                self.pixel_data_value = None
-                # Tab을 All, Patient, Study/Series, Image 탭으로 구분함
-                self.addTab(dicom_data, "All")
-                self.addTab(dicom_data, "Patient")
-                self.addTab(dicom_data, "Study/Series")
-                self.addTab(dicom_data, "Image")
-
-                # 새로운 파일을 로드한 후 기존 검색어로 필터링 적용
-                self.restoreFilters()
-            except Exception as e:
-                QMessageBox.critical(self, "Error", f"Error reading DICOM file: {e}")
-
-            return dicom_data
-
-    def addTab(self, dicom_data, tag_type):
-        table = QTableWidget()
-        elements = []
-
-        # Meta 정보 tag도 All 탭에는 읽어서 나오게 함. 이렇게 안하면 meta 정보는 빠지고 나옴
-        if tag_type == "All":
-            if hasattr(dicom_data, "file_meta"):
-                for element in dicom_data.file_meta:
-                    elements.append(element)
-
-        # 여기서부터는 각 탭별 나오게 하는 tag들을 구분
-        if dicom_data:
-            seen_tags = set()  # 중복을 방지하기 위한 Set
-
-            for element in dicom_data.iterall():  # 모든 태그 포함 (Standard + Private)
-                tag_key = (
-                    element.tag.group,
-                    element.tag.element,
-                )  # (Group, Element) 튜플 생성
-
-                if tag_key not in seen_tags:  # 중복 체크
-                    seen_tags.add(tag_key)  # 새로운 태그 추가
-
-                    # PixelHeight, PixelWidth 값이 0이면 경고 출력 후 1로 변경
-                    if (
-                        element.name in ["PixelHeight", "PixelWidth"]
-                        and element.value == 0
-                    ):
-                        element.value = 1  # 값이 0이면 기본값 1로 설정
-                        print(
-                            f"Warning: Invalid value for {element.name}. Defaulting to 1."
-                        )
-                    # Group 7FE0, Element 0010는 Pixel Data인데 바이너리 값이라 너무 큼
-                    if element.tag.group == 0x7FE0 and element.tag.element == 0x0010:
-                        # NumPy array 에 실제 pixel data값을 담고
-                        self.pixel_data_value = np.copy(element.value)
-                        # tag 리스트에 뿌려주는 것은 Encoded graphical image data로 뿌려줌. 이래야 안느려짐
-                        display_value = "Encoded graphical image data"
-                    # 탭 별 보여줄 필터
-                    if tag_type == "All":
-                        elements.append(element)
-                    elif tag_type == "Patient" and element.tag.group == 0x0010:
-                        elements.append(element)
-                    elif tag_type == "Study/Series" and (
-                        "Study" in element.name or "Series" in element.name
-                    ):
-                        elements.append(element)
-                    elif tag_type == "Image" and (
-                        element.tag.group == 0x0028
-                        or "Pixel" in element.name
-                        or "Bit" in element.name
-                        or "Image" in element.name
-                        or "Window" in element.name
-                    ):
-                        elements.append(element)
-
-        # 정렬 안하니 중구난방으로 나와서 tag Group+Element별 정렬
-        elements.sort(key=lambda x: (x.tag.group, x.tag.element))
-
-        # Tag 리스트 속성 설정
-        table.setRowCount(len(elements))
-        table.setColumnCount(6)  # Number of columns
-        table.setHorizontalHeaderLabels(
-            ["Group", "Element", "Description", "VR", "Size", "Value"]
-        )
+            # 이미 읽어둔 파일이면 바로 보여주고, 아니면 worker thread 에서 읽은 뒤 onLoadFinished 에서 탭을 채움
+            loaded = self.header_cache.get(filepath)
+            if loaded is not None:
+                self.cancelLoad()
+                self.load_generation += 1
+                self.showHeader(loaded)
+            else:
+                self.startLoad(filepath)
+
+    def openFiles(self, filepaths):
+        # 여러 파일은 사이드바에 목록을 만들고 백그라운드에서 미리 읽어 cache 에 채움
+        self.cancelPrefetch()
+        self.file_list.blockSignals(True)
+        self.file_list.clear()
+        for filepath in filepaths:
+            item = QListWidgetItem(os.path.basename(filepath))
+            item.setData(Qt.UserRole, filepath)
+            item.setToolTip(filepath)
+            self.file_list.addItem(item)
+        self.file_list.blockSignals(False)
+        self.file_list.show()
+
+        for filepath in filepaths:
+            if filepath in self.header_cache:
+                continue
+            job = HeaderLoadJob(filepath, 0)  # generation 0 은 화면에 띄우지 않고 cache 에만 넣음
+            job.signals.finished.connect(self.onLoadFinished)
+            self.prefetch_jobs.append(job)
+            self.prefetch_pool.start(job)
+        self.file_list.setCurrentRow(0)
+
+    def cancelPrefetch(self):
+        # 아직 시작 안 한 미리 읽기는 큐에서 빼고, 돌고 있는 것은 취소 표시만 함
+        self.prefetch_pool.clear()
+        for job in self.prefetch_jobs:
+            job.cancel()
+        self.prefetch_jobs = [job for job in self.prefetch_jobs if not job.done]
+
+    def onFileSelected(self, current, previous):
+        if current is not None:
+            self.openFile(current.data(Qt.UserRole))
+
+    def startLoad(self, filepath):
+        # 읽고 있던 파일이 있으면 취소, 그 결과는 generation 이 달라서 버려짐
+        self.cancelLoad()
+        self.load_generation += 1
+        job = HeaderLoadJob(filepath, self.load_generation)
+        job.signals.finished.connect(self.onLoadFinished)
+        job.signals.failed.connect(self.onLoadFailed)
+        self.load_job = job
+        # 취소된 작업도 thread 에서 끝날 때까지는 signals 객체가 살아 있어야 해서 참조를 들고 있음
+        self.running_jobs = [j for j in self.running_jobs if not j.done] + [job]
+        self.load_progress.show()
+        self.cancel_button.show()
+        self.thread_pool.start(job)
+
+    def cancelLoad(self):
+        if self.load_job is not None:
+            self.load_job.cancel()
+            self.load_job = None
+        self.load_progress.hide()
+        self.cancel_button.hide()
+
+    def onLoadFinished(self, generation, filepath, loaded):
+        self.header_cache.put(loaded)
+        if generation != self.load_generation:
+            return  # 미리 읽기이거나 이미 취소된 읽기
+        self.load_job = None
+        self.load_progress.hide()
+        self.cancel_button.hide()
+        self.showHeader(loaded)
+
+    def showHeader(self, loaded):
+        rows = loaded.rows
+        # Pixel Data value 리셋, 실제 값은 복사할 때 pixel_ref 위치에서 읽음
+        self.pixel_data_value = loaded.pixel_ref
+        # 이전 파일 기준의 검색 결과는 버리고, 아래 restoreFilters 에서 다시 거름
+        for i in range(self.tabs.count()):
+            self.tabs.widget(i).model().allowed_rows = None
+        # 한 번만 훑어 만든 tag 목록을 모델에 넣으면 All, Patient, Study/Series, Image 탭이 같이 갱신됨
+        self.tag_model.setRows(rows)
+        self.search_index = TagSearchIndex(rows)
+
+        # 새로운 파일을 로드한 후 기존 검색어로 필터링 적용
+        self.restoreFilters()
+
+    def onLoadFailed(self, generation, filepath, message):
+        if generation != self.load_generation:
+            return
+        self.load_job = None
+        self.load_progress.hide()
+        self.cancel_button.hide()
+        QMessageBox.critical(self, "Error", message)
+
+    def addTab(self, tag_type, category):
+        # 모든 탭이 같은 tag_model 을 보고, 탭마다 proxy 로 보여줄 행만 걸러냄
+        proxy = TagCategoryProxyModel(category, self)
+        proxy.setSourceModel(self.tag_model)
+        table = QTableView()
+        table.setModel(proxy)
+        table.verticalHeader().setVisible(False)
+        # 행 높이를 고정해서 행마다 크기 계산을 하지 않게 함
+        table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        table.verticalHeader().setDefaultSectionSize(22)
+        table.setWordWrap(False)
+        # 행 배경색은 view 의 alternating row 기능으로 칠함
+        table.setAlternatingRowColors(True)
+        table.setStyleSheet("alternate-background-color: #FBFAFB;")
 
         # 열 별로 지정안하니 너비가 다 똑같이 나와 보기 싫어 너비 배분, 마지막 Value는 나머지 값 다
         table.setColumnWidth(0, 55)  # Group
@@ -280,32 +722,6 @@ class DicomTagLoader(QWidget):
         table.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)
         table.horizontalHeader().setStretchLastSection(True)
 
-        # 정렬된 요소로 tag 리스트 채우기
-        for row, element in enumerate(elements):
-            table.setItem(row, 0, QTableWidgetItem(f"{element.tag.group:04X}"))
-            table.setItem(row, 1, QTableWidgetItem(f"{element.tag.element:04X}"))
-            table.setItem(row, 2, QTableWidgetItem(element.name))
-            table.setItem(row, 3, QTableWidgetItem(element.VR))
-            size = len(str(element.value)) if element.value else 0
-            table.setItem(row, 4, QTableWidgetItem(str(size)))
-            # 0010,0010 Patient's Name은 캐릭터셋으로 디코딩한 것으로 표시
-            if element.tag.group == 0x0010 and element.tag.element == 0x0010:
-                table.setItem(row, 5, QTableWidgetItem(str(dicom_data.PatientName)))
-            # 7EF0,0010 tag값을 표시는 Encoded graphical image data로 하고 실제 바이너리 값은 담고 있음
-            elif element.tag.group == 0x7FE0 and element.tag.element == 0x0010:
-                table.setItem(row, 5, QTableWidgetItem(str(display_value)))
-            else:
-                table.setItem(row, 5, QTableWidgetItem(str(element.value)))
-
-            # 짝수 행에 배경색 추가
-            if row % 2 == 0:
-                for col in range(table.columnCount()):
-                    item = table.item(row, col)
-                    if item:
-                        item.setBackground(
-                            QColor(0xFB, 0xFA, 0xFB)
-                        )  # 짝수 행 배경색 설정
-
         # 탭 추가
         self.tabs.addTab(table, tag_type)
 
@@ -317,108 +733,140 @@ class DicomTagLoader(QWidget):
 
     def dropEvent(self, event):
         if event.mimeData().hasUrls():
-            file_url = event.mimeData().urls()[0]
-            filepath = file_url.toLocalFile()
-            try:
-                # 파일이 실제 DICOM 파일인지 확인
-                if not is_dicom(filepath):
-                    QMessageBox.warning(
-                        self, "Error", "The dropped file is not a valid DICOM file."
-                    )
-                    return
-
-                # DICOM 파일 로드
-                self.openFile(filepath)
-            except Exception as e:
-                QMessageBox.critical(
-                    self, "Error", f"Error processing the dropped file: {e}"
-                )
+            filepaths = []
+            for url in event.mimeData().urls():
+                path = url.toLocalFile()
+                if os.path.isdir(path):
+                    # 폴더는 하위 파일 전부, DICOM 여부는 읽을 때 확인
+                    for root, _, files in os.walk(path):
+                        filepaths.extend(os.path.join(root, name) for name in sorted(files))
+                elif path:
+                    filepaths.append(path)
+            if len(filepaths) == 1 and not os.path.isdir(event.mimeData().urls()[0].toLocalFile()):
+                # DICOM 파일 확인과 로드는 openFile 에서 worker 로 넘김, 읽던 파일은 취소됨
+                self.openFile(filepaths[0])
+            elif filepaths:
+                self.openFiles(filepaths)
         else:
             QMessageBox.warning(
                 self, "Error", "The dropped content is not a valid file."
             )
 
+    def compareFiles(self):
+        # 사이드바에 파일 목록이 있으면 그 파일들을, 없으면 선택한 파일들을 비교
+        filepaths = [
+            self.file_list.item(i).data(Qt.UserRole) for i in range(self.file_list.count())
+        ]
+        if len(filepaths) < 2:
+            filepaths, _ = QFileDialog.getOpenFileNames(
+                self, "Select DICOM Files to Compare", "", "DICOM Files (*.dcm);;All Files (*)"
+            )
+        if len(filepaths) < 2:
+            if filepaths:
+                QMessageBox.warning(self, "Error", "Select two or more files to compare.")
+            return
+        self.diff_view = HeaderDiffView(filepaths)
+        self.diff_view.show()
+
+    def currentSourceRow(self, table):
+        # 선택된 view 행을 proxy -> 원본 모델 행 번호로 바꿔서 반환, 선택이 없으면 -1
+        index = table.currentIndex()
+        if not index.isValid():
+            return -1
+        return table.model().mapToSource(index).row()
+
     def copyValue(self, table):
-        selected_row = table.currentRow()
+        source_row = self.currentSourceRow(table)
         clipboard = QApplication.clipboard()
-        row_data = []
-        if selected_row >= 0:
-            group_item = table.item(selected_row, 0)
-            element_item = table.item(selected_row, 1)
-            # 버튼 클릭했는데 그 행이 (7FE0,0010)이면 보이는 값이 아니라 실제 값 복사하도록 if함
-            if (
-                group_item
-                and element_item
-                and group_item.text().strip().upper() == "7FE0"
-                and element_item.text().strip().upper() == "0010"
-            ):
-                # self.pixel_data_value에 저장된 실제 픽셀 데이터 복사
-                row_data.append(np.array2string(self.pixel_data_value))  # 실제 값 사용
+        if source_row >= 0:
+            # 버튼 클릭했는데 그 행이 (7FE0,0010)이면 보이는 값이 아니라 Pixel 설정(요약/hex/base64)대로 복사
+            if self.tag_model.rows[source_row].tag == PIXEL_DATA_TAG:
+                clipboard.setText(self.pixelDataText())
             else:
-                item = table.item(selected_row, 5)
-                if item:
-                    row_data.append(item.text())
-            clipboard.setText("\t".join(row_data))
+                clipboard.setText(self.tag_model.valueText(source_row))
         else:
             print("No row selected.")
 
     def copyAll(self):
         table = self.tabs.currentWidget()
-        selected_row = table.currentRow()
+        source_row = self.currentSourceRow(table)
         clipboard = QApplication.clipboard()
-        row_data = []
-        if selected_row >= 0:
-            for col in range(table.columnCount()):
-                item = table.item(selected_row, col)
-                if item:
-                    if (
-                        col == 5
-                        and table.item(selected_row, 0).text().strip().upper() == "7FE0"
-                        and table.item(selected_row, 1).text().strip().upper() == "0010"
-                    ):
-                        row_data.append(
-                            np.array2string(self.pixel_data_value)
-                        )  # 실제 값 사용
-                    else:
-                        row_data.append(item.text())
-            clipboard.setText("\t".join(row_data))
+        if source_row >= 0:
+            buffer = io.StringIO()
+            write_tag_rows(
+                buffer,
+                [self.tag_model.rows[source_row]],
+                pixel_ref=self.pixel_data_value,
+                pixel_mode=self.pixel_mode_combo.currentText(),
+                header=False,
+            )
+            clipboard.setText(buffer.getvalue().rstrip("\n"))
         else:
             print("No row selected.")
 
+    def pixelDataText(self):
+        # 헤더만 읽어둔 상태라 Pixel Data 값은 복사할 때만 파일에서 조각으로 읽음 (PIXEL_DUMP_LIMIT 까지)
+        if self.pixel_data_value is None:
+            return ""
+        return "".join(iter_pixel_text(self.pixel_data_value, self.pixel_mode_combo.currentText()))
+
+    def exportTable(self):
+        # 지금 탭에 보이는 행을 TSV/JSON 파일로 한 행씩 바로 씀
+        table = self.tabs.currentWidget()
+        proxy = table.model()
+        if proxy.rowCount() == 0:
+            QMessageBox.warning(self, "Error", "There are no tags to export.")
+            return
+        filepath, selected_filter = QFileDialog.getSaveFileName(
+            self, "Export Tags", "", "TSV Files (*.tsv);;JSON Files (*.json)"
+        )
+        if not filepath:
+            return
+        fmt = "json" if filepath.lower().endswith(".json") or "JSON" in selected_filter else "tsv"
+        tag_rows = (
+            self.tag_model.rows[proxy.mapToSource(proxy.index(row, 0)).row()]
+            for row in range(proxy.rowCount())
+        )
+        try:
+            with open(filepath, "w", encoding="utf-8", newline="") as fp:
+                write_tag_rows(
+                    fp,
+                    tag_rows,
+                    fmt,
+                    pixel_ref=self.pixel_data_value,
+                    pixel_mode=self.pixel_mode_combo.currentText(),
+                )
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Error exporting tags: {e}")
+
     # 필터링 함수
     def filterTable(self):
+        self.filter_timer.stop()
         self.current_filters["group"] = self.group_input.text().strip()
         self.current_filters["element"] = self.element_input.text().strip()
         self.current_filters["description"] = self.description_input.text().strip().lower()
 
-        group_id = self.current_filters["group"]
-        element_id = self.current_filters["element"]
-        description_txt = self.current_filters["description"]
-
+        rows = self.search_index.search(
+            self.current_filters["group"],
+            self.current_filters["element"],
+            self.current_filters["description"],
+        )
+        allowed_rows = None
+        if rows is not None:
+            allowed_rows = bytearray(len(self.tag_model.rows))
+            for row in rows:
+                allowed_rows[row] = 1
+
+        # 모든 탭에 동일한 검색어 적용, 지금 보고 있는 탭만 바로 다시 거르고 나머지는 탭을 열 때 거름
+        current = self.tabs.currentWidget()
         for i in range(self.tabs.count()):
             table = self.tabs.widget(i)
-            for row in range(table.rowCount()):
-                group_match = (
-                    True
-                    if not group_id
-                    else table.item(row, 0)
-                    and table.item(row, 0).text().startswith(group_id)
-                )
-                element_match = (
-                    True
-                    if not element_id
-                    else table.item(row, 1)
-                    and table.item(row, 1).text().startswith(element_id)
-                )
-                description_match = (
-                    True
-                    if not description_txt
-                    else table.item(row, 2)
-                    and description_txt in table.item(row, 2).text().lower()
-                )
-                table.setRowHidden(
-                    row, not (group_match and element_match and description_match)
-                )
+            table.model().setAllowedRows(allowed_rows, apply_now=table is current)
+
+    def applyPendingFilter(self, index):
+        table = self.tabs.widget(index)
+        if table is not None and table.model().dirty:
+            table.model().setAllowedRows(table.model().allowed_rows)
 
     def restoreFilters(self):
         """기존 검색 필터를 유지하면서 새로운 파일을 로드"""
@@ -436,6 +884,13 @@ class DicomTagLoader(QWidget):
 
 
 if __name__ == "__main__":
+    # 헤더 비교의 process pool 이 PyInstaller exe 에서도 동작하도록
+    multiprocessing.freeze_support()
+    # dicom_tag_loader --dump <폴더> -o tags.csv : 화면 없이 헤더 덤프 (dicom_tag_dump.py)
+    if len(sys.argv) > 1 and sys.argv[1] == "--dump":
+        import dicom_tag_dump
+
+        sys.exit(dicom_tag_dump.main(sys.argv[2:]))
     app = QApplication(sys.argv)
     # 애플리케이션 아이콘 설정
     app.setWindowIcon(QIcon("D:\\dicom_tag_loader\\tag.ico"))
@@ -0,0 +1,117 @@
+"""여러 파일을 수정할 때 끝난 파일을 기록해 두는 append-only journal
+
+    journal = EditJournal("edit_journal.jsonl")
+    for path in paths:
+        if journal.is_done(path):
+            continue                       # 다시 돌릴 때 끝난 파일은 건너뜀
+        input_digest = content_digest(path, pixel_ref)
+        output_ref = save_header(dataset, pixel_ref, output_path)
+        journal.record(path, journal_entry(path, output_path, input_digest, output_ref))
+
+한 줄에 파일 하나 (JSON 배열: 원본, 저장 경로, 원본/저장 파일 digest, 저장 파일 크기/mtime, 원본 크기/mtime).
+줄 단위로 flush 하므로 중간에 죽으면 마지막 줄만 잘릴 수 있고, 다시 열 때 잘린 줄은 버림.
+원본이 그 뒤로 바뀌었으면(같은 이름으로 다시 내보낸 파일 등) 끝난 파일로 보지 않음
+"""
+import json
+import os
+from collections import namedtuple
+
+from dicom_header import content_digest
+
+# 저장이 끝난 파일 하나, size/mtime_ns 는 저장 직후 output 의 stat, source_size/source_mtime_ns 는 그때 원본의 stat
+# (원본에 덮어썼으면 output 과 같음), 원본 stat 이 없는 예전 journal 줄은 끝나지 않은 것으로 봄
+JournalEntry = namedtuple(
+    "JournalEntry",
+    ["output", "input_digest", "output_digest", "size", "mtime_ns", "source_size", "source_mtime_ns"],
+    defaults=(None, None),
+)
+# 이 개수만큼 기록할 때마다 fsync (그 사이에 OS 가 죽으면 몇 파일만 다시 수정)
+SYNC_EVERY = 256
+
+
+def journal_entry(source_path, output_path, input_digest, output_ref=None):
+    """저장한 직후의 원본과 output 으로 JournalEntry 를 만듦 (worker process 에서 불러도 됨)"""
+    stat = os.stat(output_path)
+    source_stat = os.stat(source_path)
+    return JournalEntry(
+        output_path, input_digest, content_digest(output_path, output_ref), stat.st_size, stat.st_mtime_ns,
+        source_stat.st_size, source_stat.st_mtime_ns,
+    )
+
+
+class EditJournal:
+    """원본 경로 -> JournalEntry, 같은 원본이 여러 번 기록되면 마지막 것 사용
+
+    resume=False 면 기존 journal 을 지우고 새로 씀
+    """
+
+    def __init__(self, journal_path, resume=True):
+        self.path = journal_path
+        self.entries = {}
+        if resume and os.path.exists(journal_path):
+            self._load()
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(journal_path)), exist_ok=True)
+            open(journal_path, "w").close()
+        self.fp = open(journal_path, "a", encoding="utf-8", newline="\n")
+        self.unsynced = 0
+
+    def _load(self):
+        valid_end = 0
+        with open(self.path, "rb") as fp:
+            for line in fp:
+                try:
+                    source, *fields = json.loads(line)
+                    entry = JournalEntry(*fields)
+                except (ValueError, TypeError):
+                    break  # 쓰다가 잘린 마지막 줄
+                if not line.endswith(b"\n"):
+                    break
+                self.entries[source] = entry
+                valid_end += len(line)
+        with open(self.path, "r+b") as fp:
+            fp.truncate(valid_end)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, source):
+        return source in self.entries
+
+    def is_done(self, source):
+        """journal 에 있고 원본과 저장한 파일이 둘 다 그 뒤로 바뀌지 않았으면 True (stat 두 번)"""
+        entry = self.entries.get(source)
+        if entry is None or entry.source_mtime_ns is None:
+            return False
+        try:
+            stat = os.stat(entry.output)
+            source_stat = os.stat(source)
+        except OSError:
+            return False
+        return (
+            stat.st_size == entry.size and stat.st_mtime_ns == entry.mtime_ns
+            and source_stat.st_size == entry.source_size and source_stat.st_mtime_ns == entry.source_mtime_ns
+        )
+
+    def record(self, source, entry):
+        self.fp.write(json.dumps([source, *entry], ensure_ascii=False) + "\n")
+        self.fp.flush()
+        self.entries[source] = entry
+        self.unsynced += 1
+        if self.unsynced >= SYNC_EVERY:
+            self.sync()
+
+    def sync(self):
+        os.fsync(self.fp.fileno())
+        self.unsynced = 0
+
+    def close(self):
+        if not self.fp.closed:
+            self.sync()
+            self.fp.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,639 @@
+"""YAML/JSON 레시피 하나로 여러 DICOM 파일의 tag 를 한 번에 수정
+
+    python edit_recipe.py recipes/odir.yaml
+    python edit_recipe.py recipes/nih_pneumothorax.yaml --workers 8
+    python edit_recipe.py recipes/odir.yaml --check      # 검사만 하고 저장하지 않음
+    python edit_recipe.py recipes/odir.yaml --dry-run changes.tsv [--resume]   # 바뀔 내용만 기록
+    python edit_recipe.py recipes/odir.yaml --journal odir.jsonl   # 끝난 파일 기록, 다시 돌리면 이어서
+
+레시피 예:
+
+    input: D:\\dcm                # 폴더(하위 폴더 포함) 또는 파일
+    pattern: "*.dcm"
+    output: D:\\dcm_out           # 없으면 원본 파일에 덮어씀
+    journal: odir_journal.jsonl   # 끝난 파일 기록 (--journal 로도 지정)
+    uid_namespace: ODIR-5K        # 있으면 다시 돌리거나 나눠 돌려도 같은 key 는 같은 UID
+    uid_store: odir_uids.sqlite   # 만든 UID 기록 (uid_namespace 가 없으면 무작위 UID 를 기록해서 재사용)
+    csv:                          # 없으면 CSV 없이 ops 만 적용
+      path: metadata.csv
+      key: filename               # 파일과 맞출 CSV 열
+      match: name                 # name: 파일 이름, stem: 확장자 뺀 이름
+    ops:
+      - set: PatientAge
+        value: "{Patient Age:0>3}Y"
+      - set: "0011,0010"          # 없는 tag 를 추가할 때 사전에 없으면 vr 필요
+        vr: LO
+        value: MY PRIVATE
+      - delete: OtherPatientIDs
+      - set: ReferencedSeriesSequence[*].SeriesInstanceUID   # sequence 안 (tag_path 문법)
+        value: "{ds.SeriesInstanceUID}"
+      - set: (1001,"VUNO",02)     # private creator 로 찾는 private tag
+        vr: CS
+        value: "2"
+      - uid: StudyInstanceUID     # key 가 같은 파일은 같은 UID
+        key: "{stem}"
+      - date: PatientBirthDate    # base 에서 years/days 만큼 이동
+        base: "20200924"
+        years: "-{Patient Age}"
+      - set: Laterality
+        value: L
+        when_filename: "*_left*"
+
+비식별화는 deidentify 로 (ops 보다 먼저 적용, ops 는 없어도 됨):
+
+    uid_namespace: <비밀값>        # 가명/날짜 이동/UID 가 이 값으로 정해짐, 공개하지 말 것
+    deidentify:
+      patient_key: "{ds.PatientID}"   # 같은 환자를 묶는 값 (같은 가명, 같은 날짜 이동)
+      patient_id: "{pseudonym}"       # 기본값, {pseudonym} 은 ops 에서도 쓸 수 있음
+      patient_name: "{pseudonym}"
+      date_shift: [-365, -30]         # 환자마다 이 범위에서 정해진 일수만큼 모든 DA/DT 이동
+      remove_private: true
+      keep_private_creators: [VUNO]
+      remove: [...]                   # 없으면 deidentify.DEFAULT_REMOVE, empty 도 마찬가지
+
+value/key/base 는 str.format 템플릿으로 CSV 열 이름과 {filename}, {stem}, {ds.PatientID}
+(앞의 op 까지 적용된 dataset 값)를 쓸 수 있음. sub([[정규식, 바꿀 문자열], ...]), strip,
+max_length 로 템플릿 결과를 다듬을 수 있음.
+"""
+import argparse
+import fnmatch
+import json
+import multiprocessing
+import os
+import re
+import string
+import sys
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+from pydicom.uid import PYDICOM_ROOT_UID, generate_uid
+
+from change_manifest import ManifestWriter, diff_snapshots, snapshot
+from deidentify import Deidentifier
+from dicom_header import content_digest, read_for_edit, save_header
+from edit_journal import EditJournal, journal_entry
+from metadata_join import MetadataIndex
+from tag_path import TagPathError, compile_path
+from uid_remap import UidRemapper
+
+try:
+    import yaml
+except ImportError:  # YAML 레시피는 PyYAML 이 있을 때만, JSON 은 항상 가능
+    yaml = None
+
+OP_NAMES = ("set", "delete", "uid", "date")
+# 템플릿에서 CSV 열 말고 항상 쓸 수 있는 이름
+RESERVED_FIELDS = {"filename", "stem", "path", "ds"}
+DATE_FORMAT = "%Y%m%d"
+# worker 에 한 번에 넘기는 파일 수, worker 당 동시에 처리 중인 묶음 수
+FILES_PER_TASK = 32
+TASKS_PER_WORKER = 4
+
+
+class RecipeError(ValueError):
+    """레시피 형식 오류, 메시지에 ops[번호] 같은 위치를 포함"""
+
+
+class RequiredOpError(Exception):
+    """실패하면 그 파일을 저장하면 안 되는 op (비식별화) 의 오류"""
+
+
+def load_recipe(path):
+    with open(path, encoding="utf-8") as fp:
+        if path.lower().endswith((".yaml", ".yml")):
+            if yaml is None:
+                raise RecipeError("YAML recipes need PyYAML (pip install pyyaml), or use JSON")
+            recipe = yaml.safe_load(fp)
+        else:
+            recipe = json.load(fp)
+    if not isinstance(recipe, dict):
+        raise RecipeError("Recipe must be a mapping with 'input' and 'ops'")
+    return recipe
+
+
+def parse_path(text):
+    """키워드, 'gggg,eeee', '(gggg,eeee)', 'ggggeeee', sequence/private 경로를 TagPath 로"""
+    try:
+        return compile_path(str(text).strip())
+    except TagPathError as e:
+        raise RecipeError(str(e))
+
+
+class Template:
+    """str.format 템플릿 + sub/strip/max_length 후처리, 필드가 없으면 그대로 돌려줌"""
+
+    def __init__(self, text, subs=(), strip=False, max_length=None):
+        self.text = text
+        self.fields = set()
+        if isinstance(text, str):
+            try:
+                parsed = list(string.Formatter().parse(text))
+            except ValueError as e:
+                raise RecipeError(f"Invalid template {text!r}: {e}")
+            for _, field, _, _ in parsed:
+                if field is not None:
+                    # {ds.PatientID}, {row[0]} 등은 앞부분 이름만
+                    self.fields.add(re.split(r"[.\[]", field, maxsplit=1)[0])
+        try:
+            self.subs = [(re.compile(pattern), repl) for pattern, repl in subs]
+        except (TypeError, ValueError, re.error) as e:
+            raise RecipeError(f"Invalid sub {subs!r}: {e}")
+        self.strip = strip
+        self.max_length = max_length
+
+    def render(self, context):
+        if not isinstance(self.text, str):
+            return self.text  # 숫자 등은 그대로
+        try:
+            value = self.text.format_map(context) if self.fields else self.text
+        except KeyError as e:
+            raise ValueError(f"Missing value for {e} in {self.text!r}")
+        for pattern, repl in self.subs:
+            value = pattern.sub(repl, value)
+        if self.strip:
+            value = value.strip()
+        if self.max_length is not None:
+            value = value[:self.max_length]
+        return value
+
+
+def _template(spec, key, label, required=True):
+    if key not in spec:
+        if required:
+            raise RecipeError(f"{label}: '{key}' is required")
+        return None
+    return Template(
+        spec[key],
+        spec.get("sub", ()),
+        bool(spec.get("strip", False)),
+        spec.get("max_length"),
+    )
+
+
+class RecipeOp:
+    def __init__(self, label, path, when):
+        self.label = label
+        self.path = path  # TagPath, sequence 안이면 일치하는 item 모두에 적용
+        self.when = when  # 파일 이름 glob, None 이면 모든 파일
+
+    def applies_to(self, filename):
+        return self.when is None or fnmatch.fnmatch(filename.lower(), self.when)
+
+    def templates(self):
+        return []
+
+
+class SetOp(RecipeOp):
+    def __init__(self, label, path, when, value, VR):
+        super().__init__(label, path, when)
+        self.value = value
+        self.VR = VR
+
+    def templates(self):
+        return [self.value]
+
+    def apply(self, dataset, context):
+        self.path.set(dataset, self.value.render(context), self.VR)
+
+
+class DeleteOp(RecipeOp):
+    def apply(self, dataset, context):
+        self.path.delete(dataset)
+
+
+class UidOp(RecipeOp):
+    def __init__(self, label, path, when, key, remapper):
+        super().__init__(label, path, when)
+        self.key = key
+        self.remapper = remapper
+
+    def templates(self):
+        return [self.key] if self.key is not None else []
+
+    def apply(self, dataset, context):
+        if self.key is None:
+            uid = generate_uid(prefix=self.remapper.prefix)
+        else:
+            # 같은 namespace, tag, key 면 어느 process 에서 만들어도 같은 UID
+            uid = self.remapper.uid(self.key.render(context), self.path.key)
+        self.path.set(dataset, uid, "UI")
+
+
+class DateOp(RecipeOp):
+    def __init__(self, label, path, when, base, years, days, date_format):
+        super().__init__(label, path, when)
+        self.base = base
+        self.years = years
+        self.days = days
+        self.date_format = date_format
+
+    def templates(self):
+        return [template for template in (self.base, self.years, self.days) if template is not None]
+
+    def apply(self, dataset, context):
+        date = datetime.strptime(str(self.base.render(context)).strip(), self.date_format)
+        if self.years is not None:
+            year = date.year + int(str(self.years.render(context)).strip())
+            try:
+                date = date.replace(year=year)
+            except ValueError:  # 2월 29일 -> 2월 28일
+                date = date.replace(year=year, day=28)
+        if self.days is not None:
+            date += timedelta(days=int(str(self.days.render(context)).strip()))
+        self.path.set(dataset, date.strftime(DATE_FORMAT), "DA")
+
+
+class DeidentifyOp(RecipeOp):
+    """레시피의 deidentify 설정, 다른 ops 보다 먼저 적용하고 context 에 {pseudonym} 을 넣음"""
+
+    def __init__(self, label, deidentifier, patient_key, patient_id, patient_name):
+        super().__init__(label, None, None)
+        self.deidentifier = deidentifier
+        self.patient_key = patient_key
+        self.patient_id = patient_id
+        self.patient_name = patient_name
+
+    def templates(self):
+        return [self.patient_key, self.patient_id, self.patient_name]
+
+    def apply(self, dataset, context):
+        try:
+            patient_key = str(self.patient_key.render(context)).strip()
+            if not patient_key:
+                raise ValueError(f"patient_key {self.patient_key.text!r} is empty")
+            context["pseudonym"] = self.deidentifier.apply(dataset, patient_key)
+            dataset.PatientID = self.patient_id.render(context)
+            dataset.PatientName = self.patient_name.render(context)
+        except Exception as e:
+            raise RequiredOpError(f"{e}, file not saved")
+
+
+def compile_deidentify(spec, recipe, remapper):
+    label = "deidentify"
+    if not isinstance(spec, dict):
+        raise RecipeError(f"{label}: must be a mapping")
+    date_shift = spec.get("date_shift")
+    if isinstance(date_shift, int):
+        date_shift = (date_shift, date_shift)
+    if date_shift is not None and (
+        not isinstance(date_shift, (list, tuple)) or len(date_shift) != 2
+        or not all(isinstance(days, int) for days in date_shift)
+    ):
+        raise RecipeError(f"{label}: 'date_shift' must be days or [min, max] days")
+    try:
+        deidentifier = Deidentifier(
+            recipe["uid_namespace"], remapper,
+            remove=spec.get("remove"),
+            empty=spec.get("empty"),
+            date_shift=date_shift,
+            remap_uids=bool(spec.get("remap_uids", True)),
+            remove_private=bool(spec.get("remove_private", True)),
+            keep_private_creators=spec.get("keep_private_creators", ()),
+        )
+    except TagPathError as e:
+        raise RecipeError(f"{label}: {e}")
+
+    def template(key, default):
+        return Template(spec.get(key, default))
+
+    return DeidentifyOp(
+        label, deidentifier,
+        template("patient_key", "{ds.PatientID}"),
+        template("patient_id", "{pseudonym}"),
+        template("patient_name", "{pseudonym}"),
+    )
+
+
+def _element_VR(path, spec, label):
+    # 없는 tag 를 추가할 때 쓸 VR, 지정 안 하면 사전에서 찾음
+    if "vr" in spec:
+        return str(spec["vr"]).upper()
+    VR = path.default_VR()
+    if VR is None:
+        raise RecipeError(f"{label}: the VR of {path.text} is not known from the dictionary, 'vr' is required")
+    return VR
+
+
+def compile_op(index, spec, recipe, remapper=None):
+    label = f"ops[{index}]"
+    if not isinstance(spec, dict):
+        raise RecipeError(f"{label}: each op must be a mapping")
+    names = [name for name in OP_NAMES if name in spec]
+    if len(names) != 1:
+        raise RecipeError(f"{label}: needs exactly one of {', '.join(OP_NAMES)}")
+    name = names[0]
+    try:
+        path = parse_path(spec[name])
+    except RecipeError as e:
+        raise RecipeError(f"{label}: {e}")
+    label = f"{label} {name} {spec[name]}"
+    when = spec.get("when_filename")
+    when = str(when).lower() if when is not None else None
+
+    if name == "set":
+        return SetOp(label, path, when, _template(spec, "value", label), _element_VR(path, spec, label))
+    if name == "delete":
+        return DeleteOp(label, path, when)
+    if name == "uid":
+        return UidOp(label, path, when, _template(spec, "key", label, required=False), remapper)
+    return DateOp(
+        label, path, when,
+        _template(spec, "base", label),
+        _template(spec, "years", label, required=False),
+        _template(spec, "days", label, required=False),
+        spec.get("format", DATE_FORMAT),
+    )
+
+
+def compile_recipe(recipe, columns=None):
+    """레시피의 ops 를 한 번만 검사해서 op 객체 목록으로 만듦
+
+    columns 를 주면 템플릿이 쓰는 이름이 CSV 열에 있는지도 검사
+    """
+    ops = recipe.get("ops")
+    deidentify = recipe.get("deidentify")
+    if ops is None and deidentify:
+        ops = []
+    if not isinstance(ops, list) or not (ops or deidentify):
+        raise RecipeError("'ops' must be a non-empty list")
+    remapper = UidRemapper(
+        recipe.get("uid_namespace"), recipe.get("uid_prefix", PYDICOM_ROOT_UID), recipe.get("uid_store")
+    )
+    compiled = [compile_deidentify(deidentify, recipe, remapper)] if deidentify else []
+    compiled.extend(compile_op(index, spec, recipe, remapper) for index, spec in enumerate(ops))
+    if columns is not None:
+        known = set(columns) | RESERVED_FIELDS
+        if deidentify:
+            known.add("pseudonym")
+        for op in compiled:
+            for template in op.templates():
+                missing = template.fields - known
+                if missing:
+                    raise RecipeError(f"{op.label}: unknown column(s) {', '.join(sorted(missing))}")
+    return compiled
+
+
+def apply_ops(dataset, ops, context):
+    # op 하나가 실패해도 나머지는 계속 적용, 오류 메시지 목록을 돌려줌
+    # 비식별화가 실패하면 RequiredOpError 를 그대로 올려서 저장하지 않게 함
+    errors = []
+    for op in ops:
+        if not op.applies_to(context["filename"]):
+            continue
+        try:
+            op.apply(dataset, context)
+        except RequiredOpError as e:
+            raise RequiredOpError(f"{op.label}: {e}")
+        except Exception as e:
+            errors.append(f"{op.label}: {e}")
+    return errors
+
+
+def _resolve(path, base_dir):
+    return path if os.path.isabs(path) else os.path.join(base_dir, path)
+
+
+def collect_jobs(recipe, base_dir):
+    """(jobs, columns, notes) 반환, job 은 (원본 경로, CSV 행 dict, 저장 경로)
+
+    CSV 가 있으면 파일 이름으로 행을 맞추고, 못 맞춘 파일/행은 notes 에 남김
+    """
+    if "input" not in recipe:
+        raise RecipeError("'input' is required")
+    source = _resolve(recipe["input"], base_dir)
+    output = recipe.get("output")
+    output = _resolve(output, base_dir) if output else None
+    pattern = str(recipe.get("pattern", "*.dcm")).lower()
+
+    if os.path.isfile(source):
+        source_dir = os.path.dirname(source)
+        paths = [source]
+    else:
+        source_dir = source
+        paths = []
+        for root, dirnames, filenames in os.walk(source):
+            dirnames.sort()
+            paths.extend(
+                os.path.join(root, filename)
+                for filename in sorted(filenames)
+                if fnmatch.fnmatch(filename.lower(), pattern)
+            )
+
+    notes = []
+    columns = None
+    files = [(os.path.basename(path), path) for path in paths]
+    rows = [{}] * len(files)
+    csv_spec = recipe.get("csv")
+    if csv_spec:
+        if "path" not in csv_spec or "key" not in csv_spec:
+            raise RecipeError("'csv' needs 'path' and 'key'")
+        # 값은 모두 문자열로 (빈 칸도 NaN 이 아니라 "")
+        try:
+            index = MetadataIndex.from_csv(
+                _resolve(csv_spec["path"], base_dir),
+                csv_spec["key"],
+                strip_extension=csv_spec.get("match", "name") == "stem",
+                dtype=str,
+                keep_default_na=False,
+                encoding=csv_spec.get("encoding", "utf-8-sig"),
+            )
+        except KeyError as e:
+            raise RecipeError(str(e.args[0]))
+        columns = list(index.table.columns)
+        joined = index.join(files)
+        notes.extend(f"No CSV row for {os.path.basename(path)}, skipped" for path in joined.unmatched_files)
+        notes.extend(f"No file for CSV row {row[csv_spec['key']]}" for row in joined.unmatched_rows)
+        files = [(os.path.basename(path), path) for path, _ in joined.matched]
+        rows = [row for _, row in joined.matched]
+
+    jobs = []
+    for (_, path), row in zip(files, rows):
+        if output:
+            output_path = os.path.join(output, os.path.relpath(path, source_dir))
+        else:
+            output_path = path
+        jobs.append((path, row, output_path))
+
+    return jobs, columns, notes
+
+
+def _context(path, row, dataset):
+    filename = os.path.basename(path)
+    context = dict(row)
+    context.update(filename=filename, stem=os.path.splitext(filename)[0], path=path, ds=dataset)
+    return context
+
+
+def edit_file(path, row, output_path, ops):
+    """(오류 목록, JournalEntry) 반환, 오류가 있으면 JournalEntry 는 None (다음 실행에서 다시 처리)"""
+    filename = os.path.basename(path)
+    try:
+        dataset, pixel_ref = read_for_edit(path)
+        input_digest = content_digest(path, pixel_ref)
+    except Exception as e:
+        return [f"Error reading DICOM file {filename}: {e}"], None
+    try:
+        errors = apply_ops(dataset, ops, _context(path, row, dataset))
+    except RequiredOpError as e:
+        return [str(e)], None
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+        output_ref = save_header(dataset, pixel_ref, output_path)
+        entry = None if errors else journal_entry(path, output_path, input_digest, output_ref)
+    except Exception as e:
+        errors.append(f"Error saving {filename}: {e}")
+        entry = None
+    return errors, entry
+
+
+def preview_file(path, row, ops):
+    """저장하지 않고 헤더만 읽어서 (변경 목록, 오류 목록) 반환"""
+    try:
+        dataset, _ = read_for_edit(path)
+    except Exception as e:
+        return [], [f"Error reading DICOM file {os.path.basename(path)}: {e}"]
+    before = snapshot(dataset)
+    try:
+        errors = apply_ops(dataset, ops, _context(path, row, dataset))
+    except RequiredOpError as e:
+        return [], [str(e)]
+    return diff_snapshots(before, snapshot(dataset)), errors
+
+
+_worker_ops = None
+
+
+def _init_worker(recipe):
+    # process 마다 한 번만 compile
+    global _worker_ops
+    _worker_ops = compile_recipe(recipe)
+
+
+def edit_batch(jobs):
+    return [(path, edit_file(path, row, output_path, _worker_ops)) for path, row, output_path in jobs]
+
+
+def preview_batch(jobs):
+    return [(path, preview_file(path, row, _worker_ops)) for path, row, _ in jobs]
+
+
+def run_recipe(recipe, jobs, workers, dry_run=False):
+    """jobs 를 process pool 로 나눠 적용, (path, (오류 목록, JournalEntry)) 를 jobs 순서대로 돌려줌
+
+    dry_run 이면 저장하지 않고 (path, (변경 목록, 오류 목록)) 을 돌려줌
+    """
+    task = preview_batch if dry_run else edit_batch
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(recipe,)) as executor:
+        pending = deque()
+        for start in range(0, len(jobs), FILES_PER_TASK):
+            pending.append(executor.submit(task, jobs[start:start + FILES_PER_TASK]))
+            if len(pending) >= workers * TASKS_PER_WORKER:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def prepare_recipe(path):
+    """레시피를 읽고 검사해서 (recipe, jobs, notes) 반환"""
+    recipe = load_recipe(path)
+    # uid_namespace 도 uid_store 도 없으면 실행마다 새 UID, 있으면 다시 돌려도 같은 UID
+    base_dir = os.path.dirname(os.path.abspath(path))
+    if recipe.get("deidentify") and not recipe.get("uid_namespace"):
+        raise RecipeError("'deidentify' needs a fixed, secret 'uid_namespace'")
+    if recipe.get("uid_store"):
+        recipe["uid_store"] = _resolve(recipe["uid_store"], base_dir)
+    else:
+        recipe.setdefault("uid_namespace", uuid.uuid4().hex)
+    compile_recipe(recipe)
+    jobs, columns, notes = collect_jobs(recipe, base_dir)
+    if columns is not None:
+        compile_recipe(recipe, columns)
+    return recipe, jobs, notes
+
+
+def edit(recipe, jobs, workers, journal=None):
+    if journal is not None and len(journal):
+        total = len(jobs)
+        jobs = [job for job in jobs if not journal.is_done(job[0])]
+        print(f"Resuming: {total - len(jobs)} file(s) already done in {journal.path}, {len(jobs)} left")
+    done = failed = 0
+    try:
+        for path, (errors, entry) in run_recipe(recipe, jobs, workers):
+            done += 1
+            if entry is not None and journal is not None:
+                journal.record(path, entry)
+            if errors:
+                failed += 1
+                for error in errors:
+                    print(f"{os.path.basename(path)}: {error}")
+    except KeyboardInterrupt:
+        if journal is not None:
+            print(f"Interrupted, run again to continue from {journal.path}", file=sys.stderr)
+        return 130
+    print(f"Done: {done} file(s), {failed} with errors")
+    return 1 if failed else 0
+
+
+def dry_run(recipe, jobs, workers, manifest_path, resume=False):
+    # uid op 의 key 가 없으면 실행마다 UID 가 달라지므로, 미리보기 값과 실제 저장 값이 다를 수 있음
+    with ManifestWriter(manifest_path, resume) as manifest:
+        if manifest.done:
+            jobs = [job for job in jobs if job[0] not in manifest.done]
+            print(f"Resuming: {len(manifest.done)} file(s) already in {manifest_path}, {len(jobs)} left")
+        done = failed = 0
+        try:
+            for path, (changes, errors) in run_recipe(recipe, jobs, workers, dry_run=True):
+                manifest.write(path, changes, errors)
+                done += 1
+                if errors:
+                    failed += 1
+        except KeyboardInterrupt:
+            print(f"Interrupted, run again with --resume to continue {manifest_path}", file=sys.stderr)
+            return 130
+    print(f"Preview: {done} file(s), {manifest.changes} change(s) in {manifest.changed_files} file(s), "
+          f"{failed} with errors -> {manifest_path}")
+    return 1 if failed else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Apply a YAML/JSON tag edit recipe to DICOM files.")
+    parser.add_argument("recipe", help="recipe file (.yaml, .yml or .json)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="number of worker processes")
+    parser.add_argument("--check", action="store_true", help="validate the recipe and list matches without saving")
+    parser.add_argument("--dry-run", metavar="MANIFEST", help="write planned changes to a TSV manifest without saving")
+    parser.add_argument("--resume", action="store_true", help="continue an interrupted --dry-run manifest")
+    parser.add_argument("--journal", help="record finished files here and skip them on the next run "
+                                          "(default: 'journal' in the recipe)")
+    parser.add_argument("--restart", action="store_true", help="ignore the journal and edit every file again")
+    args = parser.parse_args(argv)
+    if args.resume and not args.dry_run:
+        parser.error("--resume needs --dry-run")
+
+    try:
+        recipe, jobs, notes = prepare_recipe(args.recipe)
+    except (RecipeError, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+
+    for note in notes:
+        print(note)
+    print(f"{len(jobs)} file(s) to edit")
+    if args.check or not jobs:
+        return 0
+    if args.dry_run:
+        return dry_run(recipe, jobs, max(1, args.workers), args.dry_run, args.resume)
+
+    journal_path = args.journal or recipe.get("journal")
+    if journal_path is None:
+        return edit(recipe, jobs, max(1, args.workers))
+    if not args.journal:
+        journal_path = _resolve(journal_path, os.path.dirname(os.path.abspath(args.recipe)))
+    with EditJournal(journal_path, resume=not args.restart) as journal:
+        return edit(recipe, jobs, max(1, args.workers), journal)
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
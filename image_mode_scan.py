@@ -0,0 +1,394 @@
+"""폴더 안 이미지(JPG, PNG, WebP, TIFF, DICOM) 의 mode 와 알파 통계를 process pool 로 한 번에 조사
+
+    python image_mode_scan.py D:\\train                          # D:\\train\\image_modes.tsv 에 저장
+    python image_mode_scan.py D:\\train --recursive --workers 8 --sort mode
+    python image_mode_scan.py D:\\train -o modes.tsv --sort alpha_mean
+
+DICOM 은 헤더의 PhotometricInterpretation 등 몇 개 tag 만 읽고 Pixel Data 는 읽지 않음.
+이미지는 PIL 이 헤더만 읽은 상태(Image.open)에서 mode/크기를 가져오고, 알파 채널이 있는 mode 만 decode 해서
+알파 값의 histogram 으로 평균/최소/최대/완전 투명 비율을 냄.
+8bit PNG(비 interlace) 와 무압축/deflate TIFF 는 strip/tile 을 파일에서 직접 STRIP_BYTES 씩 읽어서 더하므로
+gigapixel 이미지도 메모리가 일정하고, 나머지 형식은 MAX_DECODE_PIXELS 이하일 때만 전체를 decode.
+결과는 파일마다 한 줄인 TSV, --sort 로 정렬 (숫자 열은 숫자 순서, 값이 없으면 맨 뒤)
+"""
+import argparse
+import math
+import multiprocessing
+import os
+import struct
+import sys
+import time
+import zlib
+from collections import Counter, deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pydicom
+from PIL import Image
+
+from metadata_join import scan_directory
+
+REPORT_NAME = "image_modes.tsv"
+IMAGE_SUFFIXES = (".jpg", ".jpeg", ".png", ".webp", ".tif", ".tiff")
+DICOM_SUFFIXES = (".dcm",)
+SUPPORTED_SUFFIXES = IMAGE_SUFFIXES + DICOM_SUFFIXES
+# 알파 채널이 있어서 decode 해야 하는 PIL mode
+ALPHA_MODES = ("RGBA", "LA", "PA")
+# 한 번에 decode 하는 strip/tile 크기(byte), 파일에서 읽는 단위
+STRIP_BYTES = 4 * 1024 * 1024
+READ_BYTES = 1024 * 1024
+# strip 단위로 읽을 수 없는 형식은 전체를 decode, 이보다 크면 알파는 계산하지 않음
+MAX_DECODE_PIXELS = 64 * 1024 * 1024
+# 큰 이미지는 위 제한으로 막으므로 Image.open 의 decompression bomb 검사는 끔 (헤더만 읽음)
+Image.MAX_IMAGE_PIXELS = None
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# PNG color type -> 알파가 있는 mode (8bit 만 직접 읽음)
+PNG_ALPHA_MODES = {4: "LA", 6: "RGBA"}
+# TIFF tag 번호
+TIFF_COMPRESSION = 259
+TIFF_BITS_PER_SAMPLE = 258
+TIFF_SAMPLES_PER_PIXEL = 277
+TIFF_ROWS_PER_STRIP = 278
+TIFF_STRIP_OFFSETS = 273
+TIFF_STRIP_BYTE_COUNTS = 279
+TIFF_PLANAR_CONFIGURATION = 284
+TIFF_PREDICTOR = 317
+TIFF_TILE_WIDTH = 322
+TIFF_TILE_LENGTH = 323
+TIFF_TILE_OFFSETS = 324
+TIFF_TILE_BYTE_COUNTS = 325
+TIFF_UNCOMPRESSED = 1
+TIFF_DEFLATE = (8, 32946)
+# DICOM 에서 읽는 tag, 나머지 tag 와 Pixel Data 는 읽지 않음
+DICOM_TAGS = ["PhotometricInterpretation", "SamplesPerPixel", "Rows", "Columns"]
+# process pool 에 한 번에 넘기는 파일 수, worker 당 미리 넘겨두는 task 수
+FILES_PER_TASK = 64
+TASKS_PER_WORKER = 4
+# 이 개수마다 진행 상황 출력
+PROGRESS_EVERY = 5000
+
+# 파일 하나의 결과, 오류면 format/mode 가 "" 이고 note 에 오류
+# alpha_mean 은 0~1, alpha_min/alpha_max 는 0~255, transparent 는 알파가 0 인 pixel 비율 (알파를 못 구하면 None)
+ModeResult = namedtuple(
+    "ModeResult", ["format", "mode", "width", "height", "alpha_mean", "alpha_min", "alpha_max", "transparent", "note"]
+)
+REPORT_COLUMNS = ["file", *ModeResult._fields]
+NUMERIC_COLUMNS = ("width", "height", "alpha_mean", "alpha_min", "alpha_max", "transparent")
+NO_ALPHA = (None, None, None, None)
+
+
+def alpha_summary(histogram):
+    """알파 값 histogram(256칸) 으로 (평균 0~1, 최소, 최대, 완전 투명 비율)"""
+    histogram = np.asarray(histogram, dtype=np.int64)
+    total = int(histogram.sum())
+    if not total:
+        return NO_ALPHA
+    present = np.flatnonzero(histogram)
+    mean = float(histogram @ np.arange(256)) / total / 255.0
+    return mean, int(present[0]), int(present[-1]), int(histogram[0]) / total
+
+
+def _read_blocks(fp, offset, length, block_size):
+    # 파일의 [offset, offset + length) 를 block_size 씩
+    fp.seek(offset)
+    while length > 0:
+        data = fp.read(min(block_size, length))
+        if not data:
+            raise EOFError(f"image data ends {length} byte(s) early")
+        length -= len(data)
+        yield data
+
+
+def _inflate_blocks(chunks, block_size):
+    # zlib 스트림 조각을 풀어서 block_size byte 씩 (마지막은 남은 만큼), 압축률이 높아도 메모리는 일정
+    inflate = zlib.decompressobj()
+    pending = bytearray()
+    for data in chunks:
+        while data:
+            pending += inflate.decompress(data, block_size)
+            data = inflate.unconsumed_tail
+            while len(pending) >= block_size:
+                yield bytes(pending[:block_size])
+                del pending[:block_size]
+        if inflate.eof:
+            break
+    pending += inflate.flush()
+    if pending:
+        yield bytes(pending)
+
+
+def _png_idat(fp):
+    # IHDR 다음부터 IDAT chunk 의 내용을 READ_BYTES 씩
+    while True:
+        header = fp.read(8)
+        if len(header) < 8:
+            return
+        length, kind = struct.unpack(">I4s", header)
+        if kind == b"IDAT":
+            yield from _read_blocks(fp, fp.tell(), length, READ_BYTES)
+            fp.seek(4, os.SEEK_CUR)  # CRC
+        elif kind == b"IEND":
+            return
+        else:
+            fp.seek(length + 4, os.SEEK_CUR)
+
+
+def png_alpha_histogram(file_path):
+    """8bit RGBA/LA PNG 의 알파 histogram 을 strip 단위로, 직접 읽을 수 없는 PNG 면 None
+
+    strip 의 filter 는 바로 위 row 에 의존하므로, 앞 strip 의 마지막 row 를 filter 없는 row 로 앞에 붙여서
+    PIL 의 PNG decoder 로 strip 만 decode 함
+    """
+    with open(file_path, "rb") as fp:
+        if fp.read(8) != PNG_SIGNATURE:
+            return None
+        length, kind = struct.unpack(">I4s", fp.read(8))
+        if kind != b"IHDR" or length != 13:
+            return None
+        width, height, bit_depth, color_type, _, _, interlace = struct.unpack(">IIBBBBB", fp.read(13))
+        mode = PNG_ALPHA_MODES.get(color_type)
+        if mode is None or bit_depth != 8 or interlace or not width or not height:
+            return None
+        fp.seek(4, os.SEEK_CUR)  # CRC
+
+        line_bytes = width * len(mode) + 1  # 앞의 1 byte 는 filter 종류
+        rows_per_strip = max(1, STRIP_BYTES // line_bytes)
+        histogram = np.zeros(256, np.int64)
+        previous = b"\0" + bytes(line_bytes - 1)  # 첫 row 의 위 row 는 0 으로 봄
+        rows_left = height
+        for block in _inflate_blocks(_png_idat(fp), rows_per_strip * line_bytes):
+            rows = min(len(block) // line_bytes, rows_left)
+            if not rows:
+                break
+            data = zlib.compress(previous + block[:rows * line_bytes], 0)
+            strip = Image.frombytes(mode, (width, rows + 1), data, "zip", mode)
+            alpha = strip.getchannel("A")
+            histogram += alpha.histogram()
+            histogram -= alpha.crop((0, 0, width, 1)).histogram()  # 앞에 붙인 row 는 빼기
+            previous = b"\0" + strip.crop((0, rows, width, rows + 1)).tobytes()
+            rows_left -= rows
+        if rows_left:
+            raise EOFError(f"PNG image data ends {rows_left} row(s) early")
+        return histogram
+
+
+def tiff_alpha_histogram(img, file_path):
+    """8bit 무압축/deflate TIFF 의 알파 histogram 을 strip/tile 단위로 파일에서 직접, 못 읽는 TIFF 면 None"""
+    tags = img.tag_v2
+    bits = tags.get(TIFF_BITS_PER_SAMPLE, 1)
+    samples = tags.get(TIFF_SAMPLES_PER_PIXEL, 1)
+    compression = tags.get(TIFF_COMPRESSION, TIFF_UNCOMPRESSED)
+    predictor = tags.get(TIFF_PREDICTOR, 1)
+    if (
+        samples != len(img.mode)
+        or any(bit != 8 for bit in (bits if isinstance(bits, tuple) else (bits,)))
+        or compression not in (TIFF_UNCOMPRESSED, *TIFF_DEFLATE)
+        or predictor not in (1, 2)
+    ):
+        return None
+
+    width, height = img.size
+    if TIFF_TILE_WIDTH in tags:
+        tile_width, tile_height = tags[TIFF_TILE_WIDTH], tags[TIFF_TILE_LENGTH]
+        offsets, byte_counts = tags[TIFF_TILE_OFFSETS], tags[TIFF_TILE_BYTE_COUNTS]
+    else:
+        tile_width, tile_height = width, min(tags.get(TIFF_ROWS_PER_STRIP, height), height)
+        offsets, byte_counts = tags[TIFF_STRIP_OFFSETS], tags[TIFF_STRIP_BYTE_COUNTS]
+    channels, alpha_index = samples, samples - 1
+    if tags.get(TIFF_PLANAR_CONFIGURATION, 1) == 2:
+        # sample 마다 따로 저장된 plane, 알파는 마지막 plane
+        per_plane = len(offsets) // samples
+        offsets, byte_counts = offsets[-per_plane:], byte_counts[-per_plane:]
+        channels, alpha_index = 1, 0
+
+    row_bytes = tile_width * channels
+    block_size = max(1, STRIP_BYTES // row_bytes) * row_bytes
+    tiles_across = math.ceil(width / tile_width)
+    histogram = np.zeros(256, np.int64)
+    with open(file_path, "rb") as fp:
+        for number, (offset, byte_count) in enumerate(zip(offsets, byte_counts)):
+            x, y = number % tiles_across * tile_width, number // tiles_across * tile_height
+            # 오른쪽/아래 가장자리 tile 은 이미지 밖 부분도 저장되어 있음
+            valid_width, rows_left = min(tile_width, width - x), min(tile_height, height - y)
+            if compression == TIFF_UNCOMPRESSED:
+                blocks = _read_blocks(fp, offset, min(byte_count, rows_left * row_bytes), block_size)
+            else:
+                blocks = _inflate_blocks(_read_blocks(fp, offset, byte_count, READ_BYTES), block_size)
+            for block in blocks:
+                rows = min(len(block) // row_bytes, rows_left)
+                if not rows:
+                    break
+                pixels = np.frombuffer(block, np.uint8, rows * row_bytes).reshape(rows, tile_width, channels)
+                alpha = pixels[:, :, alpha_index]
+                if predictor == 2:
+                    # 가로 차분: row 마다 같은 sample 끼리 누적합 (uint8 이라 256 에서 돌아감)
+                    alpha = np.cumsum(alpha, axis=1, dtype=np.uint8)
+                histogram += np.bincount(alpha[:, :valid_width].ravel(), minlength=256)
+                rows_left -= rows
+                if not rows_left:
+                    break
+    return histogram
+
+
+def alpha_histogram(img, file_path):
+    """알파 histogram 과 note, 직접 읽을 수 있으면 strip 단위로, 아니면 크기 제한 안에서 전체 decode"""
+    histogram = None
+    if img.format == "PNG":
+        histogram = png_alpha_histogram(file_path)
+    elif img.format == "TIFF":
+        histogram = tiff_alpha_histogram(img, file_path)
+    if histogram is not None:
+        return histogram, ""
+    width, height = img.size
+    if width * height > MAX_DECODE_PIXELS:
+        return None, f"alpha skipped: {img.format} too large to decode at once"
+    return img.getchannel("A").histogram(), ""
+
+
+def probe_dicom(file_path):
+    ds = pydicom.dcmread(file_path, force=True, stop_before_pixels=True, specific_tags=DICOM_TAGS)
+    mode = ds.get("PhotometricInterpretation")
+    note = "" if mode else "no PhotometricInterpretation"
+    return ModeResult("DICOM", str(mode or ""), ds.get("Columns"), ds.get("Rows"), *NO_ALPHA, note)
+
+
+def probe_image(file_path):
+    with Image.open(file_path) as img:  # 여기까지는 헤더만 읽음
+        mode = img.mode
+        width, height = img.size
+        note = ""
+        alpha = NO_ALPHA
+        if mode == "P" and "transparency" in img.info:
+            note = "palette transparency"
+        elif mode in ALPHA_MODES:
+            histogram, note = alpha_histogram(img, file_path)
+            if histogram is not None:
+                alpha = alpha_summary(histogram)
+        return ModeResult(img.format or "", mode, width, height, *alpha, note)
+
+
+def probe_file(file_path):
+    """파일 하나의 ModeResult, 오류도 ModeResult 로 돌려줌"""
+    try:
+        if file_path.lower().endswith(DICOM_SUFFIXES):
+            return probe_dicom(file_path)
+        return probe_image(file_path)
+    except Exception as e:
+        return ModeResult("", "", None, None, *NO_ALPHA, f"{type(e).__name__}: {e}")
+
+
+def mode_label(result):
+    """창에 표시하는 문자열, 예: RGB, RGBA(Alpha=0.5)"""
+    if not result.mode and result.format == "DICOM":
+        return "Unknown mode (DICOM)"
+    if not result.mode:
+        return f"Error: Invalid or unsupported file format ({result.note})" if result.note else "Unknown mode"
+    if result.alpha_mean is not None:
+        return f"{result.mode}(Alpha={result.alpha_mean:.1f})"
+    return result.mode
+
+
+def probe_batch(paths):
+    return [(path, probe_file(path)) for path in paths]
+
+
+def run_scan(paths, workers):
+    """파일 목록을 process pool 로 조사, (경로, ModeResult) 를 paths 순서대로 돌려줌"""
+    if workers <= 1:
+        for path in paths:
+            yield path, probe_file(path)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for start in range(0, len(paths), FILES_PER_TASK):
+            pending.append(executor.submit(probe_batch, paths[start:start + FILES_PER_TASK]))
+            if len(pending) >= workers * TASKS_PER_WORKER:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def collect_files(input_path, recursive=False):
+    """조사할 파일 경로 목록, 파일 하나면 그 파일만"""
+    if os.path.isfile(input_path):
+        return [input_path]
+    return [path for _, path in scan_directory(input_path, SUPPORTED_SUFFIXES, recursive)]
+
+
+def sort_rows(rows, column):
+    """(경로, ModeResult) 목록을 column 으로 정렬, 숫자 열의 빈 값은 맨 뒤"""
+    if column == "file":
+        return sorted(rows, key=lambda row: row[0])
+    if column in NUMERIC_COLUMNS:
+        def key(row):
+            value = getattr(row[1], column)
+            return (value is None, value or 0, row[0])
+    else:
+        def key(row):
+            return (getattr(row[1], column), row[0])
+    return sorted(rows, key=key)
+
+
+def _report_field(value):
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        return f"{value:.3f}"
+    return str(value)
+
+
+def _report_line(path, result):
+    fields = [path, *(_report_field(value) for value in result)]
+    return "\t".join(field.replace("\t", " ").replace("\n", " ") for field in fields) + "\n"
+
+
+def write_report(rows, report_path):
+    with open(report_path, "w", encoding="utf-8", newline="\n") as report:
+        report.write("\t".join(REPORT_COLUMNS) + "\n")
+        for path, result in rows:
+            report.write(_report_line(path, result))
+
+
+def scan_folder(paths, workers, report_path, sort_column="file"):
+    """조사하면서 진행 상황을 출력하고 정렬한 report 를 저장, 오류가 있으면 1"""
+    rows = []
+    started = time.perf_counter()
+    try:
+        for done, row in enumerate(run_scan(paths, workers), 1):
+            rows.append(row)
+            if done % PROGRESS_EVERY == 0:
+                rate = done / (time.perf_counter() - started)
+                print(f"{done}/{len(paths)} file(s), {rate:.0f} file(s)/s")
+    except KeyboardInterrupt:
+        print(f"Interrupted, writing {len(rows)} file(s) scanned so far", file=sys.stderr)
+    write_report(sort_rows(rows, sort_column), report_path)
+
+    elapsed = time.perf_counter() - started
+    modes = Counter(result.mode or ("unknown" if result.format else "error") for _, result in rows)
+    summary = ", ".join(f"{count} {mode}" for mode, count in modes.most_common())
+    print(f"Done: {len(rows)} file(s) in {elapsed:.1f}s ({summary or 'nothing to do'}) -> {report_path}")
+    for path, result in rows:
+        if not result.format:
+            print(f"❌ {os.path.basename(path)}: {result.note}")
+    return 1 if modes["error"] else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report the image mode and alpha statistics of image and DICOM files.")
+    parser.add_argument("input", help="image file or folder")
+    parser.add_argument("-o", "--output", help=f"report TSV (default: {REPORT_NAME} in the input folder)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="number of worker processes")
+    parser.add_argument("--recursive", action="store_true", help="include subfolders")
+    parser.add_argument("--sort", choices=REPORT_COLUMNS[:-1], default="file", help="report sort column")
+    args = parser.parse_args(argv)
+
+    input_folder = args.input if os.path.isdir(args.input) else os.path.dirname(os.path.abspath(args.input))
+    report_path = args.output or os.path.join(input_folder, REPORT_NAME)
+    paths = collect_files(args.input, args.recursive)
+    print(f"{len(paths)} file(s) to check")
+    return scan_folder(paths, max(1, args.workers), report_path, args.sort)
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""CSV 메타데이터와 폴더 안 파일을 파일 이름으로 한 번에 맞추는 join
+
+    index = MetadataIndex.from_csv("metadata.csv", "filename")
+    result = index.join_directory("D:\\dcm", suffixes=(".dcm",))
+    for path, row in result.matched: ...
+    result.unmatched_files   # CSV 에 없는 파일 경로
+    result.unmatched_rows    # 폴더에 파일이 없는 CSV 행
+
+CSV 는 한 번만 읽고 key 열을 정규화(공백 제거, 대소문자/확장자 옵션)해서 pandas Index 로 찾음
+"""
+import os
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+JoinResult = namedtuple("JoinResult", ["matched", "unmatched_files", "unmatched_rows"])
+
+
+def normalize_key(name, lowercase=False, strip_extension=False):
+    # CSV 값과 파일 이름에 같은 규칙을 적용
+    key = str(name).strip()
+    if strip_extension:
+        key = os.path.splitext(key)[0]
+    if lowercase:
+        key = key.lower()
+    return key
+
+
+def scan_directory(folder, suffixes=None, recursive=False):
+    """os.scandir 로 폴더를 한 번만 훑어서 [(파일 이름, 경로)] 반환, suffixes 는 소문자 확장자"""
+    files = []
+    folders = [folder]
+    while folders:
+        with os.scandir(folders.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    if recursive:
+                        folders.append(entry.path)
+                elif suffixes is None or entry.name.lower().endswith(suffixes):
+                    files.append((entry.name, entry.path))
+    files.sort()
+    return files
+
+
+class MetadataIndex:
+    """key 열로 CSV 행을 찾는 index, 같은 key 가 여러 번 나오면 첫 행 사용"""
+
+    def __init__(self, table, key_column, lowercase=False, strip_extension=False):
+        if key_column not in table.columns:
+            raise KeyError(f"CSV has no column {key_column!r}")
+        self.table = table
+        self.key_column = key_column
+        self.lowercase = lowercase
+        self.strip_extension = strip_extension
+
+        keys = table[key_column].astype(str).str.strip()
+        if strip_extension:
+            keys = keys.str.replace(r"\.[^.\\/]*$", "", regex=True)
+        if lowercase:
+            keys = keys.str.lower()
+        unique = ~keys.duplicated(keep="first")
+        self.keys = pd.Index(keys[unique].to_numpy())
+        self.positions = unique.to_numpy().nonzero()[0]  # self.keys 순서의 table 행 번호
+        self.duplicates = int((~unique).sum())
+        self._records = None
+
+    @classmethod
+    def from_csv(cls, path, key_column, lowercase=False, strip_extension=False, **read_csv_kwargs):
+        return cls(pd.read_csv(path, **read_csv_kwargs), key_column, lowercase, strip_extension)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def records(self):
+        # 행 dict 는 필요할 때 한 번에 만듦 (행마다 Series 를 만들지 않도록)
+        if self._records is None:
+            self._records = self.table.to_dict("records")
+        return self._records
+
+    def row(self, name):
+        """파일 이름으로 행 dict 를 찾음, 없으면 None"""
+        position = self.keys.get_indexer([normalize_key(name, self.lowercase, self.strip_extension)])[0]
+        if position < 0:
+            return None
+        return self.records()[self.positions[position]]
+
+    def join(self, files):
+        """[(파일 이름, 경로)] 와 CSV 를 맞춰 JoinResult 반환"""
+        file_keys = [normalize_key(name, self.lowercase, self.strip_extension) for name, _ in files]
+        found = self.keys.get_indexer(file_keys)
+        records = self.records()
+
+        matched = []
+        unmatched_files = []
+        for (_, path), position in zip(files, found):
+            if position < 0:
+                unmatched_files.append(path)
+            else:
+                matched.append((path, records[self.positions[position]]))
+        unused = np.ones(len(self.keys), dtype=bool)
+        unused[found[found >= 0]] = False
+        unmatched_rows = [records[position] for position in self.positions[unused]]
+        return JoinResult(matched, unmatched_files, unmatched_rows)
+
+    def join_directory(self, folder, suffixes=None, recursive=False):
+        return self.join(scan_directory(folder, suffixes, recursive))
@@ -1,16 +1,21 @@
 import os
-import pydicom
-from datetime import datetime, timedelta
-from collections import defaultdict
+from datetime import datetime
 
-import pandas as pd
+from change_manifest import ManifestWriter, diff_snapshots, snapshot
+from dicom_header import content_digest, read_for_edit, save_header
+from edit_journal import EditJournal, journal_entry
+from metadata_join import MetadataIndex
+from uid_remap import UidRemapper
 
 # CSV 불러오기
 csv_path = "D:\\chestxray_sample\\kaggle\\NIH_Chest_X-rays_Pneumothorax\\Pneumothorax.csv"
-df = pd.read_csv(csv_path)
+metadata = MetadataIndex.from_csv(csv_path, 'Image Index')
 
-# Study UID를 Patient ID별로 고정시키기 위한 딕셔너리
-study_uid_map = defaultdict(lambda: pydicom.uid.generate_uid())
+# Study UID를 Patient ID별로 고정 (namespace + Patient ID 로 만들어서 다시 돌려도 같은 환자는 같은 UID)
+# UID_STORE 에 경로를 넣으면 만든 UID 를 SQLite 에 기록
+UID_NAMESPACE = 'NIH_Chest_X-rays_Pneumothorax'
+UID_STORE = None
+uid_remapper = UidRemapper(UID_NAMESPACE, store_path=UID_STORE)
 
 # 기준 날짜
 base_date = datetime(2021, 1, 6)
@@ -18,15 +23,30 @@ base_date = datetime(2021, 1, 6)
 # 수정할 DICOM 폴더 경로
 dicom_dir = "D:\\chestxray_sample\\kaggle\\NIH_Chest_X-rays_Pneumothorax\\dcm"  # <-- 여기에 실제 DICOM 폴더 경로 입력
 
-for _, row in df.iterrows():
+# 경로를 넣으면 저장하지 않고 바뀔 내용만 기록 (dry run), 같은 파일로 다시 돌리면 끊긴 곳부터 이어서
+DRY_RUN_MANIFEST = None
+manifest = ManifestWriter(DRY_RUN_MANIFEST, resume=True) if DRY_RUN_MANIFEST else None
+# 저장이 끝난 파일 기록, 중간에 멈췄다 다시 돌리면 끝난 파일은 건너뜀
+JOURNAL_PATH = os.path.join(dicom_dir, 'tag_edit_journal.jsonl')
+journal = EditJournal(JOURNAL_PATH) if manifest is None else None
+
+# 폴더를 한 번만 훑어서 CSV 행과 파일을 맞춤 (행마다 os.path.exists 하지 않도록)
+joined = metadata.join_directory(dicom_dir)
+for row in joined.unmatched_rows:
+    print(f"파일 없음: {row['Image Index']}")
+
+for dcm_path, row in joined.matched:
     filename = row['Image Index']
-    dcm_path = os.path.join(dicom_dir, filename)
 
-    if not os.path.exists(dcm_path):
-        print(f"파일 없음: {filename}")
+    if manifest is not None and dcm_path in manifest.done:
+        continue
+    if journal is not None and journal.is_done(dcm_path):
         continue
 
-    ds = pydicom.dcmread(dcm_path)
+    # Pixel Data 는 읽지 않고 헤더만 수정
+    ds, pixel_ref = read_for_edit(dcm_path)
+    input_digest = content_digest(dcm_path, pixel_ref) if journal is not None else None
+    before = snapshot(ds) if manifest is not None else None
 
     # 1. Patient ID
     patient_id_str = str(row['Image Index']).split('_')[0]
@@ -57,7 +77,7 @@ for _, row in df.iterrows():
     ds.ViewPosition = row['View Position']
 
     # 8. Study Instance UID (환자 기준 고정), Series Number (Follow-up #)
-    patient_uid = study_uid_map[ds.PatientID]
+    patient_uid = uid_remapper.uid(ds.PatientID, 'StudyInstanceUID')
     ds.StudyInstanceUID = patient_uid
     ds.SeriesNumber = int(row['Follow-up #'])
 
@@ -75,6 +95,17 @@ for _, row in df.iterrows():
     ds.PatientName = os.path.splitext(filename)[0]
     ds.MedicalAlerts = findings
 
-    # 저장
-    ds.save_as(dcm_path)
+    # 저장 (헤더만 다시 쓰고 Pixel Data 는 원본 byte 그대로 복사)
+    if manifest is not None:
+        manifest.write(dcm_path, diff_snapshots(before, snapshot(ds)))
+        continue
+    output_ref = save_header(ds, pixel_ref, dcm_path)
+    journal.record(dcm_path, journal_entry(dcm_path, dcm_path, input_digest, output_ref))
     print(f"수정 완료: {filename}")
+
+uid_remapper.close()
+if journal is not None:
+    journal.close()
+if manifest is not None:
+    manifest.close()
+    print(f"Dry run: {manifest.changes}개 변경 ({manifest.changed_files}개 파일) -> {DRY_RUN_MANIFEST}")
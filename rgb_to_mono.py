@@ -1,80 +1,296 @@
+"""RGB DICOM 을 MONOCHROME2 로 변환, 폴더 전체는 process pool 로
+
+    python rgb_to_mono.py D:\\img                     # D:\\img\\out 에 저장
+    python rgb_to_mono.py D:\\img -o D:\\mono --workers 8 --recursive
+    python rgb_to_mono.py D:\\img --overwrite          # 이미 변환한 파일도 다시 변환
+    python rgb_to_mono.py D:\\img --syntax explicit    # 저장 전송구문 (기본 auto)
+
+헤더의 SamplesPerPixel 만 먼저 읽어서 RGB 가 아닌 파일은 Pixel Data 를 읽지 않고 건너뛰고,
+output 이 원본보다 새로우면 이미 변환한 것으로 보고 건너뜀 (다시 돌리면 헤더만 훑는 정도).
+압축된 입력(JPEG, JPEG 2000, RLE 등)도 frame 하나씩 decode 하고, 저장할 때 frame 하나씩 다시 압축해서
+encapsulated fragment 로 씀. auto 는 압축되지 않은 입력은 원래 전송구문 그대로, 압축된 입력은
+무손실 압축(JPEG-LS, 없으면 RLE) 으로 저장.
+파일별 결과는 output 폴더의 rgb_to_mono_results.tsv (--manifest 로 변경)
+"""
+import argparse
+import multiprocessing
 import os
-import pydicom
+import sys
+import time
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
-from pydicom.uid import generate_uid
-
-def convert_rgb_to_monochrome2(dcm_path, output_path):
-    ds = pydicom.dcmread(dcm_path)
-
-    # RGB 픽셀 데이터를 numpy array로 변환
-    pixel_array = ds.pixel_array  # shape: (H, W, 3)
-
-    if len(pixel_array.shape) == 3 and pixel_array.shape[2] == 3:
-        # RGB → Grayscale (luminosity method)
-        gray_float = np.dot(pixel_array[...,:3], [0.2989, 0.5870, 0.1140])
-
-        # dtype 판단
-        original_dtype = pixel_array.dtype
-        print(f"{os.path.basename(dcm_path)}: dtype = {original_dtype}")
-
-        if original_dtype == np.uint8:
-            gray = gray_float.astype(np.uint8)
-            ds.BitsAllocated = 8
-            ds.BitsStored = 8
-            ds.HighBit = 7
-
-        elif original_dtype == np.uint16:
-            bits_stored = getattr(ds, 'BitsStored', 12)
-            if bits_stored > 16 or bits_stored < 1:
-                print(f"⚠️ 잘못된 BitsStored 값 감지: {bits_stored}, 12로 설정")
-                bits_stored = 12
-
-            max_val = 2**bits_stored - 1
-            gray_normalized = gray_float / gray_float.max() * max_val
-            gray = gray_normalized.astype(np.uint16)
-
-            ds.BitsAllocated = 16
-            ds.BitsStored = bits_stored
-            ds.HighBit = bits_stored - 1
-
-        else:
-            print(f"❌ 지원되지 않는 dtype: {original_dtype}")
-            return
-
-        # DICOM 태그 갱신
-        ds.PhotometricInterpretation = "MONOCHROME2"
-        ds.SamplesPerPixel = 1
-        if 'PlanarConfiguration' in ds:
-            del ds.PlanarConfiguration
-        ds.PixelRepresentation = 0
-
-        # 필수 태그 보정
-        ds.ConversionType = "WSD"  # 이미지 변환 방식 명시
-        if not hasattr(ds, 'SOPInstanceUID'):
-            ds.SOPInstanceUID = generate_uid()
-
-        # 불필요한 태그 제거
-        for tag in ["NumberOfFrames", "FrameTime"]:
-            if tag in ds:
-                delattr(ds, tag)
-
-        # 픽셀 저장
-        ds.PixelData = gray.tobytes()
-        ds.Rows, ds.Columns = gray.shape
-
-        # 저장
-        ds.save_as(output_path, write_like_original=False)
-        print(f"✅ 변환 완료: {output_path}")
+import pydicom
+from pydicom.dataset import FileMetaDataset
+from pydicom.pixels import get_encoder, iter_pixels
+from pydicom.uid import ExplicitVRLittleEndian, JPEG2000Lossless, JPEGLSLossless, RLELossless, generate_uid
+
+from dicom_header import dataset_encoding, read_for_edit, save_pixel_frames
+from metadata_join import scan_directory
+
+INPUT_FOLDER = "D:\\chestxray_sample\\kaggle\\PneumothoraxMasks\\siim-acr-pneumothorax\\test\\img"
+MANIFEST_NAME = "rgb_to_mono_results.tsv"
+# luminosity 가중치 (0.2989, 0.5870, 0.1140) 를 2^16 배 한 정수
+# float 배열을 만들지 않고 정수 곱셈 + shift 로 계산 (반올림)
+LUMA_WEIGHTS = (19589, 38470, 7471)
+LUMA_SHIFT = 16
+# --syntax 로 고르는 저장 전송구문, auto 는 압축된 입력을 AUTO_SYNTAXES 중 쓸 수 있는 첫 번째로
+OUTPUT_SYNTAXES = {
+    "explicit": ExplicitVRLittleEndian,
+    "rle": RLELossless,
+    "jpeg-ls": JPEGLSLossless,
+    "j2k": JPEG2000Lossless,
+}
+AUTO_SYNTAXES = (JPEGLSLossless, RLELossless)
+# process pool 에 한 번에 넘기는 파일 수, worker 당 미리 넘겨두는 task 수
+FILES_PER_TASK = 32
+TASKS_PER_WORKER = 4
+# 이 개수마다 진행 상황 출력
+PROGRESS_EVERY = 1000
+
+# 파일 하나의 결과, status 는 아래 STATUS_* 중 하나
+ConvertResult = namedtuple("ConvertResult", ["status", "frames", "note"])
+STATUS_CONVERTED = "converted"
+STATUS_NOT_RGB = "not rgb"
+STATUS_EXISTS = "exists"
+STATUS_UNSUPPORTED = "unsupported"
+STATUS_ERROR = "error"
+RESULT_COLUMNS = ["file", "status", "frames", "output", "note"]
+
+
+def luma(rgb, work, temp):
+    """(H, W, 3) frame 의 luma 를 work 에 계산해서 돌려줌, work/temp 는 미리 만든 (H, W) 정수 buffer
+
+    uint8 은 uint32, uint16 은 uint64 buffer 면 넘치지 않음
+    """
+    np.multiply(rgb[..., 0], LUMA_WEIGHTS[0], out=work, dtype=work.dtype)
+    for channel in (1, 2):
+        np.multiply(rgb[..., channel], LUMA_WEIGHTS[channel], out=temp, dtype=work.dtype)
+        work += temp
+    work += 1 << (LUMA_SHIFT - 1)
+    work >>= LUMA_SHIFT
+    return work
+
+
+def output_syntax(input_syntax, choice="auto"):
+    """저장할 전송구문, auto 면 압축되지 않은 입력은 그대로 (None 이면 File Meta 없이 원래 인코딩)"""
+    if choice != "auto":
+        return OUTPUT_SYNTAXES[choice]
+    if input_syntax is None or not input_syntax.is_compressed:
+        return input_syntax
+    for syntax in AUTO_SYNTAXES:
+        if get_encoder(syntax).is_available:
+            return syntax
+    return ExplicitVRLittleEndian
+
+
+def convert_rgb_to_monochrome2(dcm_path, output_path, syntax="auto"):
+    """RGB 파일 하나를 변환해서 output_path 에 저장하고 ConvertResult 를 돌려줌
+
+    헤더만 먼저 읽고, Pixel Data 는 frame 하나씩 decode -> 변환 -> (압축) -> 저장 (전체 배열을 만들지 않음)
+    """
+    ds, pixel_ref = read_for_edit(dcm_path)
+
+    if ds.get("SamplesPerPixel", 1) != 3:
+        return ConvertResult(STATUS_NOT_RGB, 0, "")
+    if pixel_ref is None:
+        return ConvertResult(STATUS_UNSUPPORTED, 0, "no Pixel Data or deflated transfer syntax")
+
+    if not hasattr(ds, "file_meta"):
+        ds.file_meta = FileMetaDataset()
+    input_syntax = ds.file_meta.get("TransferSyntaxUID")
+    if input_syntax is not None and not input_syntax.is_transfer_syntax:
+        return ConvertResult(STATUS_UNSUPPORTED, 0, f"transfer syntax {input_syntax}")
+    target_syntax = output_syntax(input_syntax, syntax)
+    encapsulated = target_syntax is not None and target_syntax.is_compressed
+
+    bits_allocated = ds.get("BitsAllocated", 8)
+    rows, columns = ds.Rows, ds.Columns
+    number_of_frames = int(ds.get("NumberOfFrames", 1) or 1)
+    little_endian = target_syntax.is_little_endian if target_syntax is not None else dataset_encoding(ds)[1]
+    byte_order = "<" if little_endian or encapsulated else ">"
+    note = ""
+
+    if bits_allocated == 8:
+        work = np.empty((rows, columns), np.uint32)
+        gray = np.empty((rows, columns), np.uint8)
+        max_val = None
+        ds.BitsAllocated = 8
+        ds.BitsStored = 8
+        ds.HighBit = 7
+
+    elif bits_allocated == 16:
+        bits_stored = getattr(ds, 'BitsStored', 12)
+        if bits_stored > 16 or bits_stored < 1:
+            note = f"invalid BitsStored {bits_stored}, using 12"
+            bits_stored = 12
+        work = np.empty((rows, columns), np.uint64)
+        gray = np.empty((rows, columns), np.dtype(np.uint16).newbyteorder(byte_order))
+        max_val = 2**bits_stored - 1
+
+        ds.BitsAllocated = 16
+        ds.BitsStored = bits_stored
+        ds.HighBit = bits_stored - 1
+
     else:
-        print(f"⚠️ RGB 이미지가 아님: {dcm_path}")
-
-# 폴더 내 모든 DICOM 처리
-input_folder = "D:\\chestxray_sample\\kaggle\\PneumothoraxMasks\\siim-acr-pneumothorax\\test\\img"
-output_folder = os.path.join(input_folder, "out")
-os.makedirs(output_folder, exist_ok=True)
-
-for filename in os.listdir(input_folder):
-    if filename.lower().endswith(".dcm"):
-        input_path = os.path.join(input_folder, filename)
-        output_path = os.path.join(output_folder, filename)
-        convert_rgb_to_monochrome2(input_path, output_path)
+        return ConvertResult(STATUS_UNSUPPORTED, 0, f"BitsAllocated {bits_allocated}")
+    temp = np.empty_like(work)
+
+    gray_max = 0
+    if max_val is not None:
+        # 16bit 는 전체 frame 의 최대값으로 0 ~ max_val 로 늘리므로 최대값만 먼저 구함
+        for rgb in iter_pixels(dcm_path):
+            gray_max = max(gray_max, int(luma(rgb, work, temp).max()))
+
+    def gray_frames():
+        for rgb in iter_pixels(dcm_path):
+            frame = luma(rgb, work, temp)
+            if max_val is not None and gray_max > 0:
+                frame *= max_val
+                frame //= gray_max
+            np.copyto(gray, frame, casting="unsafe")
+            yield gray  # 다음 frame 에서 덮어쓰므로 저장하는 쪽에서 바로 씀
+
+    # DICOM 태그 갱신 (Rows/Columns/NumberOfFrames/FrameTime 은 그대로)
+    ds.PhotometricInterpretation = "MONOCHROME2"
+    ds.SamplesPerPixel = 1
+    if 'PlanarConfiguration' in ds:
+        del ds.PlanarConfiguration
+    ds.PixelRepresentation = 0
+
+    # 필수 태그 보정
+    ds.ConversionType = "WSD"  # 이미지 변환 방식 명시
+    if not hasattr(ds, 'SOPInstanceUID'):
+        ds.SOPInstanceUID = generate_uid()
+
+    # 저장 (바뀌지 않은 tag 는 원본 byte 그대로, Pixel Data 는 frame 이 나오는 대로)
+    length = number_of_frames * rows * columns * gray.itemsize
+    if target_syntax != input_syntax:
+        ds.file_meta.TransferSyntaxUID = target_syntax
+    if not encapsulated:
+        save_pixel_frames(ds, gray_frames(), length, output_path, "OB" if bits_allocated == 8 else "OW")
+        return ConvertResult(STATUS_CONVERTED, number_of_frames, note)
+
+    # frame 하나씩 압축해서 fragment 로
+    encoder = get_encoder(target_syntax)
+    image = dict(
+        rows=rows, columns=columns, samples_per_pixel=1, photometric_interpretation="MONOCHROME2",
+        bits_allocated=ds.BitsAllocated, bits_stored=ds.BitsStored, pixel_representation=0, number_of_frames=1,
+    )
+    encoded_frames = (encoder.encode(frame, **image) for frame in gray_frames())
+    output_ref = save_pixel_frames(ds, encoded_frames, None, output_path, "OB", encapsulated=True)
+    ratio = f"{length / max(output_ref.length, 1):.1f}x {target_syntax.name}"
+    return ConvertResult(STATUS_CONVERTED, number_of_frames, f"{note}, {ratio}" if note else ratio)
+
+
+def header_is_rgb(dcm_path):
+    """SamplesPerPixel 이 3 이면 True, 헤더의 tag 두 개만 변환하고 Pixel Data 는 읽지 않음"""
+    ds = pydicom.dcmread(
+        dcm_path, force=True, stop_before_pixels=True,
+        specific_tags=["SamplesPerPixel", "PhotometricInterpretation"],
+    )
+    return ds.get("SamplesPerPixel", 1) == 3
+
+
+def convert_file(dcm_path, output_path, overwrite=False, syntax="auto"):
+    """건너뛸 파일은 헤더만 보고 건너뛰고 나머지는 변환, 오류도 ConvertResult 로 돌려줌"""
+    try:
+        if not overwrite and os.path.exists(output_path):
+            if os.stat(output_path).st_mtime_ns >= os.stat(dcm_path).st_mtime_ns:
+                return ConvertResult(STATUS_EXISTS, 0, "")
+        if not header_is_rgb(dcm_path):
+            return ConvertResult(STATUS_NOT_RGB, 0, "")
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        return convert_rgb_to_monochrome2(dcm_path, output_path, syntax)
+    except Exception as e:
+        return ConvertResult(STATUS_ERROR, 0, f"{type(e).__name__}: {e}")
+
+
+def convert_batch(jobs, overwrite, syntax):
+    return [(path, output_path, convert_file(path, output_path, overwrite, syntax)) for path, output_path in jobs]
+
+
+def run_conversion(jobs, workers, overwrite=False, syntax="auto"):
+    """(원본, 저장 경로) 목록을 process pool 로 변환, (원본, 저장 경로, ConvertResult) 를 jobs 순서대로 돌려줌"""
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for start in range(0, len(jobs), FILES_PER_TASK):
+            pending.append(executor.submit(convert_batch, jobs[start:start + FILES_PER_TASK], overwrite, syntax))
+            if len(pending) >= workers * TASKS_PER_WORKER:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def collect_jobs(input_path, output_folder, recursive=False):
+    """변환할 (원본, 저장 경로) 목록, 하위 폴더 구조는 output 아래에 그대로"""
+    if os.path.isfile(input_path):
+        return [(input_path, os.path.join(output_folder, os.path.basename(input_path)))]
+    output_folder = os.path.abspath(output_folder)
+    jobs = []
+    for _, path in scan_directory(input_path, (".dcm",), recursive):
+        if os.path.abspath(path).startswith(output_folder + os.sep):
+            continue  # output 이 input 안에 있을 때 변환한 파일은 제외
+        jobs.append((path, os.path.join(output_folder, os.path.relpath(path, input_path))))
+    return jobs
+
+
+def _result_line(path, output_path, result):
+    fields = [path, result.status, str(result.frames), output_path if result.status == STATUS_CONVERTED else "",
+              result.note]
+    return "\t".join(field.replace("\t", " ").replace("\n", " ") for field in fields) + "\n"
+
+
+def convert_folder(jobs, workers, manifest_path, overwrite=False, syntax="auto"):
+    """변환하면서 파일별 결과를 manifest 에 쓰고 진행 상황/요약을 출력, 오류가 있으면 1"""
+    counts = dict.fromkeys([STATUS_CONVERTED, STATUS_NOT_RGB, STATUS_EXISTS, STATUS_UNSUPPORTED, STATUS_ERROR], 0)
+    started = time.perf_counter()
+    with open(manifest_path, "w", encoding="utf-8", newline="\n") as manifest:
+        manifest.write("\t".join(RESULT_COLUMNS) + "\n")
+        try:
+            for done, (path, output_path, result) in enumerate(run_conversion(jobs, workers, overwrite, syntax), 1):
+                manifest.write(_result_line(path, output_path, result))
+                counts[result.status] += 1
+                if result.status == STATUS_ERROR:
+                    print(f"❌ {os.path.basename(path)}: {result.note}")
+                if done % PROGRESS_EVERY == 0:
+                    manifest.flush()
+                    rate = done / (time.perf_counter() - started)
+                    print(f"{done}/{len(jobs)} file(s), {counts[STATUS_CONVERTED]} converted, {rate:.0f} file(s)/s")
+        except KeyboardInterrupt:
+            print("Interrupted, run again to continue (converted files are skipped)", file=sys.stderr)
+            return 130
+    elapsed = time.perf_counter() - started
+    summary = ", ".join(f"{count} {status}" for status, count in counts.items() if count)
+    print(f"Done: {len(jobs)} file(s) in {elapsed:.1f}s ({summary or 'nothing to do'}) -> {manifest_path}")
+    return 1 if counts[STATUS_ERROR] else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert RGB DICOM files to MONOCHROME2.")
+    parser.add_argument("input", nargs="?", default=INPUT_FOLDER, help="DICOM file or folder")
+    parser.add_argument("-o", "--output", help="output folder (default: 'out' in the input folder)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="number of worker processes")
+    parser.add_argument("--recursive", action="store_true", help="include subfolders")
+    parser.add_argument("--overwrite", action="store_true", help="convert again even if the output is up to date")
+    parser.add_argument("--syntax", choices=["auto", *OUTPUT_SYNTAXES], default="auto",
+                        help="output transfer syntax (auto: keep uncompressed input, losslessly compress the rest)")
+    parser.add_argument("--manifest", help=f"per-file results TSV (default: {MANIFEST_NAME} in the output folder)")
+    args = parser.parse_args(argv)
+    target_syntax = OUTPUT_SYNTAXES.get(args.syntax)
+    if target_syntax is not None and target_syntax.is_compressed and not get_encoder(target_syntax).is_available:
+        parser.error(f"no encoder installed for {target_syntax.name}")
+
+    input_folder = args.input if os.path.isdir(args.input) else os.path.dirname(os.path.abspath(args.input))
+    output_folder = args.output or os.path.join(input_folder, "out")
+    os.makedirs(output_folder, exist_ok=True)
+    jobs = collect_jobs(args.input, output_folder, args.recursive)
+    print(f"{len(jobs)} file(s) to check")
+    manifest_path = args.manifest or os.path.join(output_folder, MANIFEST_NAME)
+    return convert_folder(jobs, max(1, args.workers), manifest_path, args.overwrite, args.syntax)
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
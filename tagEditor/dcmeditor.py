@@ -1,9 +1,16 @@
+import multiprocessing
 import os
+import sys
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-import pydicom
-from pydicom.tag import Tag
-from pydicom.dataelem import DataElement
+
+# 공용 모듈(dicom_header, dcm_batch_edit 등)은 저장소 최상위에 하나만 두고 import (exe 는 spec 의 pathex)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from change_manifest import ManifestWriter
+from dcm_batch_edit import BatchEditRunner
+from edit_journal import EditJournal
+from tag_path import TagPathError, compile_path
 
 VR_OPTIONS = [
     "Same", "AE", "AS", "AT", "CS", "DA", "DS", "DT", "FL", "FD", "IS", "LO", "LT",
@@ -44,6 +51,24 @@ VR_LABELS = {
     "Same": "Use existing same VR"
 }
 
+# Patient's Name 을 바꿀 때 일본어 입력을 위해 지정하는 charset
+PATIENT_NAME_CHARSETS = ['ISO 2022 IR 100', 'ISO 2022 IR 13', 'ISO 2022 IR 87']
+# Path 입력칸 툴팁, Path 가 있으면 Group/Element 대신 사용
+PATH_TOOLTIP = (
+    "Path (optional, used instead of Group/Element)\n"
+    "ReferencedSeriesSequence[*].ReferencedImageSequence[0].ReferencedSOPInstanceUID\n"
+    "(0008,1115)[*].(0008,1140)[0].(0008,1155)\n"
+    '(1001,"VUNO",08)  - private tag by private creator and offset'
+)
+
+# 진행 상황 갱신 주기(ms)와 오류 목록 파일 이름
+PROGRESS_INTERVAL_MS = 100
+ERROR_LOG_NAME = "dcmeditor_errors.txt"
+# Dry run 일 때 바뀔 내용을 기록하는 파일 (output folder 안)
+MANIFEST_NAME = "dcmeditor_changes.tsv"
+# 저장이 끝난 파일 기록 (output folder 안), 중간에 멈췄다 다시 Run 하면 끝난 파일은 건너뜀
+JOURNAL_NAME = "dcmeditor_journal.jsonl"
+batch_runner = None
 
 def validate_hex_input(P):
     return len(P.strip()) <= 4 and all(c in "0123456789ABCDEFabcdef" for c in P.strip())
@@ -66,12 +91,26 @@ def modify_dicom_tags():
         os.makedirs(output_folder)
 
     tag_values = []
-    for idx, (group_entry, element_entry, vr_combobox, new_value_entry, _) in enumerate(tag_entries, start=1):
+    for idx, (group_entry, element_entry, path_entry, vr_combobox, new_value_entry, _) in enumerate(tag_entries, start=1):
         group_str = group_entry.get().strip()
         element_str = element_entry.get().strip()
+        path_str = path_entry.get().strip()
         value = new_value_entry.get().strip()
         vr = vr_combobox.get().strip()
 
+        # Path 가 있으면 Group/Element 대신 사용 (sequence 안, private creator 로 찾는 tag 등)
+        if path_str:
+            if not value:
+                messagebox.showwarning("입력 누락", f"Row {idx}: Value 가 없어 건너뜁니다.")
+                continue
+            try:
+                compile_path(path_str)
+            except TagPathError as e:
+                messagebox.showerror("Error", f"Row {idx}: {e}")
+                continue
+            tag_values.append((path_str, vr, value))
+            continue
+
         if not (group_str and element_str and value):
             messagebox.showwarning("입력 누락", f"Row {idx}: Group/Element/Value 중 누락된 항목이 있어 건너뜁니다.")
             continue
@@ -83,7 +122,7 @@ def modify_dicom_tags():
             messagebox.showerror("Error", f"Row {idx}: Group '{group_str}' 또는 Element '{element_str}'는 유효한 16진수가 아닙니다.")
             continue
 
-        tag_values.append((group, element, vr, value))
+        tag_values.append((f"({group:04X},{element:04X})", vr, value))
 
     if not tag_values:
         messagebox.showerror("Error", "No valid tag entries found.")
@@ -91,54 +130,104 @@ def modify_dicom_tags():
 
     files_to_process = []
     if source_folder:
-        for root, _, files in os.walk(source_folder):
+        for dirpath, _, files in os.walk(source_folder):
             files_to_process.extend(
-                os.path.join(root, file)
+                os.path.join(dirpath, file)
                 for file in files if file.lower().endswith(".dcm")
             )
     elif source_file:
         files_to_process.append(source_file)
 
-    try:
-        for dicom_path in files_to_process:
-            filename = os.path.basename(dicom_path)
-            try:
-                dicom = pydicom.dcmread(dicom_path)
-            except Exception as e:
-                messagebox.showerror("Error", f"Error reading DICOM file {filename}: {e}")
-                continue
+    if not files_to_process:
+        messagebox.showerror("Error", "No DICOM files found.")
+        return
 
-            for group, element, vr, new_value in tag_values:
-                tag = Tag(group, element)
-
-                try:
-                    if tag == Tag(0x0010, 0x0010):  # Patient's Name
-                        # 일본어 입력을 위해 charset 지정
-                        dicom.SpecificCharacterSet = ['ISO 2022 IR 100', 'ISO 2022 IR 13', 'ISO 2022 IR 87']
-                        value = new_value  # str 그대로 사용하면 됨
-                    else:
-                        value = new_value
-
-                    if tag in dicom:
-                        dicom[tag].value = value
-                    else:
-                        if vr == "Same":
-                            messagebox.showerror("Error", f"Tag {tag} does not exist and VR is not specified.")
-                            continue
-                        elem = DataElement(tag, vr, value)
-                        dicom.add(elem)
-                except Exception as e:
-                    messagebox.showerror("Error", f"Error processing tag {tag}: {e}")
-
-            output_path = os.path.join(output_folder, filename)
-            try:
-                dicom.save_as(output_path)
-            except Exception as e:
-                messagebox.showerror("Error", f"Error saving {filename}: {e}")
+    # Dry run 이면 저장하지 않고 manifest 만 씀, 이전 manifest 가 있으면 이어서 할지 물어봄
+    manifest = None
+    if dry_run_var.get():
+        manifest_path = os.path.join(output_folder, MANIFEST_NAME)
+        resume = False
+        if os.path.exists(manifest_path):
+            resume = messagebox.askyesnocancel(
+                "Dry run",
+                f"{manifest_path} already exists.\n\nYes: continue it (skip files already listed)\nNo: start over",
+            )
+            if resume is None:
+                return
+        try:
+            manifest = ManifestWriter(manifest_path, resume)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Error", f"Could not open {manifest_path}: {e}")
+            return
+
+    journal = None
+    if manifest is None:
+        journal_path = os.path.join(output_folder, JOURNAL_NAME)
+        try:
+            journal = EditJournal(journal_path)
+            if len(journal):
+                resume = messagebox.askyesnocancel(
+                    "Resume",
+                    f"{len(journal)} file(s) were already saved by an earlier run ({journal_path}).\n\n"
+                    "Yes: skip the finished files\nNo: edit all files again",
+                )
+                if resume is None:
+                    journal.close()
+                    return
+                if not resume:
+                    journal.close()
+                    journal = EditJournal(journal_path, resume=False)
+        except OSError as e:
+            messagebox.showerror("Error", f"Could not open {journal_path}: {e}")
+            return
+
+    # 파일 수정은 process pool 에서, 화면은 poll_batch 로 진행 상황만 갱신
+    global batch_runner
+    batch_runner = BatchEditRunner(files_to_process, output_folder, tag_values, PATIENT_NAME_CHARSETS, manifest=manifest, journal=journal)
+    run_button.config(state=tk.DISABLED)
+    cancel_button.config(state=tk.NORMAL)
+    progress_bar.config(maximum=batch_runner.total, value=0)
+    progress_label.config(text=f"0/{batch_runner.total}")
+    root.after(PROGRESS_INTERVAL_MS, poll_batch)
+
+def poll_batch():
+    running = batch_runner.pump()
+    progress_bar.config(value=batch_runner.done)
+    if running:
+        if not batch_runner.cancelled:
+            progress_label.config(text=f"{batch_runner.done}/{batch_runner.total}")
+        root.after(PROGRESS_INTERVAL_MS, poll_batch)
+        return
 
-        messagebox.showinfo("Success", "Operation Complete!")
-    except Exception as e:
-        messagebox.showerror("Error", f"Something went wrong: {e}")
+    run_button.config(state=tk.NORMAL)
+    cancel_button.config(state=tk.DISABLED)
+    progress_label.config(text=f"{batch_runner.done}/{batch_runner.total}")
+
+    # 파일마다 messagebox 를 띄우지 않고 끝난 뒤 한 번에 보여줌, 전체 목록은 파일로
+    report = batch_runner.report()
+    if batch_runner.errors:
+        log_path = os.path.join(batch_runner.output_folder, ERROR_LOG_NAME)
+        try:
+            batch_runner.write_error_log(log_path)
+            report += f"\n\nFull error list: {log_path}"
+        except OSError as e:
+            report += f"\n\nCould not write error list: {e}"
+        messagebox.showwarning("Completed with errors", report)
+    else:
+        messagebox.showinfo("Success", report)
+
+def cancel_batch():
+    if batch_runner is not None and batch_runner.running:
+        batch_runner.cancel()
+        cancel_button.config(state=tk.DISABLED)
+        progress_label.config(text="Cancelling...")
+
+def on_close():
+    # 창을 닫으면 남은 작업은 버림 (이미 돌고 있는 파일만 마저 저장)
+    if batch_runner is not None and batch_runner.running:
+        batch_runner.cancel()
+        batch_runner.close()
+    root.destroy()
 
 def browse_folder(entry):
     folder_path = filedialog.askdirectory()
@@ -161,8 +250,11 @@ def add_edit_row():
     group_element_frame = tk.Frame(root)
     group_entry = tk.Entry(group_element_frame, width=6, validate="key", validatecommand=(validate_hex, "%P"))
     element_entry = tk.Entry(group_element_frame, width=6, validate="key", validatecommand=(validate_hex, "%P"))
+    path_entry = tk.Entry(group_element_frame, width=24)
     group_entry.pack(side="left", padx=(0, 3))
     element_entry.pack(side="left")
+    path_entry.pack(side="left", padx=(3, 0))
+    ToolTip(path_entry, PATH_TOOLTIP)
 
     vr_combobox = ttk.Combobox(root, values=VR_OPTIONS, width=7)
     vr_combobox.set("Same")
@@ -191,7 +283,7 @@ def add_edit_row():
     new_value_entry.grid(row=row_index, column=2, columnspan=2, padx=(3, 3), pady=2, sticky="we")
     delete_button.grid(row=row_index, column=4, padx=(2, 0), pady=2)
 
-    tag_entries.append((group_entry, element_entry, vr_combobox, new_value_entry, delete_button))
+    tag_entries.append((group_entry, element_entry, path_entry, vr_combobox, new_value_entry, delete_button))
     add_edit_button.grid(row=row_index + 1, column=0, columnspan=2, pady=5, sticky="w")
     run_button.grid(row=row_index + 1, column=3, columnspan=2, pady=5, sticky="e")
 
@@ -230,71 +322,92 @@ class ToolTip:
         self.tipwindow = None
 
 # ---------------------- GUI ----------------------
-root = tk.Tk()
-root.title("DICOM Tag Editor")
-root.geometry("620x450")
-
-for col in range(5):
-    root.grid_columnconfigure(col, weight=1 if col in (2, 3) else 0)
+if __name__ == "__main__":
+    # worker process 에서 창이 뜨지 않도록 GUI 는 main 에서만 생성
+    multiprocessing.freeze_support()
 
-validate_hex = root.register(validate_hex_input)
+    root = tk.Tk()
+    root.title("DICOM Tag Editor")
+    root.geometry("620x450")
 
-def create_path_row(label_text, row, entry_var, browse_cmd):
-    tk.Label(root, text=label_text).grid(row=row, column=0, padx=(10, 2), pady=5, sticky="e")
-    entry_var.grid(row=row, column=1, columnspan=3, padx=(0, 2), pady=5, sticky="we")
-    tk.Button(root, text="Browse", command=browse_cmd).grid(row=row, column=4, padx=(2, 10), pady=5, sticky="w")
+    for col in range(5):
+        root.grid_columnconfigure(col, weight=1 if col in (2, 3) else 0)
 
-source_entry = tk.Entry(root, width=60)
-file_entry = tk.Entry(root, width=60)
-output_entry = tk.Entry(root, width=60)
+    validate_hex = root.register(validate_hex_input)
 
-create_path_row("Source Folder:", 0, source_entry, lambda: browse_folder(source_entry))
-create_path_row("Source File:", 1, file_entry, lambda: browse_file(file_entry))
-create_path_row("Output Folder:", 2, output_entry, lambda: browse_folder(output_entry))
+    def create_path_row(label_text, row, entry_var, browse_cmd):
+        tk.Label(root, text=label_text).grid(row=row, column=0, padx=(10, 2), pady=5, sticky="e")
+        entry_var.grid(row=row, column=1, columnspan=3, padx=(0, 2), pady=5, sticky="we")
+        tk.Button(root, text="Browse", command=browse_cmd).grid(row=row, column=4, padx=(2, 10), pady=5, sticky="w")
 
-tk.Label(root, text="Tag Edit", font=("Helvetica", 16)).grid(row=3, column=0, columnspan=6, pady=(10, 0))
-tk.Frame(root, height=2, bd=1, relief=tk.SUNKEN).grid(row=4, column=0, columnspan=6, sticky="we", padx=10, pady=5)
+    source_entry = tk.Entry(root, width=60)
+    file_entry = tk.Entry(root, width=60)
+    output_entry = tk.Entry(root, width=60)
 
-# 라벨
-tk.Label(root, text="Group / Element").grid(row=5, column=0, padx=3, sticky="w")
-tk.Label(root, text="VR").grid(row=5, column=1, padx=3, sticky="w")
-tk.Label(root, text="New Value").grid(row=5, column=2, columnspan=2, padx=3, sticky="w")
+    create_path_row("Source Folder:", 0, source_entry, lambda: browse_folder(source_entry))
+    create_path_row("Source File:", 1, file_entry, lambda: browse_file(file_entry))
+    create_path_row("Output Folder:", 2, output_entry, lambda: browse_folder(output_entry))
 
-# 초기 한 줄
-tag_entries = []
+    tk.Label(root, text="Tag Edit", font=("Helvetica", 16)).grid(row=3, column=0, columnspan=6, pady=(10, 0))
+    tk.Frame(root, height=2, bd=1, relief=tk.SUNKEN).grid(row=4, column=0, columnspan=6, sticky="we", padx=10, pady=5)
 
-group_element_frame = tk.Frame(root)
-initial_group_entry = tk.Entry(group_element_frame, width=6, validate="key", validatecommand=(validate_hex, "%P"))
-initial_element_entry = tk.Entry(group_element_frame, width=6, validate="key", validatecommand=(validate_hex, "%P"))
-initial_group_entry.pack(side="left", padx=(0, 3))
-initial_element_entry.pack(side="left")
+    # 라벨
+    tk.Label(root, text="Group / Element / Path").grid(row=5, column=0, padx=3, sticky="w")
+    tk.Label(root, text="VR").grid(row=5, column=1, padx=3, sticky="w")
+    tk.Label(root, text="New Value").grid(row=5, column=2, columnspan=2, padx=3, sticky="w")
 
-initial_vr_combobox = ttk.Combobox(root, values=VR_OPTIONS, width=7)
-initial_vr_combobox.set("Same")
-initial_vr_combobox.grid(row=1, column=1, padx=10, pady=5)
+    # 초기 한 줄
+    tag_entries = []
 
-# 툴팁 연결
-tooltip = ToolTip(initial_vr_combobox, VR_LABELS.get("Same"))
+    group_element_frame = tk.Frame(root)
+    initial_group_entry = tk.Entry(group_element_frame, width=6, validate="key", validatecommand=(validate_hex, "%P"))
+    initial_element_entry = tk.Entry(group_element_frame, width=6, validate="key", validatecommand=(validate_hex, "%P"))
+    initial_path_entry = tk.Entry(group_element_frame, width=24)
+    initial_group_entry.pack(side="left", padx=(0, 3))
+    initial_element_entry.pack(side="left")
+    initial_path_entry.pack(side="left", padx=(3, 0))
+    ToolTip(initial_path_entry, PATH_TOOLTIP)
+
+    initial_vr_combobox = ttk.Combobox(root, values=VR_OPTIONS, width=7)
+    initial_vr_combobox.set("Same")
+    initial_vr_combobox.grid(row=1, column=1, padx=10, pady=5)
+
+    # 툴팁 연결
+    tooltip = ToolTip(initial_vr_combobox, VR_LABELS.get("Same"))
+
+    def update_tooltip(event):
+        vr = initial_vr_combobox.get()
+        tooltip.text = VR_LABELS.get(vr, "Unknown VR")
 
-def update_tooltip(event):
-    vr = initial_vr_combobox.get()
-    tooltip.text = VR_LABELS.get(vr, "Unknown VR")
+    initial_vr_combobox.bind("<<ComboboxSelected>>", update_tooltip)
 
-initial_vr_combobox.bind("<<ComboboxSelected>>", update_tooltip)
 
+    initial_new_value_entry = tk.Entry(root, width=60)
 
-initial_new_value_entry = tk.Entry(root, width=60)
+    group_element_frame.grid(row=6, column=0, padx=(10, 2), pady=2, sticky="w")
+    initial_vr_combobox.grid(row=6, column=1, padx=3, pady=2, sticky="w")
+    initial_new_value_entry.grid(row=6, column=2, columnspan=2, padx=(3, 3), pady=2, sticky="we")
 
-group_element_frame.grid(row=6, column=0, padx=(10, 2), pady=2, sticky="w")
-initial_vr_combobox.grid(row=6, column=1, padx=3, pady=2, sticky="w")
-initial_new_value_entry.grid(row=6, column=2, columnspan=2, padx=(3, 3), pady=2, sticky="we")
+    tag_entries.append((initial_group_entry, initial_element_entry, initial_path_entry, initial_vr_combobox, initial_new_value_entry, None))
 
-tag_entries.append((initial_group_entry, initial_element_entry, initial_vr_combobox, initial_new_value_entry, None))
+    add_edit_button = tk.Button(root, text="Add Edit", command=add_edit_row)
+    run_button = tk.Button(root, text="Run", command=modify_dicom_tags)
 
-add_edit_button = tk.Button(root, text="Add Edit", command=add_edit_row)
-run_button = tk.Button(root, text="Run", command=modify_dicom_tags)
+    add_edit_button.grid(row=7, column=0, columnspan=2, pady=5, sticky="w", padx=(10, 0))
+    run_button.grid(row=7, column=3, columnspan=2, pady=5, sticky="e", padx=(0, 10))
 
-add_edit_button.grid(row=7, column=0, columnspan=2, pady=5, sticky="w", padx=(10, 0))
-run_button.grid(row=7, column=3, columnspan=2, pady=5, sticky="e", padx=(0, 10))
+    # 진행 표시 (Run 을 누르면 채워짐)
+    progress_frame = tk.Frame(root)
+    progress_bar = ttk.Progressbar(progress_frame, mode="determinate")
+    progress_label = tk.Label(progress_frame, text="", width=16, anchor="e")
+    dry_run_var = tk.BooleanVar(value=False)
+    dry_run_check = tk.Checkbutton(progress_frame, text="Dry run", variable=dry_run_var)
+    cancel_button = tk.Button(progress_frame, text="Cancel", command=cancel_batch, state=tk.DISABLED)
+    dry_run_check.pack(side="left", padx=(0, 5))
+    progress_bar.pack(side="left", fill="x", expand=True)
+    progress_label.pack(side="left", padx=5)
+    cancel_button.pack(side="left")
+    progress_frame.grid(row=1000, column=0, columnspan=5, padx=10, pady=(5, 10), sticky="we")
 
-root.mainloop()
+    root.protocol("WM_DELETE_WINDOW", on_close)
+    root.mainloop()
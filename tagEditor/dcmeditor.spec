@@ -1,4 +1,5 @@
 # -*- mode: python ; coding: utf-8 -*-
+import os
 import sys
 from PyInstaller.utils.hooks import collect_data_files
 from PyInstaller.utils.hooks import collect_submodules
@@ -12,8 +13,9 @@ datas += collect_data_files('pylibjpeg')
 datas += collect_data_files('pylibjpeg-libjpeg')
 datas += collect_data_files('pylibjpeg-openjpeg')
  
+# dicom_header, dcm_batch_edit 등 공용 모듈은 저장소 최상위에 있음
 a = Analysis(['dcmeditor.py'],
-             pathex=[],
+             pathex=[os.path.dirname(SPECPATH)],
              binaries=[],
              datas=datas,
              hiddenimports=collect_submodules('pydicom') +
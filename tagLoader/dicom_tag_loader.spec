@@ -1,5 +1,6 @@
 # dicom_tag_loader.spec
 # This is a PyInstaller spec file for the DICOM Viewer application.
+import os
 import sys
 from PyInstaller.utils.hooks import collect_data_files
 from PyInstaller.utils.hooks import collect_submodules
@@ -15,9 +16,12 @@ datas += collect_data_files('PyQt5')
 datas += collect_data_files('numpy')
  
  
+# 실행 파일은 저장소 최상위의 dicom_tag_loader.py 로 빌드 (dicom_header, dicom_tag_dump 등도 최상위)
+REPO_ROOT = os.path.dirname(SPECPATH)
+
 a = Analysis(
-    ['dicom_tag_loader.py'],  # Input script
-    pathex=[],  # Path where your script is located
+    [os.path.join(REPO_ROOT, 'dicom_tag_loader.py')],  # Input script
+    pathex=[REPO_ROOT],  # Path where your script is located
     binaries=[('C:\\Python312\\Lib\\site-packages\\gdcm\\_gdcmswig.pyd', '.')],
     datas=datas,
              hiddenimports=collect_submodules('pydicom') +
@@ -0,0 +1,192 @@
+"""sequence 안이나 private block 의 element 를 가리키는 tag 경로
+
+    ReferencedSeriesSequence[*].ReferencedImageSequence[0].ReferencedSOPInstanceUID
+    (0008,1115)[*].(0008,1140)[0].(0008,1155)
+    (1001,"VUNO",08)                    # private creator 로 찾는 private tag, 마지막은 offset(hex 2자리)
+    PatientName                         # 한 단계짜리는 최상위 element
+
+단계는 '.' 으로 구분하고 각 단계는 키워드, (gggg,eeee), gggg,eeee, ggggeeee, (gggg,"creator",ee) 중 하나.
+중간 sequence 뒤의 [n] 은 n 번째 item, [*] 또는 생략은 모든 item.
+compile_path 는 문자열을 한 번만 해석하고, 파일마다는 만들어 둔 단계를 따라가기만 함
+"""
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+from pydicom.datadict import dictionary_VR, keyword_for_tag, tag_for_keyword
+from pydicom.dataelem import DataElement
+from pydicom.tag import Tag
+
+
+class TagPathError(ValueError):
+    """경로 문법 오류, 또는 경로대로 수정할 수 없는 경우"""
+
+
+# tag 는 Tag, private 이면 tag 대신 (group, creator, offset)
+PathStep = namedtuple("PathStep", ["tag", "private", "index"])
+
+_SEGMENT = re.compile(
+    r"""\s*(?:
+        \(\s*(?P<private_group>[0-9A-Fa-f]{4})\s*,\s*"(?P<creator>[^"]*)"\s*,\s*(?P<offset>[0-9A-Fa-f]{2})\s*\)
+      | \(\s*(?P<paren_group>[0-9A-Fa-f]{4})\s*,\s*(?P<paren_element>[0-9A-Fa-f]{4})\s*\)
+      | (?P<group>[0-9A-Fa-f]{4})\s*,\s*(?P<element>[0-9A-Fa-f]{4})
+      | (?P<packed>[0-9A-Fa-f]{8})(?![A-Za-z0-9])
+      | (?P<keyword>[A-Za-z][A-Za-z0-9]*)
+    )\s*(?:\[\s*(?P<index>\*|\d+)\s*\])?\s*""",
+    re.VERBOSE,
+)
+
+
+def _parse_step(match, text):
+    index = match.group("index")
+    index = None if index in (None, "*") else int(index)
+    if match.group("private_group"):
+        group = int(match.group("private_group"), 16)
+        if group % 2 == 0:
+            raise TagPathError(f"{text!r}: private group {group:04X} must be odd")
+        private = (group, match.group("creator"), int(match.group("offset"), 16))
+        return PathStep(None, private, index)
+    if match.group("keyword"):
+        tag = tag_for_keyword(match.group("keyword"))
+        if tag is None:
+            raise TagPathError(f"{text!r}: unknown keyword {match.group('keyword')!r}")
+        return PathStep(Tag(tag), None, index)
+    if match.group("packed"):
+        return PathStep(Tag(int(match.group("packed"), 16)), None, index)
+    group = match.group("paren_group") or match.group("group")
+    element = match.group("paren_element") or match.group("element")
+    return PathStep(Tag(int(group, 16), int(element, 16)), None, index)
+
+
+@lru_cache(maxsize=1024)
+def compile_path(text):
+    """문자열을 TagPath 로, 같은 문자열은 한 번만 해석"""
+    steps = []
+    position = 0
+    text = str(text)
+    while True:
+        match = _SEGMENT.match(text, position)
+        if match is None or match.end() == match.start():
+            raise TagPathError(f"{text!r}: cannot parse at position {position}")
+        steps.append(_parse_step(match, text))
+        position = match.end()
+        if position == len(text):
+            break
+        if text[position] != ".":
+            raise TagPathError(f"{text!r}: expected '.' at position {position}")
+        position += 1
+    if steps[-1].index is not None:
+        raise TagPathError(f"{text!r}: the last step cannot have an index")
+    return TagPath(text, tuple(steps))
+
+
+class TagPath:
+    def __init__(self, text, steps):
+        self.text = text
+        self.steps = steps
+
+    def __repr__(self):
+        return f"TagPath({self.text!r})"
+
+    @property
+    def tag(self):
+        """최상위 표준 tag 한 단계짜리면 그 Tag, 아니면 None"""
+        if len(self.steps) == 1 and self.steps[0].private is None:
+            return self.steps[0].tag
+        return None
+
+    @property
+    def key(self):
+        # UID remap 등에서 경로를 구분하는 문자열, 한 단계짜리는 스크립트와 같게 키워드
+        # (사전에 없는 tag 면 "(gggg,eeee)")
+        if self.tag is None:
+            return self.text
+        return keyword_for_tag(self.tag) or str(self.tag)
+
+    def default_VR(self):
+        """새 element 를 만들 때 쓸 사전 VR, 사전에 없거나 private 이면 None"""
+        last = self.steps[-1]
+        if last.private is not None:
+            return None
+        try:
+            VR = dictionary_VR(last.tag)
+        except KeyError:
+            return None
+        return None if " or " in VR else VR
+
+    @staticmethod
+    def _step_tag(dataset, step, create):
+        if step.private is None:
+            return step.tag
+        group, creator, offset = step.private
+        try:
+            return dataset.private_block(group, creator, create=create).get_tag(offset)
+        except KeyError:
+            return None  # private creator 가 없음
+
+    def targets(self, dataset, create=False):
+        """경로가 가리키는 (상위 dataset, tag) 목록, 마지막 element 는 없어도 포함
+
+        중간 sequence 나 item 이 없으면 그 가지는 건너뜀, create 면 private block 은 새로 만듦
+        """
+        datasets = [dataset]
+        for step in self.steps[:-1]:
+            items = []
+            for parent in datasets:
+                tag = self._step_tag(parent, step, False)
+                if tag is None or tag not in parent:
+                    continue
+                sequence = parent[tag].value
+                if parent[tag].VR != "SQ" or sequence is None:
+                    raise TagPathError(f"{tag} is not a sequence")
+                if step.index is None:
+                    items.extend(sequence)
+                elif step.index < len(sequence):
+                    items.append(sequence[step.index])
+            datasets = items
+
+        last = self.steps[-1]
+        found = []
+        for parent in datasets:
+            tag = self._step_tag(parent, last, create)
+            if tag is not None:
+                found.append((parent, tag))
+        return found
+
+    def get(self, dataset):
+        """경로에 있는 DataElement 목록"""
+        return [parent[tag] for parent, tag in self.targets(dataset) if tag in parent]
+
+    def set(self, dataset, value, VR=None, strict=False, create=True):
+        """경로의 모든 element 값을 바꾸고 없으면 추가, 바꾼 개수를 돌려줌
+
+        VR 은 새로 추가할 때만 쓰고, 없으면 사전 VR
+        create 가 False 면 있는 element 만 바꾸고 마지막 element 가 없으면 TagPathError
+        중간 sequence/item 이 없는 파일은 바꿀 곳이 없으므로 0 (strict 면 TagPathError)
+        """
+        targets = self.targets(dataset, create=create)
+        if not targets:
+            if not create and len(self.steps) == 1:
+                # 최상위 private tag 인데 private creator 가 없음
+                raise TagPathError(f"{self.text} does not exist and VR is not specified")
+            if strict:
+                raise TagPathError("no matching sequence item")
+            return 0
+        VR = (VR or self.default_VR()) if create else None
+        for parent, tag in targets:
+            if tag in parent:
+                parent[tag].value = value
+            elif VR is None:
+                raise TagPathError(f"{tag} does not exist and VR is not specified")
+            else:
+                parent.add(DataElement(tag, VR, value))
+        return len(targets)
+
+    def delete(self, dataset):
+        """경로의 element 를 모두 지우고 지운 개수를 돌려줌"""
+        count = 0
+        for parent, tag in self.targets(dataset):
+            if tag in parent:
+                del parent[tag]
+                count += 1
+        return count
@@ -2,6 +2,8 @@ import os
 import pydicom
 from pydicom.tag import Tag
 
+from dicom_header import read_for_edit, save_header
+
 def update_dicom_tags(input_folder, output_folder):
     # 출력 폴더 없으면 생성
     os.makedirs(output_folder, exist_ok=True)
@@ -13,7 +15,7 @@ def update_dicom_tags(input_folder, output_folder):
             output_path = os.path.join(output_folder, filename)
 
             try:
-                ds = pydicom.dcmread(input_path)
+                ds, pixel_ref = read_for_edit(input_path)
 
                 # (0008,0005) Specific Character Set
                 ds[Tag(0x0008, 0x0005)] = pydicom.DataElement(
@@ -25,8 +27,8 @@ def update_dicom_tags(input_folder, output_folder):
                     Tag(0x0010, 0x0010), 'PN', 'AKIHABARA^TARO=秋葉原^太郎=あきはばら^たろう'
                 )
 
-                # 저장
-                ds.save_as(output_path)
+                # 저장 (헤더만 다시 쓰고 Pixel Data 는 원본 byte 그대로 복사)
+                save_header(ds, pixel_ref, output_path)
                 print(f"[✔] Updated: {filename}")
 
             except Exception as e:
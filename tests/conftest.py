@@ -0,0 +1,7 @@
+import os
+import sys
+
+# 도구 스크립트들은 저장소 최상위 모듈을 import 함
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
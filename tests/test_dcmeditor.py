@@ -0,0 +1,102 @@
+"""dcmeditor.modify_dicom_tags 를 Tk 창 없이 stub widget 으로 실행"""
+import importlib.util
+import os
+import shutil
+import time
+
+import pydicom
+import pytest
+from pydicom.data import get_testdata_file
+
+from conftest import ROOT
+
+
+class StubEntry:
+    def __init__(self, value=""):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+    def config(self, **options):
+        pass
+
+
+class StubRoot:
+    """after 로 등록한 callback 을 모아 두고 run_pending 에서 차례로 실행"""
+
+    def __init__(self):
+        self.callbacks = []
+
+    def after(self, ms, callback):
+        self.callbacks.append((ms, callback))
+
+    def run_pending(self, timeout=60.0):
+        deadline = time.monotonic() + timeout
+        while self.callbacks:
+            if time.monotonic() > deadline:
+                raise AssertionError("batch did not finish")
+            ms, callback = self.callbacks.pop(0)
+            time.sleep(ms / 1000)
+            callback()
+
+
+def load_editor(relative_path):
+    name = "dcmeditor_" + relative_path.replace(os.sep, "_").replace("/", "_").replace(".", "_")
+    spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT, relative_path))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture(params=["dcmeditor.py", os.path.join("tagEditor", "dcmeditor.py")])
+def editor(request, monkeypatch):
+    module = load_editor(request.param)
+    messages = []
+    for kind in ("showerror", "showwarning", "showinfo"):
+        monkeypatch.setattr(module.messagebox, kind, lambda title, text, kind=kind: messages.append((kind, text)))
+    module.messages = messages
+    module.root = StubRoot()
+    module.run_button = module.cancel_button = StubEntry()
+    module.progress_bar = module.progress_label = StubEntry()
+    module.dry_run_var = StubEntry(False)
+    module.batch_runner = None
+    return module
+
+
+def set_inputs(editor, source_folder="", source_file="", output_folder=""):
+    editor.source_entry = StubEntry(source_folder)
+    editor.file_entry = StubEntry(source_file)
+    editor.output_entry = StubEntry(output_folder)
+    # (group, element, path, VR, value, delete button)
+    editor.tag_entries = [(StubEntry("0010"), StubEntry("0020"), StubEntry(""), StubEntry("Same"),
+                           StubEntry("EDITED"), None)]
+
+
+def test_folder_batch_starts_and_saves(editor, tmp_path):
+    source = tmp_path / "source" / "nested"
+    source.mkdir(parents=True)
+    shutil.copy(get_testdata_file("CT_small.dcm"), source / "a.dcm")
+    output = tmp_path / "output"
+    set_inputs(editor, source_folder=str(tmp_path / "source"), output_folder=str(output))
+
+    editor.modify_dicom_tags()
+    assert editor.root.callbacks, editor.messages
+    editor.root.run_pending()
+
+    assert [kind for kind, _ in editor.messages] == ["showinfo"]
+    saved = [os.path.join(folder, name) for folder, _, names in os.walk(output) for name in names
+             if name.endswith(".dcm")]
+    assert len(saved) == 1
+    assert pydicom.dcmread(saved[0]).PatientID == "EDITED"
+
+
+def test_single_file_batch_starts(editor, tmp_path):
+    source_file = tmp_path / "a.dcm"
+    shutil.copy(get_testdata_file("CT_small.dcm"), source_file)
+    set_inputs(editor, source_file=str(source_file), output_folder=str(tmp_path / "output"))
+
+    editor.modify_dicom_tags()
+    assert editor.root.callbacks, editor.messages
+    editor.root.run_pending()
+    assert editor.batch_runner.done == 1 and not editor.batch_runner.errors
@@ -0,0 +1,36 @@
+import os
+import shutil
+import stat
+
+import pytest
+from pydicom.data import get_testdata_file
+
+from dicom_header import read_for_edit, save_header
+
+
+def file_mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+@pytest.mark.skipif(os.name == "nt", reason="POSIX permission bits")
+@pytest.mark.parametrize("mode", [0o644, 0o640])
+def test_overwrite_keeps_file_mode(tmp_path, mode):
+    path = tmp_path / "a.dcm"
+    shutil.copy(get_testdata_file("CT_small.dcm"), path)
+    os.chmod(path, mode)
+    dataset, pixel_ref = read_for_edit(str(path))
+    dataset.PatientID = "EDITED"
+    save_header(dataset, pixel_ref, str(path))
+    assert file_mode(path) == mode
+
+
+@pytest.mark.skipif(os.name == "nt", reason="POSIX permission bits")
+def test_new_file_uses_umask(tmp_path):
+    source = get_testdata_file("CT_small.dcm")
+    dataset, pixel_ref = read_for_edit(source)
+    umask = os.umask(0o027)
+    try:
+        save_header(dataset, pixel_ref, str(tmp_path / "new.dcm"))
+    finally:
+        os.umask(umask)
+    assert file_mode(tmp_path / "new.dcm") == 0o640
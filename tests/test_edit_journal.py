@@ -0,0 +1,46 @@
+import json
+import os
+
+from edit_journal import EditJournal, journal_entry
+
+
+def write(path, data):
+    with open(path, "wb") as fp:
+        fp.write(data)
+
+
+def test_is_done_until_source_or_output_changes(tmp_path):
+    source, output = tmp_path / "a.dcm", tmp_path / "out.dcm"
+    write(source, b"source")
+    write(output, b"output")
+    journal_path = tmp_path / "journal.jsonl"
+    with EditJournal(str(journal_path)) as journal:
+        journal.record(str(source), journal_entry(str(source), str(output), "digest"))
+        assert journal.is_done(str(source))
+
+    with EditJournal(str(journal_path)) as journal:
+        assert journal.is_done(str(source))
+        # 같은 이름으로 다시 내보낸 원본
+        write(source, b"re-exported")
+        assert not journal.is_done(str(source))
+
+
+def test_in_place_edit_is_done(tmp_path):
+    path = tmp_path / "a.dcm"
+    write(path, b"edited in place")
+    with EditJournal(str(tmp_path / "journal.jsonl")) as journal:
+        journal.record(str(path), journal_entry(str(path), str(path), "digest"))
+        assert journal.is_done(str(path))
+
+
+def test_entry_without_source_stat_is_not_done(tmp_path):
+    source, output = tmp_path / "a.dcm", tmp_path / "out.dcm"
+    write(source, b"source")
+    write(output, b"output")
+    stat = os.stat(output)
+    journal_path = tmp_path / "journal.jsonl"
+    with open(journal_path, "w", encoding="utf-8") as fp:
+        fp.write(json.dumps([str(source), str(output), "digest", None, stat.st_size, stat.st_mtime_ns]) + "\n")
+    with EditJournal(str(journal_path)) as journal:
+        assert str(source) in journal
+        assert not journal.is_done(str(source))
@@ -0,0 +1,13 @@
+from pydicom.dataset import Dataset
+
+from edit_recipe import apply_ops, compile_recipe
+from uid_remap import UidRemapper
+
+
+def test_uid_op_matches_script_uid():
+    # recipes/odir.yaml 의 uid op 와 dicom_tag_edit.py 는 같은 환자에 같은 StudyInstanceUID
+    spec = {"uid": "StudyInstanceUID", "key": "{stem}", "sub": [["_(left|right)$", ""]]}
+    ops = compile_recipe({"uid_namespace": "ODIR-5K", "ops": [spec]})
+    dataset = Dataset()
+    assert apply_ops(dataset, ops, {"filename": "0_left.dcm", "stem": "0_left"}) == []
+    assert dataset.StudyInstanceUID == UidRemapper("ODIR-5K").uid("0", "StudyInstanceUID")
@@ -0,0 +1,45 @@
+import pytest
+from pydicom.data import get_testdata_file
+from pydicom.dataset import Dataset
+
+from dcm_batch_edit import apply_tag_values, edit_file
+from tag_path import TagPathError, compile_path
+
+NESTED = "ReferencedSeriesSequence[*].SeriesInstanceUID"
+
+
+def test_set_without_matching_item_is_a_no_op():
+    dataset = Dataset()
+    assert compile_path(NESTED).set(dataset, "1.2.3") == 0
+    assert "ReferencedSeriesSequence" not in dataset
+    with pytest.raises(TagPathError):
+        compile_path(NESTED).set(dataset, "1.2.3", strict=True)
+
+
+def test_set_updates_every_item():
+    dataset = Dataset()
+    dataset.ReferencedSeriesSequence = [Dataset(), Dataset()]
+    assert compile_path(NESTED).set(dataset, "1.2.3") == 2
+    assert [item.SeriesInstanceUID for item in dataset.ReferencedSeriesSequence] == ["1.2.3", "1.2.3"]
+
+
+def test_batch_edit_journals_files_without_the_sequence(tmp_path):
+    errors, entry, unmatched = edit_file(
+        get_testdata_file("CT_small.dcm"), str(tmp_path), [(NESTED, "Same", "1.2.3"), ("(0010,0020)", "Same", "X")]
+    )
+    assert errors == []
+    assert entry is not None
+    assert unmatched == [NESTED]
+
+
+def test_same_VR_does_not_add_missing_tag():
+    dataset = Dataset()
+    dataset.PatientID = "A"
+    errors, unmatched = apply_tag_values(dataset, [("PatientName", "Same", "X"), ("PatientID", "Same", "B")])
+    assert errors == ["Error modifying PatientName: (0010,0010) does not exist and VR is not specified"]
+    assert unmatched == []
+    assert "PatientName" not in dataset
+    assert dataset.PatientID == "B"
+    errors, _ = apply_tag_values(dataset, [('(1001,"VUNO",08)', "Same", "X")])
+    assert len(errors) == 1
+    assert (0x1001, 0x0010) not in dataset
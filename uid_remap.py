@@ -0,0 +1,106 @@
+"""key(환자 ID, 원래 UID 등) 마다 항상 같은 새 UID 를 돌려주는 remapper
+
+    remapper = UidRemapper("ODIR-5K")                            # namespace 로 hash 해서 만듦
+    remapper = UidRemapper("ODIR-5K", store_path="uids.sqlite")  # 만든 UID 를 파일에도 기록
+    ds.StudyInstanceUID = remapper.uid(patient_id, "StudyInstanceUID")
+
+namespace 가 있으면 UID 는 generate_uid(prefix, [namespace, kind, key]) 로 정해지므로
+다른 process 나 다음 실행에서도 같은 값이 나옴. store(SQLite) 를 주면 처음 나온 UID 를 기록하고
+그 뒤로는 기록된 값을 씀 (namespace 가 None 이면 무작위 UID 를 기록해서 같은 key 에 재사용).
+process pool 에 그대로 넘겨도 되고, SQLite 연결은 process 마다 따로 엶
+"""
+import os
+import sqlite3
+
+from pydicom.uid import PYDICOM_ROOT_UID, generate_uid
+
+# 여러 process 가 동시에 쓸 때 lock 을 기다리는 시간(초)
+STORE_TIMEOUT = 60.0
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS uid_map (
+    namespace TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    uid TEXT NOT NULL,
+    PRIMARY KEY (namespace, kind, key)
+) WITHOUT ROWID
+"""
+
+
+class UidRemapper:
+    def __init__(self, namespace=None, prefix=PYDICOM_ROOT_UID, store_path=None):
+        if namespace is None and store_path is None:
+            raise ValueError("UidRemapper needs a namespace or a store_path, otherwise UIDs are not repeatable")
+        self.namespace = namespace
+        self.prefix = prefix
+        self.store_path = store_path
+        self._cache = {}
+        self._connection = None
+        self._pid = None
+
+    def __getstate__(self):
+        # process pool 로 넘길 때 연결/캐시는 빼고 설정만
+        return {"namespace": self.namespace, "prefix": self.prefix, "store_path": self.store_path}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def _store(self):
+        # fork 된 process 에서 부모의 연결을 쓰지 않도록 pid 가 바뀌면 새로 엶
+        if self._connection is None or self._pid != os.getpid():
+            connection = sqlite3.connect(self.store_path, timeout=STORE_TIMEOUT, isolation_level=None)
+            # WAL: 읽는 process 가 쓰는 process 를 막지 않음
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(_SCHEMA)
+            self._connection = connection
+            self._pid = os.getpid()
+        return self._connection
+
+    def _new_uid(self, kind, key):
+        if self.namespace is None:
+            return generate_uid(prefix=self.prefix)
+        return generate_uid(prefix=self.prefix, entropy_srcs=[self.namespace, kind, key])
+
+    def uid(self, key, kind=""):
+        """key 에 대한 UID, kind 는 같은 key 로 Study/Series 등 다른 UID 가 필요할 때 구분용"""
+        key = str(key)
+        cache_key = (kind, key)
+        uid = self._cache.get(cache_key)
+        if uid is not None:
+            return uid
+        uid = self._new_uid(kind, key)
+        if self.store_path is not None:
+            # 먼저 기록한 process 의 값이 이김 (무작위 UID 여도 모두 같은 값을 씀)
+            connection = self._store()
+            namespace = self.namespace or ""
+            connection.execute(
+                "INSERT OR IGNORE INTO uid_map (namespace, kind, key, uid) VALUES (?, ?, ?, ?)",
+                (namespace, kind, key, uid),
+            )
+            (uid,) = connection.execute(
+                "SELECT uid FROM uid_map WHERE namespace = ? AND kind = ? AND key = ?",
+                (namespace, kind, key),
+            ).fetchone()
+        self._cache[cache_key] = uid
+        return uid
+
+    def items(self):
+        """store 에 기록된 (kind, key, uid) 전체, 원래 값과 새 UID 대응표를 남길 때"""
+        if self.store_path is None:
+            return []
+        return self._store().execute(
+            "SELECT kind, key, uid FROM uid_map WHERE namespace = ? ORDER BY kind, key",
+            (self.namespace or "",),
+        ).fetchall()
+
+    def close(self):
+        if self._connection is not None and self._pid == os.getpid():
+            self._connection.close()
+        self._connection = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()